@@ -0,0 +1,129 @@
+# duty_cycle.py
+"""
+Game-phase driven processing rate for the vision loop.
+
+The camera keeps streaming all game long, but frames only matter while the
+human may be placing a disc. The loop asks `DutyCycle.due()` before
+classifying a frame; the answer depends on the current phase:
+
+    waiting_human   every frame (full rate)
+    robot_moving    low-rate watchdog, only to see the robot's disc land
+    ai_thinking     paused, the search gets the CPU
+    game_over       low-rate, keeps the overlay alive
+
+Wall time, process CPU time, processed frames and (where the kernel
+exposes Intel RAPL counters) package energy are accounted per phase.
+"""
+
+import time
+from contextlib import contextmanager
+
+WAIT_HUMAN = "waiting_human"
+ROBOT_MOVING = "robot_moving"
+AI_THINKING = "ai_thinking"
+GAME_OVER = "game_over"
+
+# Frames classified per second in each phase (None = every frame, 0 = paused)
+DEFAULT_RATES = {
+    WAIT_HUMAN: None,
+    ROBOT_MOVING: 2.0,
+    AI_THINKING: 0,
+    GAME_OVER: 1.0,
+}
+
+RAPL_ENERGY = "/sys/class/powercap/intel-rapl:0/energy_uj"
+
+
+def _read_energy_uj(path=RAPL_ENERGY):
+    """Package energy counter in µJ, or None if not readable here."""
+    try:
+        with open(path) as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+class DutyCycle:
+    def __init__(self, rates=None, phase=WAIT_HUMAN, energy_path=RAPL_ENERGY):
+        self.rates = dict(DEFAULT_RATES)
+        if rates:
+            self.rates.update(rates)
+        self.energy_path = energy_path
+        self.has_energy = _read_energy_uj(energy_path) is not None
+
+        self.totals = {p: {"wall_s": 0.0, "cpu_s": 0.0, "energy_j": 0.0, "frames": 0, "skipped": 0}
+                       for p in self.rates}
+        self.current = phase
+        self._last_processed = 0.0
+        self._mark()
+
+    def _mark(self):
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self._energy0 = _read_energy_uj(self.energy_path) if self.has_energy else None
+
+    def _close_phase(self):
+        t = self.totals[self.current]
+        t["wall_s"] += time.perf_counter() - self._wall0
+        t["cpu_s"] += time.process_time() - self._cpu0
+        if self._energy0 is not None:
+            energy = _read_energy_uj(self.energy_path)
+            if energy is not None and energy >= self._energy0:   # counter wraps
+                t["energy_j"] += (energy - self._energy0) / 1e6
+
+    def set_phase(self, phase):
+        if phase == self.current:
+            return
+        self._close_phase()
+        self.current = phase
+        self._mark()
+        # Process the first frame of a new phase right away
+        self._last_processed = 0.0
+
+    @contextmanager
+    def phase(self, phase):
+        """Temporarily switch phase (e.g. around the AI search)."""
+        previous = self.current
+        self.set_phase(phase)
+        try:
+            yield self
+        finally:
+            self.set_phase(previous)
+
+    def due(self, now=None):
+        """True if the current frame should be classified in this phase."""
+        rate = self.rates[self.current]
+        t = self.totals[self.current]
+        if rate is None:
+            t["frames"] += 1
+            return True
+        now = time.perf_counter() if now is None else now
+        if rate > 0 and now - self._last_processed >= 1.0 / rate:
+            self._last_processed = now
+            t["frames"] += 1
+            return True
+        t["skipped"] += 1
+        return False
+
+    def report(self):
+        """Per-phase wall/CPU time, CPU share, frames per second and mean power."""
+        self._close_phase()
+        self._mark()
+        out = {}
+        for p, t in self.totals.items():
+            wall = t["wall_s"]
+            row = dict(t)
+            row["cpu_pct"] = 100.0 * t["cpu_s"] / wall if wall else 0.0
+            row["fps"] = t["frames"] / wall if wall else 0.0
+            row["power_w"] = (t["energy_j"] / wall if wall else 0.0) if self.has_energy else None
+            out[p] = row
+        return out
+
+    def print_report(self):
+        print(f"{'phase':>14} {'wall s':>8} {'cpu s':>7} {'cpu %':>6} {'fps':>6} {'power W':>8}")
+        for p, r in self.report().items():
+            if r["wall_s"] == 0.0:
+                continue
+            power = f"{r['power_w']:>8.1f}" if r["power_w"] is not None else f"{'n/a':>8}"
+            print(f"{p:>14} {r['wall_s']:>8.1f} {r['cpu_s']:>7.1f} {r['cpu_pct']:>6.0f} "
+                  f"{r['fps']:>6.1f} {power}")
@@ -1,10 +1,12 @@
 import numpy as np
 import random
 
-def choose_next_move(game, depth=5):
+def choose_next_move(game, depth=5, stats=None):
     """
     Minimax-based AI: evaluates future board states up to a given depth.
     Returns the best column for the robot.
+    stats: optional dict, filled with the minimax score of every valid column
+           ("scores"), of the chosen one ("score") and the positions searched ("nodes")
     """
     board = game.board.copy()
     ai_player = game.current_player
@@ -17,19 +19,25 @@ def choose_next_move(game, depth=5):
     best_score = -np.inf
     best_col = random.choice(valid_cols)
     best_moves = []
+    nodes = [0]
 
     for col in valid_cols:
         row = get_next_open_row(board, col)
         temp_board = board.copy()
         temp_board[row, col] = ai_player
-        score = minimax(temp_board, depth - 1, False, ai_player, opponent, -np.inf, np.inf)
+        score = minimax(temp_board, depth - 1, False, ai_player, opponent, -np.inf, np.inf, nodes)
         if score > best_score:
             best_score = score
             best_moves = [col]
         elif score == best_score:
             best_moves.append(col)
+        if stats is not None:
+            stats.setdefault("scores", {})[col] = float(score)
 
     best_col = random.choice(best_moves)    
+    if stats is not None:
+        stats["score"] = float(best_score)
+        stats["nodes"] = nodes[0]
     return best_col
 
 
@@ -74,7 +82,9 @@ def winning_move(board, player):
 # Minimax core with alpha-beta pruning
 # -------------------------------
 
-def minimax(board, depth, maximizing, ai_player, opponent, alpha, beta):
+def minimax(board, depth, maximizing, ai_player, opponent, alpha, beta, nodes=None):
+    if nodes is not None:
+        nodes[0] += 1
     valid_cols = get_valid_columns(board)
     is_terminal = winning_move(board, ai_player) or winning_move(board, opponent) or len(valid_cols) == 0
 
@@ -92,7 +102,7 @@ def minimax(board, depth, maximizing, ai_player, opponent, alpha, beta):
             row = get_next_open_row(board, col)
             temp_board = board.copy()
             temp_board[row, col] = ai_player
-            value = max(value, minimax(temp_board, depth - 1, False, ai_player, opponent, alpha, beta))
+            value = max(value, minimax(temp_board, depth - 1, False, ai_player, opponent, alpha, beta, nodes))
             alpha = max(alpha, value)
             if alpha >= beta:
                 break
@@ -103,7 +113,7 @@ def minimax(board, depth, maximizing, ai_player, opponent, alpha, beta):
             row = get_next_open_row(board, col)
             temp_board = board.copy()
             temp_board[row, col] = opponent
-            value = min(value, minimax(temp_board, depth - 1, True, ai_player, opponent, alpha, beta))
+            value = min(value, minimax(temp_board, depth - 1, True, ai_player, opponent, alpha, beta, nodes))
             beta = min(beta, value)
             if alpha >= beta:
                 break
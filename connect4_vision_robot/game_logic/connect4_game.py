@@ -31,6 +31,17 @@ class Connect4Game:
                 return (r, col)
         return None
 
+    def undo_move(self, col):
+        """
+        Remove the top disc of the column.
+        Returns (row, col) of the removed disc, or None if the column is empty.
+        """
+        for r in range(self.rows):
+            if self.board[r, col] != 0:
+                self.board[r, col] = 0
+                return (r, col)
+        return None
+
     def switch_player(self):
         """Switch to the other player."""
         self.current_player = 1 if self.current_player == 2 else 2
@@ -0,0 +1,448 @@
+# game_logic/game_record.py
+"""
+Compact append-only binary record of every game played.
+
+A record file starts with MAGIC + version and holds any number of games,
+appended as they are played. Each record is a 3-byte head (tag, payload
+size) and its payload, little-endian:
+
+    G  game   start time, rows, cols, human/robot/first colour, AI depth,
+              then the dashboard settings as JSON
+    M  move   column, row (image index, 0 = top), colour, flags (robot /
+              searched), search depth, ply, wall time, search time, score,
+              nodes searched, keyframe (-1 = none)          35 bytes in all
+    U  undo   moves of the game that stand: the last move was taken back
+              (the robot could not play it)
+    E  end    end time, winner (1 / 2, -1 draw, 0 unfinished), moves
+
+Every record is written with one write() and flushed, so a crash loses at
+most the record being written. GameRecorder cuts such a torn tail off
+before it appends to the file again; the reader ignores one (a file still
+being written) and skips tags it does not know.
+
+GameRecordReader maps the file and indexes it with numpy: the moves of a
+game are consecutive fixed-size records, read in place as a structured
+array. Indexing a million moves takes well under a second, after which any
+move is one lookup away.
+
+Keyframes are JPEGs of the board view a move was seen in, stored next to
+the record (`games.c4rec.frames/<offset>.jpg`, named after the move's byte
+offset in the record).
+
+    python -m game_logic.game_record list games.c4rec
+    python -m game_logic.game_record replay games.c4rec --game 3
+    python -m game_logic.game_record check games.c4rec
+    python -m game_logic.game_record bench --moves 1000000
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+from .connect4_game import Connect4Game
+
+RECORD_FILE = "games.c4rec"
+
+MAGIC = b"C4REC"
+VERSION = 1
+FILE_HEAD = struct.Struct("<5sBH")       # magic, version, reserved
+RECORD_HEAD = struct.Struct("<BH")       # tag, payload size
+
+GAME_TAG, MOVE_TAG, UNDO_TAG, END_TAG = ord("G"), ord("M"), ord("U"), ord("E")
+GAME = struct.Struct("<dBBBBBB")         # + settings JSON
+MOVE = struct.Struct("<BBBBBxHdffIi")
+UNDO = struct.Struct("<H")
+END = struct.Struct("<dbH")
+
+# Move flags
+ROBOT = 1        # played by the robot
+SEARCHED = 2     # think_s / score / nodes come from an AI search
+
+# A move record as read in place from the file (head included)
+MOVE_DTYPE = np.dtype([
+    ("tag", "u1"), ("size", "<u2"),
+    ("col", "u1"), ("row", "u1"), ("player", "u1"), ("flags", "u1"), ("depth", "u1"),
+    ("_pad", "u1"), ("ply", "<u2"), ("t", "<f8"), ("think_s", "<f4"), ("score", "<f4"),
+    ("nodes", "<u4"), ("keyframe", "<i4"),
+])
+MOVE_BYTES = RECORD_HEAD.size + MOVE.size
+assert MOVE_DTYPE.itemsize == MOVE_BYTES
+
+
+class GameRecorder:
+    def __init__(self, path=RECORD_FILE, keyframes=False):
+        """
+        path:      record file, created or appended to
+        keyframes: store the board view passed to move(image=...) as a JPEG
+                   in `<path>.frames/`
+        """
+        self.path = path
+        self.keyframe_dir = path + ".frames" if keyframes else None
+        self._lock = threading.Lock()
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size:
+            # Raises ValueError if this is not a record file
+            reader = GameRecordReader(path)
+            complete = reader.end
+            reader.close()
+            if complete < size:
+                # Interrupted write: appending after it would hide every later record
+                print(f"[game_record] {path}: dropping {size - complete} bytes of an "
+                      f"interrupted record.")
+                with open(path, "r+b") as f:
+                    f.truncate(complete)
+        self._f = open(path, "ab")
+        self._f.seek(0, os.SEEK_END)
+        if self._f.tell() == 0:
+            self._f.write(FILE_HEAD.pack(MAGIC, VERSION, 0))
+            self._f.flush()
+        self._in_game = False
+        self._ply = 0
+
+    def _write(self, tag, payload):
+        data = RECORD_HEAD.pack(tag, len(payload)) + payload
+        offset = self._f.tell()
+        self._f.write(data)
+        self._f.flush()
+        return offset
+
+    def begin_game(self, rows, cols, human_color, robot_color, first_color, depth, settings=None):
+        """Start a new game (an open one is ended as unfinished first)."""
+        if self._in_game:
+            self.end_game(0)
+        payload = GAME.pack(time.time(), rows, cols, human_color, robot_color, first_color, depth)
+        payload += json.dumps(settings or {}, default=str).encode("utf-8")
+        with self._lock:
+            self._write(GAME_TAG, payload)
+            self._in_game = True
+            self._ply = 0
+
+    def move(self, col, row, player, robot=False, search=None, think_s=None, depth=0, image=None):
+        """
+        Append one move. search: stats dict filled by choose_next_move()
+        ("score", "nodes"); image: board view saved as the move's keyframe.
+        """
+        flags = ROBOT if robot else 0
+        score, nodes = float("nan"), 0
+        if search:
+            flags |= SEARCHED
+            score = float(search.get("score", score))
+            nodes = int(search.get("nodes", 0))
+        with self._lock:
+            if not self._in_game:
+                return
+            offset = self._f.tell()
+            keyframe = -1
+            if image is not None and self.keyframe_dir is not None and _save_keyframe(
+                    os.path.join(self.keyframe_dir, f"{offset}.jpg"), image):
+                keyframe = offset
+            self._write(MOVE_TAG, MOVE.pack(col, row, player, flags, depth, self._ply, time.time(),
+                                            think_s or 0.0, score, nodes, keyframe))
+            self._ply += 1
+
+    def retract(self):
+        """Take back the last move (a robot move the arm could not play)."""
+        with self._lock:
+            if not self._in_game or not self._ply:
+                return
+            self._ply -= 1
+            self._write(UNDO_TAG, UNDO.pack(self._ply))
+
+    def end_game(self, winner):
+        """winner: 1 / 2, -1 for a draw, 0 if the game was not finished."""
+        with self._lock:
+            if not self._in_game:
+                return
+            self._write(END_TAG, END.pack(time.time(), int(winner), self._ply))
+            self._in_game = False
+
+    def close(self):
+        """Close the file; a game still open is recorded as unfinished."""
+        self.end_game(0)
+        with self._lock:
+            self._f.close()
+
+
+def _save_keyframe(path, image):
+    import cv2
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return cv2.imwrite(path, image, [cv2.IMWRITE_JPEG_QUALITY, 80])
+
+
+class RecordedGame:
+    """One game of a record. `moves` is a structured array (MOVE_DTYPE) read in place."""
+
+    __slots__ = ("index", "offset", "start", "rows", "cols", "human_color", "robot_color",
+                 "first_color", "depth", "moves", "end", "winner", "_settings")
+
+    def __init__(self, index, offset, head, settings):
+        self.index = index
+        self.offset = offset
+        (self.start, self.rows, self.cols, self.human_color, self.robot_color,
+         self.first_color, self.depth) = head
+        self._settings = settings
+        self.moves = None
+        self.end = None       # end time, None if the record stops mid-game
+        self.winner = 0
+
+    @property
+    def settings(self):
+        return json.loads(bytes(self._settings).decode("utf-8") or "{}")
+
+
+class GameRecordReader:
+    """
+    Memory-mapped view of a record file, as it was when opened.
+
+        reader = GameRecordReader("games.c4rec")
+        reader.game(3).moves["col"]          # one game
+        reader.move(123456)                  # (game index, move) for any move
+        reader.moves()["think_s"].mean()     # every move as one array
+    """
+
+    def __init__(self, path=RECORD_FILE):
+        self.path = path
+        self.keyframe_dir = path + ".frames"
+        size = os.path.getsize(path)
+        if size < FILE_HEAD.size:
+            raise ValueError(f"{path} is not a game record")
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # Plain array over the mapping: move arrays are views into it, nothing is copied
+        self._raw = np.frombuffer(self._mm, dtype=np.uint8)
+        magic, version, _ = FILE_HEAD.unpack_from(self._mm, 0)
+        if magic != MAGIC or version > VERSION:
+            raise ValueError(f"{path} is not a game record (version {VERSION})")
+        self.games = []
+        self.end = FILE_HEAD.size   # end of the last complete record
+        self._index()
+        counts = [len(g.moves) for g in self.games]
+        # Global move number of each game's first move
+        self._first = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+    def _index(self):
+        mm, raw = self._mm, self._raw
+        n = len(raw)
+        pos = FILE_HEAD.size
+        game = None
+        while pos + RECORD_HEAD.size <= n:
+            tag, size = RECORD_HEAD.unpack_from(mm, pos)
+            body = pos + RECORD_HEAD.size
+            if body + size > n:
+                break   # torn tail
+            if tag == GAME_TAG and size >= GAME.size:
+                game = RecordedGame(len(self.games), pos, GAME.unpack_from(mm, body),
+                                    raw[body + GAME.size:body + size])
+                self.games.append(game)
+                pos = body + size
+                # The moves follow as consecutive fixed-size records
+                room = min(game.rows * game.cols, (n - pos) // MOVE_BYTES)
+                moves = raw[pos:pos + room * MOVE_BYTES].view(MOVE_DTYPE)
+                other = (moves["tag"] != MOVE_TAG) | (moves["size"] != MOVE.size)
+                count = int(np.argmax(other)) if other.any() else room
+                game.moves = moves[:count]
+                pos += count * MOVE_BYTES
+                continue
+            if tag == UNDO_TAG and game is not None and size >= UNDO.size:
+                game.moves = game.moves[:UNDO.unpack_from(mm, body)[0]]
+            elif tag == MOVE_TAG and game is not None and size == MOVE.size:
+                # Played after an undo: no longer consecutive, so the game's moves are copied
+                game.moves = np.concatenate((game.moves, raw[pos:body + size].view(MOVE_DTYPE)))
+            elif tag == END_TAG and game is not None and size >= END.size:
+                game.end, game.winner, _ = END.unpack_from(mm, body)
+                game = None
+            pos = body + size
+        self.end = pos
+
+    def close(self):
+        """Unmap the file (move arrays taken from this reader must be gone)."""
+        self.games = []
+        self._raw = None
+        self._mm.close()
+
+    # ---------- access ----------
+    @property
+    def move_count(self):
+        return int(self._first[-1])
+
+    def __len__(self):
+        return len(self.games)
+
+    def __iter__(self):
+        return iter(self.games)
+
+    def game(self, index):
+        return self.games[index]
+
+    def move(self, number):
+        """Move `number` counted over all games: (game index, move record)."""
+        if not 0 <= number < self.move_count:
+            raise IndexError(number)
+        g = int(np.searchsorted(self._first, number, side="right")) - 1
+        return g, self.games[g].moves[number - self._first[g]]
+
+    def iter_moves(self):
+        """(game index, move record) for every move, in file order."""
+        for game in self.games:
+            for m in game.moves:
+                yield game.index, m
+
+    def moves(self):
+        """Every move as one structured array (a copy), plus the game index of each."""
+        if not self.games:
+            return np.empty(0, MOVE_DTYPE), np.empty(0, np.int64)
+        counts = np.diff(self._first)
+        # Joined as raw bytes: much faster than concatenating packed structured arrays
+        moves = np.concatenate([g.moves.view(np.uint8) for g in self.games]).view(MOVE_DTYPE)
+        return moves, np.repeat(np.arange(len(self.games)), counts)
+
+    def keyframe_path(self, move):
+        """JPEG stored for a move, or None."""
+        k = int(move["keyframe"])
+        return os.path.join(self.keyframe_dir, f"{k}.jpg") if k >= 0 else None
+
+
+# -------------------------------
+# Replay
+# -------------------------------
+
+def replay(recorded):
+    """
+    Step a Connect4Game through a recorded game, yielding (move, game) after
+    each move. Raises ValueError if a move is illegal or lands on another
+    row than recorded.
+    """
+    game = Connect4Game(recorded.rows, recorded.cols)
+    for m in recorded.moves:
+        col, row, player = int(m["col"]), int(m["row"]), int(m["player"])
+        if not 0 <= col < game.cols or not game.is_valid_move(col):
+            raise ValueError(f"game {recorded.index} ply {int(m['ply'])}: column {col + 1} is not playable")
+        game.current_player = player
+        placed = game.make_move(col)
+        if placed[0] != row:
+            raise ValueError(f"game {recorded.index} ply {int(m['ply'])}: disc landed in row "
+                             f"{placed[0]}, recorded {row}")
+        game.switch_player()
+        yield m, game
+
+
+def _describe(m):
+    who = "robot" if m["flags"] & ROBOT else "human"
+    color = "Red" if m["player"] == 1 else "Yellow"
+    text = f"{int(m['ply']) + 1:>3}. {who:<5} {color:<6} column {int(m['col']) + 1}"
+    if m["flags"] & SEARCHED:
+        text += (f"  (depth {int(m['depth'])}, score {float(m['score']):g}, "
+                 f"{int(m['nodes'])} nodes, {float(m['think_s']):.2f} s)")
+    return text
+
+
+def _winner_text(winner):
+    return {1: "Red wins", 2: "Yellow wins", -1: "draw"}.get(int(winner), "unfinished")
+
+
+def _bench(path, n_moves, seed=0):
+    """Write random legal games with about `n_moves` moves, then time reading them back."""
+    rng = np.random.default_rng(seed)
+    t0 = time.perf_counter()
+    recorder = GameRecorder(path)
+    written = 0
+    while written < n_moves:
+        recorder.begin_game(6, 7, 2, 1, 1, 4)
+        heights = [0] * 7
+        for ply in range(int(rng.integers(7, 43))):
+            free = [c for c in range(7) if heights[c] < 6]
+            col = free[int(rng.integers(len(free)))]
+            heights[col] += 1
+            robot = ply % 2 == 0
+            search = {"score": float(rng.normal(0, 50)), "nodes": int(rng.integers(1, 5000))} \
+                if robot else None
+            recorder.move(col, 6 - heights[col], 1 if robot else 2, robot=robot, search=search,
+                          think_s=0.1 if robot else None, depth=4 if robot else 0)
+            written += 1
+        recorder.end_game(0)
+    recorder.close()
+    t_write = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    reader = GameRecordReader(path)
+    t_index = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    moves, _ = reader.moves()
+    mean_nodes = moves["nodes"][moves["flags"] & SEARCHED != 0].mean()
+    t_bulk = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    picks = rng.integers(reader.move_count, size=100_000)
+    for i in picks:
+        reader.move(int(i))
+    t_random = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    replayed = sum(1 for g in reader.games[:1000] for _ in replay(g))
+    t_replay = time.perf_counter() - t0
+
+    size = os.path.getsize(path)
+    print(f"{reader.move_count} moves in {len(reader)} games, {size / 1e6:.1f} MB "
+          f"({size / reader.move_count:.1f} bytes/move)")
+    print(f"write {t_write:.2f} s, index {t_index:.2f} s, all moves as one array {t_bulk:.2f} s "
+          f"(mean nodes {mean_nodes:.0f})")
+    print(f"100000 random moves {t_random:.2f} s, replay {replayed} moves {t_replay:.2f} s")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="List, replay or check recorded games.")
+    parser.add_argument("command", choices=["list", "replay", "check", "bench"])
+    parser.add_argument("file", nargs="?", default=RECORD_FILE)
+    parser.add_argument("--game", type=int, default=-1, help="game to replay (default: the last)")
+    parser.add_argument("--step", action="store_true", help="replay: wait for Enter after each move")
+    parser.add_argument("--moves", type=int, default=1_000_000, help="bench: moves to write")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        if os.path.exists(args.file):
+            parser.error(f"{args.file} exists; bench writes a new file")
+        _bench(args.file, args.moves)
+        raise SystemExit
+
+    reader = GameRecordReader(args.file)
+    if args.command == "list":
+        for g in reader:
+            print(f"#{g.index:<5} {time.strftime('%Y-%m-%d %H:%M', time.localtime(g.start))}  "
+                  f"{len(g.moves):>2} moves  depth {g.depth}  {_winner_text(g.winner)}")
+        print(f"{len(reader)} games, {reader.move_count} moves")
+    elif args.command == "replay":
+        recorded = reader.game(args.game)
+        print(f"Game #{recorded.index}, settings {recorded.settings}")
+        for m, game in replay(recorded):
+            print(_describe(m))
+            path = reader.keyframe_path(m)
+            if path:
+                print(f"     keyframe {path}")
+            print(game.board)
+            if args.step:
+                input()
+        print(f"Recorded result: {_winner_text(recorded.winner)}, "
+              f"replayed board: {_winner_text(game.check_winner())}")
+    else:
+        t0 = time.perf_counter()
+        bad = 0
+        for recorded in reader:
+            try:
+                game = None
+                for _, game in replay(recorded):
+                    pass
+                if recorded.winner not in (0, game.check_winner() if game else 0):
+                    raise ValueError(f"game {recorded.index}: recorded "
+                                     f"{_winner_text(recorded.winner)}, board says "
+                                     f"{_winner_text(game.check_winner())}")
+            except ValueError as e:
+                bad += 1
+                print(f"⚠️ {e}")
+        print(f"✅ {len(reader) - bad}/{len(reader)} games replay cleanly "
+              f"({reader.move_count} moves, {time.perf_counter() - t0:.1f} s)")
@@ -0,0 +1,193 @@
+# game_logic/reconcile.py
+
+import time
+from collections import Counter, namedtuple
+
+import numpy as np
+
+# ----- Typed events returned by BoardReconciler.reconcile -----
+# Rows/cols are image indices (row 0 = top), colors 1 = Red, 2 = Yellow.
+HumanMove = namedtuple("HumanMove", "row col color")
+RobotMoveConfirmed = namedtuple("RobotMoveConfirmed", "row col color")
+Anomaly = namedtuple("Anomaly", "reason cells")
+
+# Anomaly reasons
+OCCLUDED = "occluded"                   # known discs missing (hand / glare in front)
+COLOR_CHANGED = "color_changed"         # a confirmed disc now reads as the other colour
+FLOATING = "floating"                   # disc with an empty cell below it
+OUT_OF_TURN = "out_of_turn"             # new discs cannot alternate legally
+UNEXPECTED_ROBOT = "unexpected_robot_disc"  # robot-colour disc nobody asked for
+
+# Misreads that can be ignored cell by cell once they persist (see BoardReconciler)
+MISREADS = (OCCLUDED, COLOR_CHANGED, FLOATING)
+
+
+def _cells(mask):
+    return [(int(r), int(c)) for r, c in np.argwhere(mask)]
+
+
+class BoardReconciler:
+    """
+    Explains the observed board in terms of legal moves.
+
+    Instead of requiring exactly one changed cell per frame, the observed
+    board is compared with the last *confirmed* physical board. All new discs
+    are found with array operations, and a move order is inferred that
+    alternates colours, respects gravity column by column, and accounts for
+    robot moves that were commanded but not seen yet. If a robot disc landed
+    while detection was paused and the human has already answered, both moves
+    are reported in the same frame and the loop does not stall. The human
+    only ever gets one move per explanation, so a reply is never skipped.
+
+    A misread (occluded, recoloured or floating cells) that stays the same
+    for `stuck_after` seconds is not waited out forever: its cells are
+    ignored, read as the confirmed board has them, until they read right
+    again (a floating cell: until a disc below supports it).
+    """
+
+    def __init__(self, human_color, robot_color, first_color, rows=6, cols=7, stuck_after=5.0):
+        self.human_color = human_color
+        self.robot_color = robot_color
+        self.first_color = first_color
+        self.rows = rows
+        self.cols = cols
+        self.stuck_after = stuck_after
+        self.confirmed = np.zeros((rows, cols), dtype=int)
+        self.pending_robot = []   # columns commanded to the robot, not yet seen
+        self.ignored = {}         # (row, col) → reason of a persistent misread
+        self._anomaly = None      # (reason, cells, first seen) of the current anomaly
+
+    def reset(self, board=None):
+        self.confirmed = np.zeros((self.rows, self.cols), dtype=int) if board is None else board.copy()
+        self.pending_robot = []
+        self.ignored = {}
+        self._anomaly = None
+
+    def expect_robot_move(self, col):
+        """Register a column the robot has been told to play."""
+        self.pending_robot.append(int(col))
+
+    def cancel_robot_move(self, col):
+        """Withdraw a commanded robot move that will not happen (the arm failed)."""
+        if int(col) in self.pending_robot:
+            self.pending_robot.remove(int(col))
+
+    def _next_color(self):
+        placed = int(np.count_nonzero(self.confirmed))
+        other = 1 if self.first_color == 2 else 2
+        return self.first_color if placed % 2 == 0 else other
+
+    def reconcile(self, observed, now=None):
+        """
+        Compare `observed` with the confirmed board.
+        Returns a list of events: [] (nothing new), HumanMove / RobotMoveConfirmed
+        in play order, or a single Anomaly (confirmed board left unchanged).
+        """
+        now = time.time() if now is None else now
+        observed = self._mask_ignored(np.array(observed))
+        events = self._explain(observed)
+        if not events or not isinstance(events[0], Anomaly):
+            self._anomaly = None
+            return events
+
+        anomaly = events[0]
+        key = (anomaly.reason, tuple(anomaly.cells))
+        if self._anomaly is None or self._anomaly[:2] != key:
+            self._anomaly = key + (now,)
+            return events
+        if anomaly.reason not in MISREADS or now - self._anomaly[2] < self.stuck_after:
+            return events
+        # Same misread for stuck_after seconds: ignore those cells and read the rest
+        self.ignored.update((cell, anomaly.reason) for cell in anomaly.cells)
+        self._anomaly = None
+        return self.reconcile(observed, now)
+
+    def _mask_ignored(self, observed):
+        """Replace ignored cells with the confirmed board; release cells that read right again."""
+        confirmed = self.confirmed
+        for (r, c), reason in list(self.ignored.items()):
+            supported = r == self.rows - 1 or confirmed[r + 1, c] != 0
+            if observed[r, c] == confirmed[r, c] or (reason == FLOATING and supported):
+                del self.ignored[(r, c)]
+            else:
+                observed[r, c] = confirmed[r, c]
+        return observed
+
+    def _explain(self, observed):
+        confirmed = self.confirmed
+
+        occupied_before = confirmed != 0
+        occupied_now = observed != 0
+
+        # 1) Known discs must still be there, in the same colour
+        missing = occupied_before & ~occupied_now
+        if missing.any():
+            return [Anomaly(OCCLUDED, _cells(missing))]
+        recolored = occupied_before & (observed != confirmed)
+        if recolored.any():
+            return [Anomaly(COLOR_CHANGED, _cells(recolored))]
+
+        # 2) Gravity: every occupied cell must sit on an occupied cell (row+1 is below)
+        floating = occupied_now[:-1] & ~occupied_now[1:]
+        if floating.any():
+            return [Anomaly(FLOATING, _cells(floating))]
+
+        added = occupied_now & ~occupied_before
+        if not added.any():
+            return []
+
+        # 3) New discs per column, bottom → top (drop order within a column)
+        stacks = []
+        for c in np.flatnonzero(added.any(axis=0)):
+            rows_new = np.flatnonzero(added[:, c])[::-1]
+            stacks.append([(int(r), int(c), int(observed[r, c])) for r in rows_new])
+
+        colors = observed[added]
+        robot_new = int(np.count_nonzero(colors == self.robot_color))
+        if robot_new > len(self.pending_robot):
+            cells = _cells(added & (observed == self.robot_color))
+            return [Anomaly(UNEXPECTED_ROBOT, cells)]
+
+        order = self._alternating_order(stacks, self._next_color(), Counter(self.pending_robot))
+        if order is None:
+            return [Anomaly(OUT_OF_TURN, _cells(added))]
+        # Two human discs in one explanation means the robot's reply between
+        # them was skipped: wait for a board that shows one human move
+        if sum(1 for _, _, color in order if color != self.robot_color) > 1:
+            return [Anomaly(OUT_OF_TURN, _cells(added))]
+
+        events = []
+        for r, c, color in order:
+            if color == self.robot_color:
+                self.pending_robot.remove(c)
+                events.append(RobotMoveConfirmed(r, c, color))
+            else:
+                events.append(HumanMove(r, c, color))
+        self.confirmed = observed.copy()
+        return events
+
+    def _alternating_order(self, stacks, color, robot_cols):
+        """
+        Depth-first search for an order that takes the bottom disc of some
+        column each step, alternates colours starting with `color`, and only
+        uses robot-colour discs in columns the robot was asked to play.
+        Returns [(row, col, color), ...] or None.
+        """
+        if not any(stacks):
+            return []
+        other = 1 if color == 2 else 2
+        for i, stack in enumerate(stacks):
+            if not stack or stack[0][2] != color:
+                continue
+            r, c, disc_color = stack[0]
+            if disc_color == self.robot_color:
+                if robot_cols[c] == 0:
+                    continue
+                robot_cols[c] -= 1
+            rest = stacks[:i] + [stack[1:]] + stacks[i + 1:]
+            tail = self._alternating_order(rest, other, robot_cols)
+            if disc_color == self.robot_color:
+                robot_cols[c] += 1
+            if tail is not None:
+                return [stack[0]] + tail
+        return None
@@ -0,0 +1,170 @@
+# instrumentation.py
+"""
+Lightweight always-on latency instrumentation.
+
+Named stage spans record into fixed-bucket histograms kept in memory;
+counters track throughput. Everything is dumped on exit as JSON and as a
+Prometheus text-format file. A span costs one perf_counter_ns() on enter
+and one on exit plus a bisect into the bucket bounds (about 1 µs total).
+
+    from instrumentation import METRICS
+
+    DETECT = METRICS.stage("detect_colors")
+    with DETECT:
+        detect_colors(frame)
+
+    METRICS.counter("frames").inc()
+"""
+
+import json
+import time
+from bisect import bisect_left
+
+# Histogram bucket upper bounds in seconds (roughly ×2.5 steps, 10 µs … 60 s)
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+class Stage:
+    """
+    Latency histogram for one named stage, usable as a context manager.
+
+    A Stage keeps the start time on itself, so one Stage object must not be
+    entered again before it exits (no nesting of the same stage, one thread
+    at a time). Code that times itself can call record() directly.
+    """
+
+    __slots__ = ("name", "bounds", "counts", "count", "total", "max", "_start")
+
+    def __init__(self, name, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.bounds = [int(b * 1e9) for b in buckets]
+        self.counts = [0] * (len(buckets) + 1)   # last slot = +Inf
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self._start = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.record_ns(time.perf_counter_ns() - self._start)
+        return False
+
+    def record_ns(self, ns):
+        self.counts[bisect_left(self.bounds, ns)] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def record(self, seconds):
+        self.record_ns(int(seconds * 1e9))
+
+    def quantile(self, q):
+        """Quantile estimate in seconds (upper bound of the bucket that holds it)."""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return (self.bounds[i] if i < len(self.bounds) else self.max) / 1e9
+        return self.max / 1e9
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "sum_s": self.total / 1e9,
+            "mean_ms": (self.total / self.count / 1e6) if self.count else 0.0,
+            "max_ms": self.max / 1e6,
+            "p50_ms": self.quantile(0.50) * 1e3,
+            "p95_ms": self.quantile(0.95) * 1e3,
+            "p99_ms": self.quantile(0.99) * 1e3,
+            "buckets": {("+Inf" if i == len(self.bounds) else repr(self.bounds[i] / 1e9)): c
+                        for i, c in enumerate(self.counts)},
+        }
+
+
+class Counter:
+    __slots__ = ("name", "value")
+
+    def __init__(self, name):
+        self.name = name
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+
+class Metrics:
+    """Registry of stages and counters for one process."""
+
+    def __init__(self, namespace="connect4"):
+        self.namespace = namespace
+        self.stages = {}
+        self.counters = {}
+        self.started = time.time()
+
+    def stage(self, name):
+        if name not in self.stages:
+            self.stages[name] = Stage(name)
+        return self.stages[name]
+
+    def counter(self, name):
+        if name not in self.counters:
+            self.counters[name] = Counter(name)
+        return self.counters[name]
+
+    def snapshot(self):
+        uptime = time.time() - self.started
+        return {
+            "uptime_s": uptime,
+            "stages": {name: s.summary() for name, s in self.stages.items()},
+            "counters": {name: c.value for name, c in self.counters.items()},
+            "rates_per_s": {name: (c.value / uptime if uptime else 0.0)
+                            for name, c in self.counters.items()},
+        }
+
+    def prometheus_text(self):
+        ns = self.namespace
+        lines = [
+            f"# HELP {ns}_stage_latency_seconds Latency of each pipeline stage.",
+            f"# TYPE {ns}_stage_latency_seconds histogram",
+        ]
+        for name, s in self.stages.items():
+            cumulative = 0
+            for i, c in enumerate(s.counts):
+                cumulative += c
+                le = "+Inf" if i == len(s.bounds) else repr(s.bounds[i] / 1e9)
+                lines.append(f'{ns}_stage_latency_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{ns}_stage_latency_seconds_sum{{stage="{name}"}} {s.total / 1e9}')
+            lines.append(f'{ns}_stage_latency_seconds_count{{stage="{name}"}} {s.count}')
+
+        lines.append(f"# HELP {ns}_events_total Throughput counters.")
+        lines.append(f"# TYPE {ns}_events_total counter")
+        for name, c in self.counters.items():
+            lines.append(f'{ns}_events_total{{event="{name}"}} {c.value}')
+
+        lines.append(f"# HELP {ns}_uptime_seconds Seconds since metrics were created.")
+        lines.append(f"# TYPE {ns}_uptime_seconds gauge")
+        lines.append(f"{ns}_uptime_seconds {time.time() - self.started}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, json_path="metrics.json", prom_path="metrics.prom"):
+        """Write the JSON summary and the Prometheus text file."""
+        with open(json_path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        with open(prom_path, "w") as f:
+            f.write(self.prometheus_text())
+        print(f"📊 Stage latencies written to {json_path} and {prom_path}")
+
+
+# Process-wide registry used by main.py
+METRICS = Metrics()
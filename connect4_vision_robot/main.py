@@ -1,19 +1,79 @@
 import cv2
 import os
 import numpy as np
+import threading
 import time
-from vision.color_detection import detect_colors
+from collections import namedtuple
+from types import SimpleNamespace
+from vision.color_detection import detect_colors, draw_overlay
+from vision.color_calibration import AdaptiveThresholds, load_profile
 from vision.detect_board import detect_board_grid
+from vision.board_localizer import BoardLocalizer, HOMOGRAPHY_FILE
+from vision.board_view import BoardView
 from vision.map_discs_to_grid import map_discs_to_grid
+from vision.frame_context import FrameContext
+from vision.motion_gate import MotionGate
+from vision.shared_frames import SharedCapture
+from vision.camera_session import CameraSession
 from game_logic import Connect4Game
+from game_logic.game_record import RECORD_FILE, GameRecorder
+from game_logic.reconcile import Anomaly, BoardReconciler, RobotMoveConfirmed
 from ui.dashboard import show_dashboard
-from robot_control.connect4_robot import Connect4Robot
+from robot_control.coin_manager import INVENTORY_FILE
+from robot_control.connect4_robot import MOVE_CMD, Connect4Robot
+from robot_control.dwell_tuner import DWELL_FILE
+from robot_control.simulated_robot import SimulatedNiryoRobot
+from instrumentation import METRICS
+from duty_cycle import AI_THINKING, GAME_OVER, ROBOT_MOVING, WAIT_HUMAN, DutyCycle
+from pipeline import STOP, Closed, Pipeline
+from spectator import SpectatorServer
 
 # ----- GRID / DISPLAY CONVENTIONS -----
 ROWS, COLS = 6, 7
 BOTTOM_ORIGIN = True
 MIRROR_COLUMNS = False
 
+# Pixels per cell (w, h) the board is downscaled to before colour
+# classification; None = classify at camera resolution.
+# Pick the smallest exact value with `python -m vision.board_scale <dataset>`.
+PROCESS_CELL = (14, 12)
+
+# Capture format, fixed for calibration and gameplay alike (board files are
+# stored in pixels of this size).
+CAMERA_SIZE = (640, 480)
+
+# Pick the robot's next coin while the human is thinking and hold it above
+# the board, so only the drop leg is left once the AI has chosen a column.
+PRESTAGE = True
+
+# A robot disc not seen this long after the arm finished its drop counts as a
+# failed move (the gripper dwell for that stack and column backs off)
+LANDING_TIMEOUT = 8.0
+
+# A failed robot move is sent again this many times (once vision has had
+# LANDING_TIMEOUT to rule out that its disc was dropped before the failure);
+# after that the move is taken back and the game stops
+ROBOT_RETRIES = 1
+
+# actuate → decide: the robot could not play `col`, take the move back
+RobotMoveFailed = namedtuple("RobotMoveFailed", "col")
+
+# Save the board view each human move was seen in next to the game record
+# (one JPEG per move, referenced from the record as its keyframe)
+RECORD_KEYFRAMES = True
+
+# Per-stage latency spans (dumped as JSON + Prometheus text on exit)
+SPAN_CAPTURE = METRICS.stage("capture")
+SPAN_DETECT_COLORS = METRICS.stage("detect_colors")
+SPAN_MAP_GRID = METRICS.stage("map_discs_to_grid")
+SPAN_RECONCILE = METRICS.stage("reconcile")
+SPAN_AI = METRICS.stage("choose_next_move")
+SPAN_ROBOT = METRICS.stage("play_move")
+FRAMES = METRICS.counter("frames")
+CLASSIFIED = METRICS.counter("frames_classified")
+HUMAN_MOVES = METRICS.counter("human_moves")
+ROBOT_MOVES = METRICS.counter("robot_moves")
+
 
 def to_display_indices(r_img: int, c_img: int):
     """
@@ -31,69 +91,88 @@ def to_display_indices(r_img: int, c_img: int):
     return int(r_disp), int(c_disp)
 
 
-def detect_move_strict(prev_board: np.ndarray,
-                       curr_board: np.ndarray,
-                       rows: int,
-                       cols: int):
+def main(camera_id=1,
+         grid_file="board_grid.npy",
+         homography_file=HOMOGRAPHY_FILE,
+         robot_ip=None,
+         settings=None,
+         window_name="Connect 4 - Live Detection",
+         status_callback=None,
+         status_interval=2.0,
+         shared_capture=False,
+         metrics_prefix="metrics",
+         simulate_robot=False,
+         inventory_file=INVENTORY_FILE,
+         dwell_file=DWELL_FILE,
+         spectator_port=None,
+         record_file=RECORD_FILE):
     """
-    Strict, gravity-aware move detector.
-    Returns (row_img, col_img, color, new_move: bool)
-
-    - exactly one column must have changes
-    - in that column, exactly one new occupied cell appears
-    - that new cell must be the lowest empty position in prev_board
+    Run one robot station.
+
+    camera_id:       1 for external webcam, 0 for built-in cameras
+    grid_file / homography_file: where this station's board location is stored
+    robot_ip:        Niryo address (None = Connect4Robot default)
+    settings:        dashboard-style dict; if given the dashboard is skipped
+    status_callback: called every `status_interval` s with frame/move counters
+                     (used by supervisor.py to aggregate station health)
+    shared_capture:  capture in a separate process and read frames from a
+                     shared-memory ring instead of calling cap.read() inline
+    metrics_prefix:  stage latencies are written to <prefix>.json / <prefix>.prom on exit
+    simulate_robot:  drive a time-accurate simulated arm instead of connecting
+    inventory_file:  coin tray inventory kept across restarts
+                     (`python -m robot_control.coin_manager refill` after restocking)
+    dwell_file:      gripper dwell times per stack / column, tuned from the
+                     moves vision confirms
+    spectator_port:  serve the board, move events and video to browsers on
+                     this port (None = off)
+    record_file:     every game is appended to this binary record
+                     (`python -m game_logic.game_record`; None = off)
     """
-    # where board changed
-    changed = (prev_board != curr_board)
-
-    # count changes by column
-    changed_cols = []
-    for c in range(cols):
-        col_changes = np.where(changed[:, c])[0]
-        if col_changes.size > 0:
-            changed_cols.append(c)
-
-    # If no change or more than one column changed -> ignore
-    if len(changed_cols) != 1:
-        return None, None, None, False
-
-    c = changed_cols[0]
-
-    # In that column, find cells that turned from empty->occupied
-    became_filled_rows = []
-    for r in range(rows):
-        if prev_board[r, c] == 0 and curr_board[r, c] != 0:
-            became_filled_rows.append(r)
-
-    # We only accept exactly one new filled cell
-    if len(became_filled_rows) != 1:
-        return None, None, None, False
-
-    r_new = became_filled_rows[0]
-    color = int(curr_board[r_new, c])
-
-    # Gravity check: r_new must be the lowest empty in prev_board
-    # i.e., all rows below r_new must already be filled in prev_board
-    for rb in range(r_new + 1, rows):  # rows increase downward in image
-        if prev_board[rb, c] == 0:
-            # there was an empty below; disc couldn't float here
-            return None, None, None, False
-
-    return r_new, c, color, True
-
+    # Dump on every way out of the station: atexit handlers do not run in the
+    # supervisor's station processes, which end through os._exit
+    try:
+        _run_station(camera_id, grid_file, homography_file, robot_ip, settings,
+                     window_name, status_callback, status_interval, shared_capture,
+                     simulate_robot, inventory_file, dwell_file, spectator_port, record_file)
+    finally:
+        METRICS.dump(f"{metrics_prefix}.json", f"{metrics_prefix}.prom")
+
+
+def _run_station(camera_id, grid_file, homography_file, robot_ip, settings,
+                 window_name, status_callback, status_interval, shared_capture,
+                 simulate_robot, inventory_file, dwell_file, spectator_port, record_file):
+    launch_time = time.time()
+
+    # Start robot bring-up (connect, calibrate if needed, home) in the background;
+    # it overlaps the dashboard and camera warm-up, and the first move waits for it.
+    robot_kwargs = {"inventory_file": inventory_file, "dwell_file": dwell_file,
+                    "connect_async": True}
+    if simulate_robot:
+        robot = Connect4Robot(backend=SimulatedNiryoRobot(), **robot_kwargs)
+    elif robot_ip is None:
+        robot = Connect4Robot(**robot_kwargs)
+    else:
+        robot = Connect4Robot(ip=robot_ip, **robot_kwargs)
 
-def main():
-    camera_id = 1  # use 1 for external webcam
+    # Open the camera once, now: exposure warm-up overlaps the dashboard, and the
+    # same stream serves board calibration, priming and gameplay.
+    if shared_capture:
+        cap = SharedCapture(camera_id, size=CAMERA_SIZE)
+    else:
+        cap = CameraSession(camera_id, size=CAMERA_SIZE).open()
 
     # --- Show dashboard for settings ---
-    try:
-        settings = show_dashboard()
-    except Exception as e:
-        print("⚠️ Could not open dashboard UI:", e)
-        settings = {}
+    if settings is None:
+        try:
+            settings = show_dashboard()
+        except Exception as e:
+            print("⚠️ Could not open dashboard UI:", e)
+            settings = {}
 
     if settings.get("cancelled"):
         print("Setup cancelled by user.")
+        cap.release()
+        robot.close()
         return
 
     player_name = settings.get("player_name", "Human")
@@ -116,44 +195,75 @@ def main():
     print(f"Difficulty: {difficulty}")
     print(f"Who starts: {who_starts}")
 
-    # Step 1: Load or create board grid
-    if not os.path.exists("board_grid.npy"):
-        print("🟩 No saved board grid found. Please select the board area.")
-        detect_board_grid(camera_id=camera_id)
+    # Step 1: Locate the board (cached homography → auto-detect → manual ROI)
+    localizer = BoardLocalizer.load(homography_file)
+    if localizer is None and not os.path.exists(grid_file):
+        ret, frame = cap.read()
+        if ret:
+            localizer = BoardLocalizer.detect(frame, ROWS, COLS)
+        if localizer is not None:
+            localizer.save(homography_file)
+        else:
+            print("🟩 Board not found automatically. Please select the board area.")
+            detect_board_grid(camera_id=camera_id, path=grid_file, cap=cap)
 
-    x, y, w, h = np.load("board_grid.npy")
-    x, y, w, h = int(x), int(y), int(w), int(h)
-    print("✅ Loaded board grid:", (x, y, w, h))
+    if localizer is not None:
+        board_view = BoardView(localizer=localizer, cell_size=PROCESS_CELL, grid_shape=(ROWS, COLS))
+        print("✅ Using board homography, rectified view:", board_view.display_size)
+    else:
+        board_view = BoardView(roi=np.load(grid_file), cell_size=PROCESS_CELL,
+                               grid_shape=(ROWS, COLS))
+        print("✅ Loaded board grid:", board_view.roi)
+    w, h = board_view.display_size
+    proc_w, proc_h = board_view.size
+    min_area = board_view.min_area
+    if (proc_w, proc_h) != (w, h):
+        print(f"🔍 Classifying on a downscaled board: {proc_w}x{proc_h}")
+    display_buf = np.empty((h, w, 3), dtype=np.uint8)
+
+    # Colour thresholds: stored lighting profile if calibrated, else defaults
+    profile = load_profile(settings.get("color_profile"))
+    if profile is not None:
+        print("🎨 Loaded colour profile.")
+    colors = AdaptiveThresholds(profile)
+
+    # Reusable buffers sized to the board view (no per-frame image allocations)
+    frame_ctx = FrameContext((proc_h, proc_w), (ROWS, COLS))
 
-    cap = cv2.VideoCapture(camera_id)
     if not cap.isOpened():
         print("❌ Could not open camera.")
+        cap.release()
+        robot.close()
         return
 
     previous_board = np.zeros((ROWS, COLS), dtype=int)
-    last_move_text = ""
-    last_detection_time = 0.0
-    COOLDOWN = 1.0  # seconds to avoid double prints
 
     print("🎥 Live feed started. Press ESC to exit.")
 
-    # ---------- PRIME BASELINE: read a few frames to settle lighting/masks ----------
-    prime_frames = 10
+    # ---------- PRIME BASELINE: exposure already settled during warm-up ----------
+    prime_frames = 3
     for _ in range(prime_frames):
         ret, frame = cap.read()
         if not ret:
             print("❌ Frame not captured during priming.")
             cap.release()
             cv2.destroyAllWindows()
+            robot.close()
             return
-        board_frame = frame[y:y+h, x:x+w]
-        mask_yellow, mask_red, output = detect_colors(board_frame)
-        previous_board = map_discs_to_grid(mask_red, mask_yellow, grid_shape=(ROWS, COLS))
+        board_frame = board_view.crop(frame)
+        mask_yellow, mask_red, output = detect_colors(board_frame, colors.thresholds, frame_ctx,
+                                                      min_area=min_area)
+        previous_board = map_discs_to_grid(mask_red, mask_yellow, grid_shape=(ROWS, COLS),
+                                           out=frame_ctx.board, min_area=min_area).copy()
+
+    # Skip classification while the board is static or a hand is moving over it
+    motion_gate = MotionGate(grid_shape=(ROWS, COLS))
+    # Classification rate follows the game phase (full rate only while the human plays)
+    duty = DutyCycle(settings.get("duty_rates"))
     # Who starts is taken from the dashboard settings
 
     # Initialize game logic & robot
     game = Connect4Game()
-    game_over = False
 
     # difficulty -> minimax depth mapping
     depth_map = {"Easy": 2, "Medium": 4, "Hard": 6}
@@ -162,142 +272,468 @@ def main():
     print(f"🎨 Human = {'Red' if human_color==1 else 'Yellow'} ({human_color})")
     print(f"🎨 Robot = {'Red' if robot_color==1 else 'Yellow'} ({robot_color})")
 
-    # Initialize robot controller
-    robot = Connect4Robot()
+    # Explains observed boards as legal move sequences (confirmed = primed board)
+    first_color = robot_color if who_starts == "Robot" else human_color
+    reconciler = BoardReconciler(human_color, robot_color, first_color, ROWS, COLS)
+    reconciler.reset(previous_board)
+    # Reconcile and decide run in different threads and both use the reconciler
+    reconciler_lock = threading.Lock()
+
+    # Binary game record: settings, then every move with its search stats
+    recorder = GameRecorder(record_file, keyframes=RECORD_KEYFRAMES) if record_file else None
+    if recorder is not None:
+        recorder.begin_game(ROWS, COLS, human_color, robot_color, first_color, AI_DEPTH, settings)
+    # Newest classified board view, the keyframe for the next recorded move
+    latest = {"view": None}
+
+    # The robot plays at most every other empty cell (the odd one too if it moves next)
+    empty = ROWS * COLS - int(np.count_nonzero(previous_board))
+    robot_next = (first_color == robot_color) == (np.count_nonzero(previous_board) % 2 == 0)
+    robot_moves_left = (empty + 1) // 2 if robot_next else empty // 2
+    if robot.coin_manager.remaining() < robot_moves_left:
+        print(f"⚠️ Only {robot.coin_manager.remaining()} coins left in the tray, "
+              f"the robot may need {robot_moves_left} this game.")
+
+    # Game state shared by the stages (each field has one writer)
+    state = SimpleNamespace(
+        game_over=False,             # decide
+        thinking=False,              # decide, during the AI search
+        confirmed=game.board.copy(), # decide: logical board, for colour adaptation
+        last_move_text="",           # decide / actuate
+        move_count=0,                # decide
+    )
+
+    # Spectators: JSON state / events over HTTP + WebSocket, MJPEG video
+    spectator = SpectatorServer(port=spectator_port).start() if spectator_port else None
+
+    def publish(kind, **data):
+        if spectator is not None:
+            spectator.publish(kind, **data)
+
+    def publish_state():
+        publish("state", board=game.board.tolist(), text=state.last_move_text,
+                game_over=state.game_over, human_color=human_color, robot_color=robot_color,
+                robot=robot.status()["state"])
+
+    publish_state()
+
+    # -------------------- STAGES --------------------
+    # capture → detect → reconcile → decide → actuate, each in its own thread;
+    # detect also feeds the display, which runs here on the main thread.
+    # Frame queues keep only the newest frames; move queues never drop.
+    pipe = Pipeline()
+    frames_q = pipe.queue("frames", maxsize=2)
+    boards_q = pipe.queue("boards", maxsize=2)
+    views_q = pipe.queue("views", maxsize=2)
+    events_q = pipe.queue("events", maxsize=16, drop_oldest=False)
+    commands_q = pipe.queue("commands", maxsize=16, drop_oldest=False)
+
+    status = {"frames": 0, "last_time": time.time(), "last_frames": 0}
+
+    def capture(_):
+        # Robot disc still expected → low-rate watchdog until vision confirms it
+        if state.thinking:
+            duty.set_phase(AI_THINKING)
+        elif state.game_over:
+            duty.set_phase(GAME_OVER)
+        elif reconciler.pending_robot:
+            duty.set_phase(ROBOT_MOVING)
+        else:
+            duty.set_phase(WAIT_HUMAN)
+
+        due = duty.due()
+        with SPAN_CAPTURE:
+            if due:
+                ret, frame = cap.read()
+            else:
+                # Drain the camera queue without decoding the frame
+                ret, frame = cap.grab(), None
+        if not ret:
+            print("❌ Frame not captured.")
+            return STOP
+
+        status["frames"] += 1
+        FRAMES.inc()
+        if status_callback is not None:
+            now = time.time()
+            if now - status["last_time"] >= status_interval:
+                status_callback({
+                    "frames": status["frames"],
+                    "fps": (status["frames"] - status["last_frames"]) / (now - status["last_time"]),
+                    "moves": state.move_count,
+                    "game_over": state.game_over,
+                    "skipped": motion_gate.skipped_frames,
+                    "phase": duty.current,
+                    "robot": robot.status()["state"],
+                })
+                status["last_time"] = now
+                status["last_frames"] = status["frames"]
+
+        if frame is not None:
+            # The capture stamp travels with the frame so render can measure its age
+            frames_q.put((frame, cap.stamp() if shared_capture else None))
+
+    # Stamp of the frame the shown overlay was classified from
+    shown = {"stamp": None}
+    # Last board the colour thresholds were adapted on
+    adapted = {"board": None}
+
+    def detect(item):
+        frame, stamp = item
+        redetections = board_view.redetections
+        board_frame = board_view.crop(frame)
+        if board_view.redetections != redetections:
+            motion_gate.force()
+        if motion_gate.update(board_frame):
+            CLASSIFIED.inc()
+            with SPAN_DETECT_COLORS:
+                mask_yellow, mask_red, output = detect_colors(board_frame, colors.thresholds, frame_ctx,
+                                                              min_area=min_area)
+            with SPAN_MAP_GRID:
+                board_state = map_discs_to_grid(mask_red, mask_yellow, grid_shape=(ROWS, COLS),
+                                                out=frame_ctx.board, min_area=min_area)
+            # Observed board agrees with the game → its cells are trusted samples.
+            # Adapt once per confirmed board (after each move), on the HSV
+            # detect_colors has just computed
+            if (board_state.any() and np.array_equal(board_state, state.confirmed)
+                    and not np.array_equal(board_state, adapted["board"])):
+                colors.adapt(board_frame, board_state, hsv=frame_ctx.hsv)
+                adapted["board"] = board_state.copy()
+            if recorder is not None and RECORD_KEYFRAMES:
+                latest["view"] = output.copy()
+            # frame_ctx buffers are reused for the next frame; queue copies
+            boards_q.put(board_state.copy())
+            shown["stamp"] = stamp
+        else:
+            # Not classified: show the live board (a hand or the arm over it) with
+            # the last classified discs drawn on it (the gate always classifies the
+            # first frame, so frame_ctx holds a result)
+            output = draw_overlay(board_frame, frame_ctx)
+        views_q.put((output.copy(), shown["stamp"]))
+
+    # Last anomaly kind printed (None after a board that explained cleanly)
+    reported = {"anomaly": None}
+
+    def reconcile(board_state):
+        # --- BOARD RECONCILIATION (gravity-aware, may explain several moves at once) ---
+        # Every classified board is reconciled: the motion gate hands each settled
+        # board over only once, and transient reads come back as anomalies
+        with SPAN_RECONCILE, reconciler_lock:
+            ignored = set(reconciler.ignored)
+            events = reconciler.reconcile(board_state)
+            newly_ignored = sorted(set(reconciler.ignored) - ignored)
+        if newly_ignored:
+            print(f"⚠️ Cells {newly_ignored} misread for {reconciler.stuck_after:.0f} s; "
+                  f"ignoring them until they read right again")
+        for event in events:
+            if isinstance(event, Anomaly):
+                # Keep the confirmed board; report each new kind of anomaly once
+                if event.reason != reported["anomaly"]:
+                    print(f"⚠️ Board anomaly ({event.reason}) at cells {event.cells}")
+                    reported["anomaly"] = event.reason
+                break
+            reported["anomaly"] = None
+            if not events_q.put(event):
+                return
+        # While a misread is pending the board may never change again: have the
+        # gate re-read it so the reconciler can see the misread persist
+        motion_gate.recheck_after = (reconciler.stuck_after
+                                     if events and isinstance(events[0], Anomaly) else None)
+
+    def play_robot(robot_col, search=None, think_s=None):
+        """AI chose `robot_col`: update the logical board and queue the physical move."""
+        game.current_player = robot_color
+        placed = game.make_move(robot_col)
+        game.switch_player()
+        if recorder is not None and placed is not None:
+            recorder.move(robot_col, placed[0], robot_color, robot=True, search=search,
+                          think_s=think_s, depth=AI_DEPTH)
+        state.confirmed = game.board.copy()
+        with reconciler_lock:
+            reconciler.expect_robot_move(robot_col)
+        commands_q.put(("move", robot_col))
+
+    def decide(event):
+        if isinstance(event, RobotMoveFailed):
+            # Undo the robot's move in the board, the reconciler and the record
+            # (play_robot() already recorded it), then stop
+            with reconciler_lock:
+                reconciler.cancel_robot_move(event.col)
+            game.undo_move(event.col)
+            if recorder is not None:
+                recorder.retract()
+                recorder.end_game(0)
+            game.current_player = robot_color
+            state.confirmed = game.board.copy()
+            state.last_move_text = f"❌ Robot could not play column {event.col + 1}, game stopped"
+            print(state.last_move_text)
+            if not state.game_over:
+                state.game_over = True
+                publish("game_over", text=state.last_move_text, winner=0)
+            publish_state()
+            return
+
+        state.move_count += 1
+        r_img, c_img, color = event.row, event.col, event.color
+
+        # Convert for display: Row 1 = bottom, Col 1 = left
+        # image row 0 is TOP; to bottom-origin: disp_row = ROWS - r_img
+        r_disp = ROWS - r_img
+        c_disp = (COLS - c_img) if MIRROR_COLUMNS else (c_img + 1)
+
+        color_name = "Red" if color == 1 else "Yellow"
+        state.last_move_text = f"🎯 {color_name} placed at Row {r_disp}, Col {c_disp}"
+        print(state.last_move_text)
+        robot_disc = isinstance(event, RobotMoveConfirmed)
+        publish("move", player="robot" if robot_disc else "human", color=int(color),
+                row=int(r_img), col=int(c_img), text=state.last_move_text)
+
+        # Robot disc landed where it was commanded -> already in the logical board
+        if robot_disc:
+            commands_q.put(("confirmed", event.col))
+            if state.game_over and recorder is not None:
+                recorder.end_game(int(game.check_winner()))
+            publish_state()
+            return
+        if state.game_over:
+            return
+
+        robot_played = False
+        # 🧩 Update the logical board with human move and check for winner
+        game.board[r_img, c_img] = color
+        state.confirmed = game.board.copy()
+        HUMAN_MOVES.inc()
+        if recorder is not None:
+            recorder.move(c_img, r_img, color, image=latest["view"])
+        winner = game.check_winner()
+
+        if winner == 1:
+            print("🏆 Red wins!")
+            state.last_move_text = "🏆 Red wins!"
+            state.game_over = True
+        elif winner == 2:
+            print("🏆 Yellow wins!")
+            state.last_move_text = "🏆 Yellow wins!"
+            state.game_over = True
+        elif winner == -1:
+            print("🤝 It's a draw!")
+            state.last_move_text = "🤝 It's a draw!"
+            state.game_over = True
+        else:
+            # Human played, now robot's turn; capture and display keep running
+            game.switch_player()
+
+            from game_logic.ai_strategy import choose_next_move
+            state.thinking = True
+            search = {}
+            t0 = time.perf_counter()
+            try:
+                with SPAN_AI:
+                    robot_col = choose_next_move(game, depth=AI_DEPTH, stats=search)
+            finally:
+                state.thinking = False
+            think_s = time.perf_counter() - t0
+            if robot_col is not None:
+                print(f"🤖 Robot should play in column {robot_col + 1}")
+                publish("evaluation", column=robot_col, depth=AI_DEPTH, score=search["score"],
+                        scores={str(c): s for c, s in search["scores"].items()}, time_s=think_s)
+                play_robot(robot_col, search, think_s)
+                robot_played = True
+
+                # Check if robot won
+                winner = game.check_winner()
+                if winner == robot_color:
+                    print("🏆 Robot wins!")
+                    state.last_move_text = "🏆 Robot wins!"
+                    state.game_over = True
+            else:
+                print("🤖 No valid moves left.")
+        if state.game_over:
+            winner = int(game.check_winner())
+            publish("game_over", text=state.last_move_text, winner=winner)
+            # A game ended by the robot's move is recorded as over once its disc
+            # is seen: until then the arm may fail and the move be taken back
+            if recorder is not None and not robot_played:
+                recorder.end_game(winner)
+        publish_state()
+
+    # (column or None for staging, future) of commands handed to the robot's queue, oldest first
+    robot_moves = []
+    # When the last robot drop must have been seen by (None = nothing expected)
+    landing = {"deadline": None}
+    # Failed robot move: its column, when to retry it unless vision saw the disc, tries so far
+    failed = {"column": None, "deadline": None, "tries": 0}
+
+    def actuate(command):
+        # Queue the physical move; the arm moves on its own worker thread and
+        # vision confirms the disc once it lands
+        if command is not None:
+            kind, column = command
+            if kind == "move":
+                robot_moves.append((column, robot.submit_move(column)))
+            elif kind == "confirmed":
+                robot.report_outcome(True, column)
+                landing["deadline"] = None
+
+        # Robot commands run in the background; collect the ones that finished
+        while robot_moves and robot_moves[0][1].done():
+            column, future = robot_moves.pop(0)
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if error is not None:
+                print(f"❌ Robot command failed: {error}")
+                if column is not None:
+                    # The disc may have been released before the failure: give vision
+                    # time to see it before sending the move again
+                    state.last_move_text = "❌ Robot move failed"
+                    failed["column"] = column
+                    failed["deadline"] = time.time() + LANDING_TIMEOUT
+            elif future.result().kind == MOVE_CMD:
+                SPAN_ROBOT.record(future.result().duration)
+                ROBOT_MOVES.inc()
+                landing["deadline"] = time.time() + LANDING_TIMEOUT
+                failed["tries"] = 0
+
+        # Failed move whose disc never showed up → retry it, or give up and take it back
+        if failed["column"] is not None and time.time() > failed["deadline"]:
+            column, failed["column"] = failed["column"], None
+            if column in reconciler.pending_robot and not state.game_over:
+                if failed["tries"] < ROBOT_RETRIES:
+                    failed["tries"] += 1
+                    print(f"🔁 Retrying robot move to column {column + 1}")
+                    robot_moves.append((column, robot.submit_move(column)))
+                else:
+                    failed["tries"] = 0
+                    events_q.put(RobotMoveFailed(column))
+
+        # Drop finished but vision never saw the disc → that move failed
+        if landing["deadline"] is not None and time.time() > landing["deadline"]:
+            landing["deadline"] = None
+            if reconciler.pending_robot:
+                column = robot.report_outcome(False)
+                if column is not None:
+                    print(f"⚠️ Robot disc for column {column + 1} not seen; "
+                          f"lengthening gripper dwell.")
+
+        # Human's turn and the arm is free → stage the next coin; at game end put it back
+        if state.game_over:
+            staging = robot.abort_prestage()
+        elif PRESTAGE and not reconciler.pending_robot and not robot.busy():
+            staging = robot.prestage()
+        else:
+            staging = None
+        if staging is not None:
+            robot_moves.append((None, staging))
+
+    pipe.stage("capture", capture)
+    pipe.stage("detect", detect, inbox=frames_q)
+    pipe.stage("reconcile", reconcile, inbox=boards_q)
+    pipe.stage("decide", decide, inbox=events_q)
+    pipe.stage("actuate", actuate, inbox=commands_q, tick=0.1)
 
     # If robot starts, let AI and robot play the first move
     if who_starts == "Robot":
         from game_logic.ai_strategy import choose_next_move
-        robot_col = choose_next_move(game, depth=AI_DEPTH)
+        search = {}
+        t0 = time.perf_counter()
+        with SPAN_AI, duty.phase(AI_THINKING):
+            robot_col = choose_next_move(game, depth=AI_DEPTH, stats=search)
         if robot_col is not None:
             print(f"🤖 Robot starts and plays in column {robot_col + 1}")
-
-            # Update logical board
-            game.current_player = robot_color
-            game.make_move(robot_col)
-            game.switch_player()
-
-            # Physically execute the move
-            robot.play_move(robot_col)
+            play_robot(robot_col, search, time.perf_counter() - t0)
+            publish_state()
         else:
             print("🤖 No valid moves available at start.")
     else:
         print("🧍 Human starts. Waiting for first move...")
 
-    # -------------------- MAIN LOOP --------------------
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("❌ Frame not captured.")
-            break
+    robot_state = "ready" if robot.ready.done() else "still starting in the background"
+    print(f"⏱️ Live {time.time() - launch_time:.1f} s after launch (robot {robot_state})")
 
-        board_frame = frame[y:y+h, x:x+w]
-        mask_yellow, mask_red, output = detect_colors(board_frame)
-        board_state = map_discs_to_grid(mask_red, mask_yellow, grid_shape=(ROWS, COLS))
-
-        # --- STRICT, GRAVITY-AWARE MOVE DETECTION (no stability waiting) ---
-        now = time.time()
-        if now - last_detection_time > COOLDOWN:
-            r_img, c_img, color, new_move = detect_move_strict(previous_board, board_state, ROWS, COLS)
-            if new_move:
-                # Convert for display: Row 1 = bottom, Col 1 = left
-                # image row 0 is TOP; to bottom-origin: disp_row = ROWS - r_img
-                r_disp = ROWS - r_img
-                c_disp = (COLS - c_img) if MIRROR_COLUMNS else (c_img + 1)
-
-                color_name = "Red" if color == 1 else "Yellow"
-                last_move_text = f"🎯 {color_name} placed at Row {r_disp}, Col {c_disp}"
-                print(last_move_text)
-
-                # If this disc is NOT human color, it's a robot disc -> just update baseline and skip logic
-                if color != human_color:
-                    previous_board = board_state.copy()
-                    last_detection_time = now
-                    continue
-
-                # 🧩 Update the logical board with human move and check for winner
-                game.board[r_img, c_img] = color
-                winner = game.check_winner()
+    pipe.start()
 
-                if winner == 1:
-                    print("🏆 Red wins!")
-                    last_move_text = "🏆 Red wins!"
-                    game_over = True
-                elif winner == 2:
-                    print("🏆 Yellow wins!")
-                    last_move_text = "🏆 Yellow wins!"
-                    game_over = True
-                elif winner == -1:
-                    print("🤝 It's a draw!")
-                    last_move_text = "🤝 It's a draw!"
-                    game_over = True
-                else:
-                    # Human played, now robot's turn
-                    game.switch_player()
-
-                    if not game_over:
-                        from game_logic.ai_strategy import choose_next_move
-                        robot_col = choose_next_move(game, depth=AI_DEPTH)
-                        if robot_col is not None:
-                            print(f"🤖 Robot should play in column {robot_col + 1}")
-                            game.current_player = robot_color
-                            row = game.make_move(robot_col)
-                            game.switch_player()
-
-                            # Check if robot won
-                            winner = game.check_winner()
-                            if winner == robot_color:
-                                print("🏆 Robot wins!")
-                                last_move_text = "🏆 Robot wins!"
-                                game_over = True
-
-                            # Physically play robot move
-                            robot.play_move(robot_col)
-                        else:
-                            print("🤖 No valid moves left.")
-
-                # IMPORTANT: update baseline ONLY AFTER a confirmed move
-                if not game_over:
-                    previous_board = board_state.copy()
-                last_detection_time = now
-
-        # ---------- DRAW OVERLAYS ----------
-        cell_w = int(w / COLS)
-        cell_h = int(h / ROWS)
-
-        # grid lines
-        for i in range(COLS + 1):
-            cv2.line(output, (i * cell_w, 0), (i * cell_w, h), (0, 255, 0), 2)
-        for j in range(ROWS + 1):
-            cv2.line(output, (0, j * cell_h), (w, j * cell_h), (0, 255, 0), 2)
-
-        # cell labels (bottom-origin numbers)
-        for r in range(ROWS):
-            for c in range(COLS):
-                cy = int((r + 0.5) * cell_h)
-                cx = int((c + 0.5) * cell_w)
-                r_disp = ROWS - r
-                c_disp = (COLS - c) if MIRROR_COLUMNS else (c + 1)
-                cv2.putText(output, f"{r_disp},{c_disp}",
-                            (cx - 18, cy + 6),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5,
-                             (255, 255, 255), 1, cv2.LINE_AA)
-
-        if last_move_text:
-            cv2.putText(output, last_move_text, (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.8,
-                        (255, 255, 255), 2, cv2.LINE_AA)
-
-        cv2.imshow("Connect 4 - Live Detection", output)
+    # -------------------- RENDER (main thread: HighGUI) --------------------
+    while pipe.running:
+        try:
+            view = views_q.get(timeout=0.03)
+        except Closed:
+            break
+        if view is not None:
+            output, stamp = view
+            # ---------- DRAW OVERLAYS ----------
+            if output.shape[:2] != (h, w):
+                output = cv2.resize(output, (w, h), dst=display_buf, interpolation=cv2.INTER_NEAREST)
+
+            cell_w = int(w / COLS)
+            cell_h = int(h / ROWS)
+
+            # grid lines
+            for i in range(COLS + 1):
+                cv2.line(output, (i * cell_w, 0), (i * cell_w, h), (0, 255, 0), 2)
+            for j in range(ROWS + 1):
+                cv2.line(output, (0, j * cell_h), (w, j * cell_h), (0, 255, 0), 2)
+
+            # cell labels (bottom-origin numbers)
+            for r in range(ROWS):
+                for c in range(COLS):
+                    cy = int((r + 0.5) * cell_h)
+                    cx = int((c + 0.5) * cell_w)
+                    r_disp = ROWS - r
+                    c_disp = (COLS - c) if MIRROR_COLUMNS else (c + 1)
+                    cv2.putText(output, f"{r_disp},{c_disp}",
+                                (cx - 18, cy + 6),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.5,
+                                 (255, 255, 255), 1, cv2.LINE_AA)
+
+            last_move_text = state.last_move_text
+            if last_move_text:
+                cv2.putText(output, last_move_text, (10, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.8,
+                            (255, 255, 255), 2, cv2.LINE_AA)
+
+            cv2.imshow(window_name, output)
+            if spectator is not None:
+                spectator.publish_frame(output)
+            if stamp is not None:
+                cap.record_age(stamp)
 
         if cv2.waitKey(1) & 0xFF == 27:
             break
 
+    # Stop every stage (a running AI search or move finishes first), then report
+    pipe.stop()
+    if spectator is not None:
+        spectator.stop()
+        print(f"📺 Spectators: {spectator.encoded_frames} frames encoded, "
+              f"{spectator.dropped_clients} slow viewers dropped")
+    if recorder is not None:
+        # A game stopped before its end is recorded as unfinished
+        recorder.close()
+        print(f"📼 Game recorded to {record_file}")
+
+    age_stats = cap.age_stats() if shared_capture else None
     cap.release()
     cv2.destroyAllWindows()
     print("🛑 Live feed stopped.")
 
-    # Try to close robot connection cleanly
+    if age_stats:
+        print(f"⏱️ Frame age at display: mean {age_stats['mean_ms']:.1f} ms, "
+              f"p95 {age_stats['p95_ms']:.1f} ms, max {age_stats['max_ms']:.1f} ms "
+              f"({age_stats['dropped']} frames superseded, {age_stats['torn']} overwritten in use)")
+
+    gate_stats = motion_gate.stats()
+    print(f"📉 Motion gate: {gate_stats['processed']} frames classified, "
+          f"{gate_stats['skipped']} skipped ({gate_stats['skip_ratio']:.0%})")
+    print("⚡ Vision duty cycle per game phase:")
+    duty.print_report()
+    print("🧵 Pipeline stages:")
+    pipe.print_report()
+    dwell = robot.dwell.report()
+    print(f"⏳ Gripper dwell: {dwell['saved_s']:.1f} s saved this game over {dwell['actions']} "
+          f"gripper actions ({dwell['failures']} moves not confirmed)")
+
+    # Finish the move in progress (queued ones are cancelled), then close the connection
     try:
         robot.close()
     except Exception:
@@ -305,4 +741,16 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Connect 4 vision robot.")
+    parser.add_argument("--camera", type=int, default=1, help="camera index (1 = external webcam)")
+    parser.add_argument("--shared-capture", action="store_true",
+                        help="capture in a separate process via shared memory")
+    parser.add_argument("--simulate-robot", action="store_true",
+                        help="use the time-accurate robot simulator instead of the arm")
+    parser.add_argument("--spectate", type=int, nargs="?", const=8080, default=None, metavar="PORT",
+                        help="serve a spectator view (board, moves, video) on PORT (default 8080)")
+    args = parser.parse_args()
+    main(camera_id=args.camera, shared_capture=args.shared_capture,
+         simulate_robot=args.simulate_robot, spectator_port=args.spectate)
@@ -0,0 +1,202 @@
+# pipeline.py
+"""
+Worker threads connected by bounded queues.
+
+Each stage runs its function in its own thread: once per item taken from its
+inbox, or in a loop for a source stage (no inbox). A stage function passes
+results on by putting them into the queues it was given.
+
+Queues carrying frames drop their oldest item when full, so a slow stage
+always gets the newest frame and never holds up the one feeding it. Queues
+carrying moves never drop: their producer waits instead (and a producer
+reading frames catches up by dropping frames in its own inbox).
+
+    pipe = Pipeline()
+    frames = pipe.queue("frames", maxsize=2)
+    pipe.stage("capture", capture)               # source, loops
+    pipe.stage("detect", detect, inbox=frames)
+    pipe.start()
+    ...
+    pipe.stop()
+
+A stage function returns STOP to shut the whole pipeline down; an exception
+in a stage is printed and also stops it. stop() closes every queue (items
+still queued are discarded) and joins the workers.
+"""
+
+import threading
+import time
+import traceback
+from collections import deque
+
+# Returned by a stage function to stop the pipeline
+STOP = object()
+
+
+class Closed(Exception):
+    """The queue was closed by Pipeline.stop()."""
+
+
+class StageQueue:
+    def __init__(self, name, maxsize=2, drop_oldest=True):
+        self.name = name
+        self.maxsize = maxsize
+        self.drop_oldest = drop_oldest
+        self._items = deque()
+        self._cond = threading.Condition()
+        self.closed = False
+        self.put_count = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item):
+        """Queue `item` (not None); False if the queue is closed."""
+        with self._cond:
+            while not self.closed and len(self._items) >= self.maxsize:
+                if self.drop_oldest:
+                    self._items.popleft()
+                    self.dropped += 1
+                else:
+                    self._cond.wait()
+            if self.closed:
+                return False
+            self._items.append(item)
+            self.put_count += 1
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """Oldest item, or None after `timeout` s; raises Closed once closed."""
+        with self._cond:
+            while not self._items:
+                if self.closed:
+                    raise Closed(self.name)
+                if not self._cond.wait(timeout) and timeout is not None:
+                    if self.closed:
+                        raise Closed(self.name)
+                    return None
+            if self.closed:
+                raise Closed(self.name)
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._items.clear()
+            self._cond.notify_all()
+
+
+class Stage:
+    def __init__(self, name, fn, inbox=None, tick=None):
+        """
+        fn:    called with each item from `inbox`; with no inbox, called with
+               None in a loop (a source, e.g. the camera)
+        tick:  also call fn(None) after `tick` s without an item, for stages
+               with periodic work (None = only on items)
+        """
+        self.name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.tick = tick
+        self.items = 0
+        self.busy_s = 0.0
+        self.error = None
+        self._thread = None
+
+    def start(self, stop_event):
+        self._thread = threading.Thread(target=self._run, args=(stop_event,),
+                                        name=f"stage-{self.name}", daemon=True)
+        self._thread.start()
+
+    def _run(self, stop_event):
+        try:
+            while not stop_event.is_set():
+                item = None
+                if self.inbox is not None:
+                    try:
+                        item = self.inbox.get(self.tick)
+                    except Closed:
+                        return
+                t0 = time.perf_counter()
+                result = self.fn(item)
+                self.busy_s += time.perf_counter() - t0
+                if item is not None:
+                    self.items += 1
+                if result is STOP:
+                    stop_event.set()
+                    return
+        except Exception as e:
+            self.error = e
+            print(f"[pipeline] Stage '{self.name}' failed:")
+            traceback.print_exc()
+            stop_event.set()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+
+class Pipeline:
+    def __init__(self):
+        self.stages = []
+        self.queues = []
+        self._stop = threading.Event()
+        self._started_at = None
+
+    def queue(self, name, maxsize=2, drop_oldest=True):
+        q = StageQueue(name, maxsize, drop_oldest)
+        self.queues.append(q)
+        return q
+
+    def stage(self, name, fn, inbox=None, tick=None):
+        s = Stage(name, fn, inbox, tick)
+        self.stages.append(s)
+        return s
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        for s in self.stages:
+            s.start(self._stop)
+
+    @property
+    def running(self):
+        return not self._stop.is_set()
+
+    def wait(self, timeout=None):
+        """Block until a stage stops the pipeline (True) or `timeout` passes (False)."""
+        return self._stop.wait(timeout)
+
+    def stop(self, timeout=5.0):
+        """Close all queues and join the workers (a stage mid-call finishes that call)."""
+        self._stop.set()
+        for q in self.queues:
+            q.close()
+        for s in self.stages:
+            s.join(timeout)
+            if s.is_alive():
+                print(f"[pipeline] Stage '{s.name}' still busy after {timeout:.0f} s, leaving it.")
+
+    def report(self):
+        """Items handled and busy share per stage, items passed / dropped per queue."""
+        wall = time.perf_counter() - self._started_at if self._started_at else 0.0
+        stages = {s.name: {"items": s.items, "busy_s": s.busy_s,
+                           "busy_pct": 100.0 * s.busy_s / wall if wall else 0.0}
+                  for s in self.stages}
+        queues = {q.name: {"put": q.put_count, "dropped": q.dropped} for q in self.queues}
+        return {"stages": stages, "queues": queues}
+
+    def print_report(self):
+        r = self.report()
+        print(f"{'stage':>10} {'items':>7} {'busy s':>8} {'busy %':>7}")
+        for name, s in r["stages"].items():
+            print(f"{name:>10} {s['items']:>7} {s['busy_s']:>8.1f} {s['busy_pct']:>7.0f}")
+        print(f"{'queue':>10} {'put':>7} {'dropped':>8}")
+        for name, q in r["queues"].items():
+            print(f"{name:>10} {q['put']:>7} {q['dropped']:>8}")
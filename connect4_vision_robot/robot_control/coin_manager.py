@@ -1,12 +1,56 @@
 # coin_manager.py
 
+import json
+import os
+
 from .robot_positions import PICK_POSES
 
+# Coins taken per stack, kept across restarts so a half-used tray is not misread
+INVENTORY_FILE = "coin_inventory.json"
+
+
 class CoinManager:
-    def __init__(self):
+    def __init__(self, state_file=None):
+        """
+        state_file: JSON file the inventory is loaded from and saved to after
+                    every change (None = in memory only, starts full).
+        """
+        self.state_file = state_file
         # index of next coin for each stack
-        self.next_index = [0, 0, 0]
+        self.next_index = [0] * len(PICK_POSES)
+        if state_file and os.path.exists(state_file):
+            self._load()
+
+    # ---------- persistence ----------
+    def _load(self):
+        try:
+            with open(self.state_file) as f:
+                taken = json.load(f)["next_index"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[coin_manager] Could not read {self.state_file}: {e}; assuming full stacks.")
+            return
+        if len(taken) != len(PICK_POSES):
+            print(f"[coin_manager] {self.state_file} does not match PICK_POSES; assuming full stacks.")
+            return
+        self.next_index = [max(0, min(int(n), len(stack))) for n, stack in zip(taken, PICK_POSES)]
 
+    def save(self):
+        if not self.state_file:
+            return
+        tmp = self.state_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"next_index": self.next_index}, f)
+        os.replace(tmp, self.state_file)
+
+    def refill(self, stack_id=None):
+        """Mark one stack (or all) as full again after restocking the tray."""
+        if stack_id is None:
+            self.next_index = [0] * len(PICK_POSES)
+        else:
+            self.next_index[stack_id] = 0
+        self.save()
+
+    # ---------- picking ----------
     def get_next_pick_pose(self, stack_id: int):
         idx = self.next_index[stack_id]
 
@@ -15,4 +59,52 @@ class CoinManager:
 
         pose = PICK_POSES[stack_id][idx]
         self.next_index[stack_id] += 1
+        self.save()
         return pose
+
+    def return_coin(self, stack_id: int):
+        """A picked coin was put back on top of its stack."""
+        if self.next_index[stack_id] == 0:
+            raise RuntimeError(f"Stack {stack_id} has no coin taken")
+        self.next_index[stack_id] -= 1
+        self.save()
+
+    def remaining(self, stack_id=None):
+        if stack_id is not None:
+            return len(PICK_POSES[stack_id]) - self.next_index[stack_id]
+        return sum(len(stack) - idx for stack, idx in zip(PICK_POSES, self.next_index))
+
+    def top_pose(self, stack_id: int):
+        """Pose of the coin that would be picked next from this stack (None if empty)."""
+        idx = self.next_index[stack_id]
+        return PICK_POSES[stack_id][idx] if idx < len(PICK_POSES[stack_id]) else None
+
+    def cheapest_stack(self, cost):
+        """Non-empty stack whose top coin minimises `cost(pick_pose)`, or None."""
+        best = None
+        best_cost = None
+        for stack_id in range(len(PICK_POSES)):
+            pose = self.top_pose(stack_id)
+            if pose is None:
+                continue
+            c = cost(pose)
+            if best_cost is None or c < best_cost:
+                best, best_cost = stack_id, c
+        return best
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show or refill the coin tray inventory.")
+    parser.add_argument("command", choices=["status", "refill"])
+    parser.add_argument("--stack", type=int, default=None, help="refill only this stack")
+    parser.add_argument("--file", default=INVENTORY_FILE)
+    args = parser.parse_args()
+
+    manager = CoinManager(args.file)
+    if args.command == "refill":
+        manager.refill(args.stack)
+        print(f"✅ Refilled {'all stacks' if args.stack is None else f'stack {args.stack}'}.")
+    for stack_id in range(len(PICK_POSES)):
+        print(f"Stack {stack_id}: {manager.remaining(stack_id)}/{len(PICK_POSES[stack_id])} coins")
@@ -1,5 +1,13 @@
 # connect4_robot.py
 
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import Future
+
 try:
     from pyniryo import NiryoRobot
     _HAS_PYNIRYO = True
@@ -8,8 +16,48 @@ except Exception:
     _HAS_PYNIRYO = False
 
 from .coin_manager import CoinManager
+from .dwell_tuner import DwellTuner
+from .joint_cache import JOINT_CACHE_FILE, load_or_build
 from .robot_positions import DROP_POSES
 from .robot_actions import RobotActions
+from .trajectory import hover_pose, path_length, plan_pick_place
+
+
+# Command states reported by Connect4Robot.status()
+QUEUED = "queued"
+PICKING = "picking"
+PLACING = "placing"
+DONE = "done"
+FAILED = "failed"
+IDLE = "idle"
+
+# Command kinds
+MOVE_CMD = "move"          # pick a coin (or use the staged one) and drop it in `column`
+PRESTAGE_CMD = "prestage"  # pick the next coin and hold it above the board
+UNSTAGE_CMD = "unstage"    # put a staged coin back on its stack
+
+
+class RobotCommand:
+    """One queued move; `future` resolves to this command when it is done."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, column, kind=MOVE_CMD):
+        self.id = next(self._ids)
+        self.kind = kind
+        self.column = column
+        self.state = QUEUED
+        self.future = Future()
+        self.queued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+
+    @property
+    def duration(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
 
 
 class _MockNiryoRobot:
@@ -40,50 +88,179 @@ class Connect4Robot:
     def __init__(self,
                  ip: str = "172.20.10.2",
                  safe_z: float = 0.35,
-                 approach_dz: float = 0.06):
+                 approach_dz: float = 0.06,
+                 planned_paths: bool = True,
+                 backend=None,
+                 coin_selection: str = "nearest",
+                 inventory_file=None,
+                 joint_cache_file=JOINT_CACHE_FILE,
+                 connect_async: bool = False,
+                 dwell_file=None):
+        """
+        backend:        robot object to drive instead of connecting to `ip`
+                        (e.g. a SimulatedNiryoRobot for offline benchmarks)
+        coin_selection: "nearest" = stack with the shortest path to the target
+                        column, "round_robin" = cycle through the stacks
+        inventory_file: JSON file keeping the tray inventory across restarts
+        joint_cache_file: IK solutions of all fixed poses (rebuilt when stale;
+                        None = always send Cartesian poses). Only read and
+                        written for a connected arm; a `backend` gets an
+                        in-memory cache from its own IK
+        connect_async:  connect, calibrate and home in a background thread;
+                        `ready` (a Future) resolves when the arm can move, and
+                        moves wait for it
+        dwell_file:     JSON file with the per-stack / per-column gripper dwell
+                        times, tuned from report_outcome() (None = in memory)
+        """
+        self.robot = None
+        self.actions = None
+        self._connected_real_robot = False
+        self.startup_timings = {}
 
         # 1. Connect & init robot (try real robot, fallback to mock on error)
-        self._connected_real_robot = False
+        self.ready = Future()
+        bring_up_args = (ip, backend, safe_z, approach_dz, joint_cache_file)
+        if connect_async:
+            threading.Thread(target=self._bring_up, args=bring_up_args,
+                             name="robot-startup", daemon=True).start()
+        else:
+            self._bring_up(*bring_up_args)
+            self.wait_ready()
+
+        # 2. Helpers
+        self.coin_manager = CoinManager(inventory_file)
+        self.coin_selection = coin_selection
+        # Gripper dwell per stack / column, shortened while moves keep landing
+        self.dwell = DwellTuner(dwell_file)
+        # (stack_id, grasp dwell, column, release dwell) of dropped coins whose
+        # outcome has not been reported yet, oldest first
+        self._unconfirmed = deque()
+        # (entry, undo) of the last drops reported as failed, in case vision sees them late
+        self._timed_out = deque(maxlen=4)
+        # Planned path (no home visits, blended legs) instead of pick() + place()
+        self.planned_paths = planned_paths
+
+        # Background command queue (started on first submit_move)
+        self._commands = queue.Queue()
+        self._worker = None
+        self._current = None
+        self._last = None
+
+        # Pre-staged coin: (stack_id, pick_pose, grasp dwell) held above the
+        # board, and whether one is held or queued to be
+        self.held = None
+        self._stage_requested = False
+        self._last_stack_id = None
+
+        # ROUND-ROBIN STACK ORDER
+        self.stack_order = [0, 1, 2]       # cycle through these
+        self.stack_pointer = 0             # which one to pick from next
+
+    # -------------------------
+    #   STARTUP
+    # -------------------------
+    def _connect(self, ip, backend):
+        if backend is not None:
+            return backend
         if _HAS_PYNIRYO:
             try:
+                robot = NiryoRobot(ip)
+                self._connected_real_robot = True
+                return robot
+            except Exception as e:
+                print(f"[connect4_robot] Could not connect to NiryoRobot: {e}")
+                print("[connect4_robot] Falling back to MOCK mode.")
+                return _MockNiryoRobot(ip)
+        print("[connect4_robot] pyniryo not available — running in MOCK mode.")
+        return _MockNiryoRobot(ip)
 
-                self.robot = NiryoRobot(ip)
+    def _bring_up(self, ip, backend, safe_z, approach_dz, joint_cache_file):
+        """Connect, calibrate only if the controller needs it, home, load joint cache."""
+        self.ready.set_running_or_notify_cancel()
+        timings = {}
+        t_start = time.time()
+        try:
+            t0 = time.time()
+            robot = self._connect(ip, backend)
+            timings["connect"] = time.time() - t0
+
+            if self._connected_real_robot or backend is not None:
+                t0 = time.time()
                 try:
-                    self.robot.clear_collision_detected()
-                    self.robot.calibrate_auto()
+                    robot.clear_collision_detected()
                 except Exception:
                     pass
+                timings["clear_collision"] = time.time() - t0
+
+                t0 = time.time()
                 try:
-                    self.robot.move_to_home_pose()
+                    needed = robot.need_calibration() if hasattr(robot, "need_calibration") else True
+                except Exception:
+                    needed = True
+                if needed:
+                    try:
+                        robot.calibrate_auto()
+                    except Exception:
+                        pass
+                else:
+                    print("[connect4_robot] Already calibrated, skipping calibrate_auto().")
+                timings["calibrate"] = time.time() - t0
+
+                t0 = time.time()
+                try:
+                    robot.move_to_home_pose()
                 except Exception:
                     pass
-                self._connected_real_robot = True
-            except Exception as e:
-                print(f"[connect4_robot] Could not connect to NiryoRobot: {e}")
-                print("[connect4_robot] Falling back to MOCK mode.")
-                self.robot = _MockNiryoRobot(ip)
-        else:
-            print("[connect4_robot] pyniryo not available — running in MOCK mode.")
-            self.robot = _MockNiryoRobot(ip)
+                timings["home"] = time.time() - t0
 
-        # 2. Helpers
-        self.actions = RobotActions(self.robot,
-                                    safe_z=safe_z,
-                                    approach_dz=approach_dz)
-        self.coin_manager = CoinManager()
+            actions = RobotActions(robot, safe_z=safe_z, approach_dz=approach_dz)
+            if joint_cache_file or backend is not None:
+                # Joints from a simulator's or mock's IK must never reach the file the arm loads
+                path = joint_cache_file if self._connected_real_robot else None
+                t0 = time.time()
+                actions.joint_cache = load_or_build(robot, safe_z, approach_dz, path)
+                timings["joint_cache"] = time.time() - t0
 
-        # ROUND-ROBIN STACK ORDER
-        self.stack_order = [0, 1, 2]       # cycle through these
-        self.stack_pointer = 0             # which one to pick from next
+            self.robot = robot
+            self.actions = actions
+            timings["total"] = time.time() - t_start
+            self.startup_timings = timings
+            print("[connect4_robot] Ready in " + ", ".join(f"{k} {v:.2f} s" for k, v in timings.items()))
+            self.ready.set_result(self)
+        except Exception as e:
+            print(f"[connect4_robot] Robot start-up failed: {e}")
+            self.ready.set_exception(e)
 
-    def _get_next_pick_pose(self):
+    def wait_ready(self, timeout=None):
+        """Block until start-up finished (raises if it failed)."""
+        return self.ready.result(timeout)
+
+    def _pick_cost(self, pick_pose, target_pose):
+        """Planned path length (m) from the arm's position via `pick_pose` to `target_pose`."""
+        start = self.actions.current_pose
+        return path_length(plan_pick_place(pick_pose, target_pose, self.actions.SAFE_Z, start=start,
+                                           approach_dz=self.actions.APPROACH_DZ),
+                           start)
+
+    def _get_next_pick_pose(self, target_pose=None):
         """
+        Nearest pick (coin_selection="nearest" and a target is given):
+        - Take the top coin of the stack with the shortest path to target_pose
+
         Round-robin pick:
         - Try stack N (according to stack_order)
         - If empty → move to next stack in the cycle
         - Continue until all stacks empty
         """
 
+        if self.coin_selection == "nearest" and target_pose is not None:
+            stack_id = self.coin_manager.cheapest_stack(
+                lambda pose: self._pick_cost(pose, target_pose))
+            if stack_id is None:
+                raise RuntimeError("All stacks are empty! No coins left.")
+            self._last_stack_id = stack_id
+            return self.coin_manager.get_next_pick_pose(stack_id)
+
         attempts = 0
         num_stacks = len(self.stack_order)
 
@@ -98,6 +275,7 @@ class Connect4Robot:
                 # Move pointer to next stack for the next pick
                 self.stack_pointer = (self.stack_pointer + 1) % num_stacks
 
+                self._last_stack_id = stack_id
                 return pose
 
             except RuntimeError:
@@ -108,22 +286,239 @@ class Connect4Robot:
         # If we tried all stacks and all are empty:
         raise RuntimeError("All stacks are empty! No coins left.")
 
-    def play_move(self, column: int):
+    def play_move(self, column: int, on_state=None):
         """
         Pick next coin in round-robin order and drop it in selected column.
+        Blocks until the coin is dropped; `on_state` is called with PICKING /
+        PLACING as the move progresses.
         """
         if column < 0 or column >= len(DROP_POSES):
             raise ValueError(f"Column {column} out of range.")
+        self.wait_ready()
 
-        pick_pose = self._get_next_pick_pose()
         drop_pose = DROP_POSES[column]
 
+        # Coin already staged above the board → only the drop leg is left
+        if self.held is not None:
+            if on_state:
+                on_state(PLACING)
+            stack_id, _, grasp = self.held
+            release = self.dwell.use_release(column)
+            with self._awaiting_outcome((stack_id, grasp, column, release)):
+                self.actions.drop_held(drop_pose, release_dwell=release)
+            self.held = None
+            return
+
+        pick_pose = self._get_next_pick_pose(drop_pose)
+        stack_id = self._last_stack_id
+        grasp = self.dwell.use_grasp(stack_id)
+        release = self.dwell.use_release(column)
+
         # Execute pick & place
-        self.actions.pick(pick_pose)
-        self.actions.place(drop_pose)
+        if on_state:
+            on_state(PICKING)
+        on_grasped = (lambda: on_state(PLACING)) if on_state else None
+        with self._awaiting_outcome((stack_id, grasp, column, release)):
+            if self.planned_paths:
+                self.actions.pick_and_place(pick_pose, drop_pose, on_grasped=on_grasped,
+                                            grasp_dwell=grasp, release_dwell=release)
+            else:
+                self.actions.pick(pick_pose, grasp_dwell=grasp)
+                if on_grasped:
+                    on_grasped()
+                self.actions.place(drop_pose, release_dwell=release)
+
+    @contextmanager
+    def _awaiting_outcome(self, entry):
+        """
+        Register a drop for report_outcome() before the arm moves (vision may
+        see the disc before the park move returns); withdrawn if the move fails.
+        """
+        self._unconfirmed.append(entry)
+        try:
+            yield
+        except Exception:
+            self._unconfirmed.remove(entry)
+            raise
+
+    def report_outcome(self, ok: bool, column=None):
+        """
+        Outcome of the oldest dropped coin not reported yet (ok = vision saw it
+        land in its column); tunes that stack's and column's dwell times.
+        `column` (where vision saw the disc) picks the drop to confirm; a drop
+        there already reported as failed has that failure withdrawn.
+        Returns the column, or None if no drop was waiting for an outcome.
+        """
+        if column is not None:
+            entry = next((e for e in self._unconfirmed if e[2] == column), None)
+            if entry is None:
+                late = next((t for t in self._timed_out if t[0][2] == column), None)
+                if not ok or late is None:
+                    return None
+                self._timed_out.remove(late)
+                (stack_id, grasp, column, release), undo = late
+                self.dwell.withdraw(stack_id, grasp, column, release, undo)
+                return column
+            self._unconfirmed.remove(entry)
+        elif self._unconfirmed:
+            entry = self._unconfirmed.popleft()
+        else:
+            return None
+        stack_id, grasp, column, release = entry
+        undo = self.dwell.record(stack_id, grasp, column, release, ok)
+        if not ok:
+            self._timed_out.append((entry, undo))
+        return column
+
+    # -------------------------
+    #   SPECULATIVE PRE-STAGING
+    # -------------------------
+    def _stage(self, on_state=None):
+        self.wait_ready()
+        if self.held is not None:
+            return
+        if on_state:
+            on_state(PICKING)
+        # Column unknown yet: take the coin closest to the hover pose
+        pick_pose = self._get_next_pick_pose(hover_pose(self.actions.SAFE_Z))
+        stack_id = self._last_stack_id
+        grasp = self.dwell.use_grasp(stack_id)
+        try:
+            self.actions.stage_coin(pick_pose, grasp_dwell=grasp)
+        except Exception:
+            # _get_next_pick_pose already counted the coin as taken
+            self.coin_manager.return_coin(stack_id)
+            raise
+        self.held = (stack_id, pick_pose, grasp)
+
+    def _unstage(self, on_state=None):
+        if self.held is None:
+            return
+        if on_state:
+            on_state(PLACING)
+        stack_id, pick_pose, _ = self.held
+        # Put the coin back on top of its stack and undo the bookkeeping
+        self.actions.drop_held(pick_pose)
+        self.held = None
+        self.coin_manager.return_coin(stack_id)
+        self.stack_pointer = self.stack_order.index(stack_id)
+
+    def prestage(self):
+        """
+        Queue picking the next coin and holding it above the board while the
+        human thinks. Returns a Future, or None if a coin is already staged /
+        queued or no coins are left.
+        """
+        if self._stage_requested or self.coin_manager.remaining() == 0:
+            return None
+        self._stage_requested = True
+        return self._submit(RobotCommand(None, PRESTAGE_CMD))
+
+    def abort_prestage(self):
+        """Queue returning a staged coin to its stack (e.g. at game end)."""
+        if not self._stage_requested:
+            return None
+        self._stage_requested = False
+        return self._submit(RobotCommand(None, UNSTAGE_CMD))
+
+    # -------------------------
+    #   ASYNC COMMAND QUEUE
+    # -------------------------
+    def submit_move(self, column: int) -> Future:
+        """
+        Queue a move for the worker thread and return at once.
+        The returned Future resolves to the RobotCommand (or raises its error).
+        """
+        if column < 0 or column >= len(DROP_POSES):
+            raise ValueError(f"Column {column} out of range.")
+        # A staged coin (held or queued) is used by this move
+        self._stage_requested = False
+        return self._submit(RobotCommand(column))
+
+    def _submit(self, cmd):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run_commands, name="robot", daemon=True)
+            self._worker.start()
+        self._commands.put(cmd)
+        return cmd.future
+
+    def _run_commands(self):
+        while True:
+            cmd = self._commands.get()
+            if cmd is None:
+                return
+            if not cmd.future.set_running_or_notify_cancel():
+                continue
+            self._current = cmd
+            cmd.started_at = time.time()
+
+            def on_state(state, cmd=cmd):
+                cmd.state = state
+
+            try:
+                if cmd.kind == PRESTAGE_CMD:
+                    self._stage(on_state)
+                elif cmd.kind == UNSTAGE_CMD:
+                    self._unstage(on_state)
+                else:
+                    self.play_move(cmd.column, on_state=on_state)
+            except Exception as e:
+                cmd.state = FAILED
+                cmd.error = e
+                cmd.finished_at = time.time()
+                cmd.future.set_exception(e)
+            else:
+                cmd.state = DONE
+                cmd.finished_at = time.time()
+                cmd.future.set_result(cmd)
+            finally:
+                self._last = cmd
+                self._current = None
+
+    def status(self):
+        """State of the running command (or IDLE) plus queue depth and last result."""
+        cmd = self._current
+        last = self._last
+        return {
+            "state": cmd.state if cmd is not None else IDLE,
+            "command": cmd.kind if cmd is not None else None,
+            "column": cmd.column if cmd is not None else None,
+            "holding": self.held is not None,
+            "ready": self.ready.done() and self.ready.exception() is None,
+            "queued": self._commands.qsize(),
+            "last_state": last.state if last is not None else None,
+            "last_duration_s": last.duration if last is not None else None,
+        }
+
+    def busy(self):
+        return self._current is not None or not self._commands.empty()
+
+    def _stop_worker(self):
+        """Cancel moves that have not started, let the current one finish."""
+        if self._worker is None:
+            return
+        while True:
+            try:
+                cmd = self._commands.get_nowait()
+            except queue.Empty:
+                break
+            if cmd is not None:
+                cmd.future.cancel()
+        self._commands.put(None)
+        self._worker.join()
+        self._worker = None
 
     def close(self):
         """Shutdown safely."""
+        self._stop_worker()
+        try:
+            self.wait_ready(timeout=60.0)
+        except Exception:
+            return
+        try:
+            self._unstage()
+        except Exception as e:
+            print(f"[connect4_robot] Could not return staged coin: {e}")
         try:
             self.robot.move_to_home_pose()
         except Exception:
@@ -0,0 +1,203 @@
+# dwell_tuner.py
+"""
+Gripper dwell times per coin stack (after grasp) and per column (after release).
+
+RobotActions used to wait a fixed GRASP_DWELL = 1.0 s and RELEASE_DWELL =
+0.4 s after every gripper action. Each stack and column now has its own
+dwell, tuned from the outcome of every move the vision confirms (or does
+not): after SHORTEN_AFTER successful moves in a row the dwell is shortened,
+never below `minimum` or just above the shortest dwell that failed;
+after a failure it backs off to BACKOFF x the dwell that failed. A failure
+is forgotten after FORGET_AFTER successes, and withdrawn if the disc it was
+blamed on is confirmed late.
+
+The profiles live in a JSON file next to the tray inventory and joint cache
+(`gripper_dwell.json`); `dwell`, `minimum` and `maximum` can be edited by hand.
+
+    python -m robot_control.dwell_tuner status
+    python -m robot_control.dwell_tuner reset
+"""
+
+import json
+import os
+
+from .robot_positions import DROP_POSES, PICK_POSES
+
+DWELL_FILE = "gripper_dwell.json"
+
+# Fixed dwell times the arm was run with so far (s)
+GRASP_DWELL = 1.0
+RELEASE_DWELL = 0.4
+
+SHORTEN_AFTER = 3      # successes in a row before the dwell is shortened
+SHORTEN = 0.85         # factor applied when shortening
+BACKOFF = 1.5          # factor applied to a dwell that failed
+MARGIN = 1.1           # stay this far above the shortest dwell that failed
+FORGET_AFTER = 20      # successes since the last failure before its floor is dropped
+
+
+class DwellProfile:
+    """Dwell for one stack (grasp) or one column (release)."""
+
+    def __init__(self, dwell, minimum, maximum, failed_at=None, streak=0, clean=0):
+        self.dwell = dwell
+        self.minimum = minimum
+        self.maximum = maximum
+        self.failed_at = failed_at    # shortest dwell that failed recently
+        self.streak = streak          # successes since the last change
+        self.clean = clean            # successes since the last failure
+
+    def record(self, used, ok):
+        if ok:
+            self.streak += 1
+            self.clean += 1
+            if self.failed_at is not None and self.clean >= FORGET_AFTER:
+                # Conditions change (worn suction cup replaced, new coins): probe again
+                self.failed_at = None
+            if self.streak >= SHORTEN_AFTER:
+                floor = self.minimum
+                if self.failed_at is not None:
+                    floor = max(floor, self.failed_at * MARGIN)
+                self.dwell = min(self.dwell, max(floor, self.dwell * SHORTEN))
+                self.streak = 0
+        else:
+            self.failed_at = used if self.failed_at is None else min(self.failed_at, used)
+            self.dwell = min(self.maximum, max(self.dwell, used * BACKOFF))
+            self.streak = 0
+            self.clean = 0
+
+    def to_dict(self):
+        return {"dwell": round(self.dwell, 4), "minimum": self.minimum, "maximum": self.maximum,
+                "failed_at": self.failed_at, "streak": self.streak, "clean": self.clean}
+
+    @classmethod
+    def from_dict(cls, d, default):
+        p = cls(default.dwell, default.minimum, default.maximum)
+        p.minimum = float(d.get("minimum", p.minimum))
+        p.maximum = float(d.get("maximum", p.maximum))
+        p.dwell = max(p.minimum, min(p.maximum, float(d.get("dwell", p.dwell))))
+        p.failed_at = d.get("failed_at")
+        p.streak = int(d.get("streak", 0))
+        p.clean = int(d.get("clean", 0))
+        return p
+
+
+def _default_grasp():
+    return DwellProfile(GRASP_DWELL, 0.2, 2 * GRASP_DWELL)
+
+
+def _default_release():
+    return DwellProfile(RELEASE_DWELL, 0.05, 2 * RELEASE_DWELL)
+
+
+class DwellTuner:
+    def __init__(self, state_file=None, tune=True):
+        """
+        state_file: JSON file the profiles are loaded from and saved to after
+                    every outcome (None = in memory only, starts at the fixed dwells)
+        tune:       False = keep the dwells as loaded, only count time saved
+        """
+        self.state_file = state_file
+        self.tune = tune
+        self.grasp = [_default_grasp() for _ in PICK_POSES]
+        self.release = [_default_release() for _ in DROP_POSES]
+        self.saved_s = 0.0
+        self.actions = 0
+        self.failures = 0
+        if state_file and os.path.exists(state_file):
+            self._load()
+
+    # ---------- persistence ----------
+    def _load(self):
+        try:
+            with open(self.state_file) as f:
+                data = json.load(f)
+            grasp = data["grasp"]
+            release = data["release"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[dwell_tuner] Could not read {self.state_file}: {e}; using fixed dwells.")
+            return
+        if len(grasp) != len(PICK_POSES) or len(release) != len(DROP_POSES):
+            print(f"[dwell_tuner] {self.state_file} does not match the poses; using fixed dwells.")
+            return
+        self.grasp = [DwellProfile.from_dict(d, _default_grasp()) for d in grasp]
+        self.release = [DwellProfile.from_dict(d, _default_release()) for d in release]
+
+    def save(self):
+        if not self.state_file:
+            return
+        tmp = self.state_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"grasp": [p.to_dict() for p in self.grasp],
+                       "release": [p.to_dict() for p in self.release]}, f, indent=1)
+        os.replace(tmp, self.state_file)
+
+    def reset(self):
+        self.grasp = [_default_grasp() for _ in PICK_POSES]
+        self.release = [_default_release() for _ in DROP_POSES]
+        self.save()
+
+    # ---------- dwell times ----------
+    def use_grasp(self, stack_id):
+        """Dwell after grasping from `stack_id` (counted as used)."""
+        dwell = self.grasp[stack_id].dwell
+        self.saved_s += GRASP_DWELL - dwell
+        self.actions += 1
+        return dwell
+
+    def use_release(self, column):
+        """Dwell after releasing over `column` (counted as used)."""
+        dwell = self.release[column].dwell
+        self.saved_s += RELEASE_DWELL - dwell
+        self.actions += 1
+        return dwell
+
+    def record(self, stack_id, grasp_dwell, column, release_dwell, ok):
+        """
+        Outcome of one move: ok = the disc landed in `column`. A missing disc
+        cannot be blamed on the grasp or the release alone, so both back off.
+        For a failure, returns what withdraw() needs to take it back.
+        """
+        undo = None
+        if not ok:
+            self.failures += 1
+            undo = (self.grasp[stack_id].to_dict(), self.release[column].to_dict())
+        if self.tune:
+            self.grasp[stack_id].record(grasp_dwell, ok)
+            self.release[column].record(release_dwell, ok)
+            self.save()
+        return undo
+
+    def withdraw(self, stack_id, grasp_dwell, column, release_dwell, undo):
+        """
+        A move recorded as failed was confirmed after all (the disc was seen
+        late): restore both profiles from before the failure, count a success.
+        """
+        self.failures -= 1
+        if self.tune:
+            grasp, release = undo
+            self.grasp[stack_id] = DwellProfile.from_dict(grasp, _default_grasp())
+            self.release[column] = DwellProfile.from_dict(release, _default_release())
+        self.record(stack_id, grasp_dwell, column, release_dwell, True)
+
+    def report(self):
+        """Time saved against the fixed dwells, gripper actions and failed moves so far."""
+        return {"saved_s": self.saved_s, "actions": self.actions, "failures": self.failures}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show or reset the gripper dwell profiles.")
+    parser.add_argument("command", choices=["status", "reset"])
+    parser.add_argument("--file", default=DWELL_FILE)
+    args = parser.parse_args()
+
+    tuner = DwellTuner(args.file)
+    if args.command == "reset":
+        tuner.reset()
+        print(f"✅ Dwell times reset to {GRASP_DWELL} s grasp / {RELEASE_DWELL} s release.")
+    for i, p in enumerate(tuner.grasp):
+        print(f"Stack {i} grasp:    {p.dwell:.2f} s (min {p.minimum}, failed at {p.failed_at})")
+    for i, p in enumerate(tuner.release):
+        print(f"Column {i + 1} release: {p.dwell:.2f} s (min {p.minimum}, failed at {p.failed_at})")
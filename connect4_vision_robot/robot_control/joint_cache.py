@@ -0,0 +1,164 @@
+# joint_cache.py
+"""
+Joint configurations for every fixed pose the arm visits.
+
+The pick, drop, hover, SAFE_Z and park poses never change, so they are
+resolved to joint angles once through the robot's inverse kinematics and
+stored in a versioned JSON file. At runtime RobotActions sends move_joints
+for cached poses and the controller skips IK on every waypoint.
+
+The version is a hash of robot_positions.py, the travel heights and the
+robot class that solved the IK, so editing a pose (or SAFE_Z / APPROACH_DZ)
+invalidates the cache and it is rebuilt the next time the robot connects,
+and joints solved by the simulator's approximate IK are never sent to the
+real arm. Connect4Robot only reads and writes the file for a connected arm.
+
+Build it explicitly with:
+    python -m robot_control.joint_cache --ip 172.20.10.2
+"""
+
+import hashlib
+import json
+import os
+
+from . import robot_positions
+from .robot_positions import DROP_POSES, PICK_POSES
+from .trajectory import at_height, hover_pose, park_pose
+
+JOINT_CACHE_FILE = "joint_cache.json"
+
+
+def robot_identity(robot):
+    """Which IK the joints come from (the robot class, e.g. NiryoRobot)."""
+    robot = getattr(robot, "_robot", robot)   # unwrap RobotCallStats
+    return type(robot).__name__
+
+
+def poses_version(safe_z, approach_dz, identity):
+    with open(robot_positions.__file__, "rb") as f:
+        digest = hashlib.sha256(f.read())
+    digest.update(f"{safe_z:.6f}/{approach_dz:.6f}/{identity}".encode())
+    return digest.hexdigest()[:16]
+
+
+def _key(pose):
+    return tuple(round(float(v), 5) for v in pose)
+
+
+def fixed_poses(safe_z, approach_dz):
+    """Every pose RobotActions can send, original or planned sequence."""
+    poses = []
+    for stack in PICK_POSES:
+        for pose in stack:
+            above = list(pose)
+            above[2] += approach_dz
+            poses += [pose, above, at_height(pose, safe_z)]
+    for pose in DROP_POSES:
+        poses += [pose, at_height(pose, safe_z)]
+    poses += [hover_pose(safe_z), park_pose(safe_z)]
+    unique = {}
+    for pose in poses:
+        unique.setdefault(_key(pose), list(pose))
+    return list(unique.values())
+
+
+class JointCache:
+    def __init__(self, version, entries=None):
+        self.version = version
+        self.joints = {}
+        for pose, joints in entries or []:
+            self.joints[_key(pose)] = list(joints)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.joints)
+
+    def get(self, pose):
+        joints = self.joints.get(_key(pose))
+        if joints is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return joints
+
+    @classmethod
+    def load(cls, path, version):
+        """Cache from `path`, or None if missing or built for other poses."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[joint_cache] Could not read {path}: {e}")
+            return None
+        if data.get("version") != version:
+            print("[joint_cache] robot_positions.py, travel heights or robot changed; cache is stale.")
+            return None
+        return cls(version, data.get("entries"))
+
+    def save(self, path):
+        entries = [[list(k), v] for k, v in self.joints.items()]
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": self.version, "entries": entries}, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def build(cls, robot, safe_z, approach_dz):
+        """Resolve every fixed pose through robot.inverse_kinematics()."""
+        cache = cls(poses_version(safe_z, approach_dz, robot_identity(robot)))
+        for pose in fixed_poses(safe_z, approach_dz):
+            cache.joints[_key(pose)] = [float(j) for j in robot.inverse_kinematics(*pose)]
+        return cache
+
+
+def load_or_build(robot, safe_z, approach_dz, path=JOINT_CACHE_FILE):
+    """
+    Up-to-date cache for these poses: loaded from `path`, or rebuilt through
+    the robot's IK (and saved) if stale; path=None builds it in memory only.
+    None if the robot has no IK service or cannot take joint moves.
+    """
+    if not hasattr(robot, "move_joints"):
+        return None
+    if path:
+        cache = JointCache.load(path, poses_version(safe_z, approach_dz, robot_identity(robot)))
+        if cache is not None:
+            return cache
+    if not hasattr(robot, "inverse_kinematics"):
+        return None
+    try:
+        cache = JointCache.build(robot, safe_z, approach_dz)
+    except Exception as e:
+        print(f"[joint_cache] IK failed, moving in Cartesian space: {e}")
+        return None
+    if path:
+        cache.save(path)
+        print(f"[joint_cache] Resolved {len(cache)} poses to joints → {path}")
+    return cache
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resolve all fixed poses to joint configurations.")
+    parser.add_argument("--ip", default="172.20.10.2")
+    parser.add_argument("--safe-z", type=float, default=0.35)
+    parser.add_argument("--approach-dz", type=float, default=0.06)
+    parser.add_argument("--file", default=JOINT_CACHE_FILE)
+    parser.add_argument("--simulate", action="store_true", help="use the simulator's approximate IK")
+    args = parser.parse_args()
+
+    if args.simulate:
+        from .simulated_robot import SimulatedNiryoRobot
+        robot = SimulatedNiryoRobot(speed=None)
+    else:
+        from pyniryo import NiryoRobot
+        robot = NiryoRobot(args.ip)
+    try:
+        cache = JointCache.build(robot, args.safe_z, args.approach_dz)
+        cache.save(args.file)
+        print(f"✅ {len(cache)} poses resolved, version {cache.version} → {args.file}")
+    finally:
+        robot.close_connection()
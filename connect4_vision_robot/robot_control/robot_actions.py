@@ -2,6 +2,40 @@
 
 import time
 
+from .trajectory import (GRASP, HOME, MOVE, RELEASE, MotionModel, compare, legacy_pick_steps,
+                         legacy_place_steps, path_length, plan_drop, plan_pick_place,
+                         plan_prestage)
+
+
+class RobotCallStats:
+    """
+    Transparent wrapper around the robot object that counts calls (controller
+    round trips) and their wall time per method.
+    """
+
+    def __init__(self, robot):
+        self._robot = robot
+        self.calls = {}
+        self.seconds = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self._robot, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self.calls[name] = self.calls.get(name, 0) + 1
+                self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - t0
+        return call
+
+    def total(self):
+        """(round trips, wall seconds) so far."""
+        return sum(self.calls.values()), sum(self.seconds.values())
+
 
 class RobotActions:
     def __init__(self, robot, safe_z=0.40, approach_dz=0.08):
@@ -9,14 +43,57 @@ class RobotActions:
         safe_z:      safe travel height above the board (e.g. 0.40 m)
         approach_dz: distance above the pick pose before going down (e.g. 0.08 m)
         """
-        self.robot = robot
+        self.robot = RobotCallStats(robot)
         self.SAFE_Z = safe_z
         self.APPROACH_DZ = approach_dz
+        self.GRASP_DWELL = 1.0
+        self.RELEASE_DWELL = 0.4
+        # Corner smoothing (m) when a leg is sent as one trajectory
+        self.BLEND = 0.02
+        # Send pick and place as one motion sequence each if the robot supports it
+        self.BATCH = True
+
+        self.motion_model = MotionModel()
+        self.current_pose = None   # None = at home / unknown
+        self.travel_m = 0.0        # tool travel executed through run()
+        self.last_report = None
+        self.verbose = True        # print the planned path of every move
+        self.joint_cache = None    # JointCache: cached poses are sent as joint moves
+
+    def _dwell(self, seconds):
+        """Wait for the gripper; robots with a wait() (e.g. the simulator) account for it."""
+        wait = getattr(self.robot, "wait", None)
+        if wait is not None:
+            wait(seconds)
+        else:
+            time.sleep(seconds)
+
+    def _move_pose(self, pose):
+        """Move to a pose, as a joint move if its IK solution is cached."""
+        joints = self.joint_cache.get(pose) if self.joint_cache is not None else None
+        if joints is not None:
+            self.robot.move_joints(*joints)
+        else:
+            self.robot.move_pose(*pose)
+
+    def _move_through(self, poses):
+        """One blended trajectory through `poses` (joint waypoints where cached)."""
+        joints = [self.joint_cache.get(p) for p in poses] if self.joint_cache is not None else None
+        if joints and all(j is not None for j in joints) and \
+                hasattr(self.robot, "execute_trajectory_from_poses_and_joints"):
+            self.robot.execute_trajectory_from_poses_and_joints(
+                joints, list_type=["joint"] * len(joints), dist_smoothing=self.BLEND)
+        elif hasattr(self.robot, "execute_trajectory_from_poses"):
+            self.robot.execute_trajectory_from_poses(poses, dist_smoothing=self.BLEND)
+        else:
+            for p in poses:
+                self._move_pose(p)
 
     # --- Utility Movement ---
     def go_home(self):
         """Move robot safely to home pose."""
         self.robot.move_to_home_pose()
+        self.current_pose = None
 
     def safe_above(self, pose):
         """Return a pose APPROACH_DZ above the given pose."""
@@ -36,34 +113,18 @@ class RobotActions:
     # -------------------------
     #           PICK
     # -------------------------
-    def pick(self, pose):
+    def pick(self, pose, grasp_dwell=None):
         """
         Full pick sequence (matches your script):
-        home → above_pick (pose.z + APPROACH_DZ) → pick → lift_to_SAFE_Z
+        home → above_pick (pose.z + APPROACH_DZ) → pick → grasp → lift_to_SAFE_Z
         """
-
-        # A. Start from home for safety
-        self.go_home()
-
-        # B. Go above the coin (pose.z + APPROACH_DZ)
-        above = self.safe_above(pose)
-        self.robot.move_pose(*above)
-
-        # C. Down to actual pick pose
-        self.robot.move_pose(*pose)
-
-        # D. Grasp (suction ON)
-        self.robot.grasp_with_tool()
-        time.sleep(1.0)   # same as in your script
-
-        # E. Lift coin to SAFE_Z travel height
-        lift = self.safe_travel_pose(pose)
-        self.robot.move_pose(*lift)
+        dwell = self.GRASP_DWELL if grasp_dwell is None else grasp_dwell
+        self.run(legacy_pick_steps(pose, self.SAFE_Z, self.APPROACH_DZ, dwell))
 
     # -------------------------
     #           PLACE
     # -------------------------
-    def place(self, pose):
+    def place(self, pose, release_dwell=None):
         """
         Full drop sequence (matches your script):
         SAFE_Z over drop X/Y → down to drop → release → back to SAFE_Z → home
@@ -71,21 +132,120 @@ class RobotActions:
         Note: we do NOT use APPROACH_DZ above drop here; we come from SAFE_Z
         directly down to the drop height, just like in your working code.
         """
+        dwell = self.RELEASE_DWELL if release_dwell is None else release_dwell
+        self.run(legacy_place_steps(pose, self.SAFE_Z, dwell))
 
-        # A. Move to correct X/Y at SAFE_Z (comes from above the board)
-        travel_over = self.safe_travel_pose(pose)
-        self.robot.move_pose(*travel_over)
-
-        # B. Move straight down to exact drop Z
-        self.robot.move_pose(*pose)
-
-        # C. Release coin
-        self.robot.release_with_tool()
-        time.sleep(0.4)   # same as in your script
+    # -------------------------
+    #   STEP EXECUTION
+    # -------------------------
+    def _encode(self, steps):
+        """
+        Steps as one motion sequence for robot.execute_sequence():
+        ("move_joints", q) / ("move_pose", pose) / ("trajectory", [(type, values)], blend)
+        / ("grasp",) / ("release",) / ("wait", s) / ("home",)
+        """
+        commands = []
+        for step in steps:
+            if step.kind == MOVE:
+                cached = [self.joint_cache.get(p) if self.joint_cache is not None else None
+                          for p in step.poses]
+                points = [("joint", q) if q is not None else ("pose", list(p))
+                          for p, q in zip(step.poses, cached)]
+                if len(points) > 1:
+                    commands.append(("trajectory", points, self.BLEND))
+                elif points:
+                    kind, values = points[0]
+                    commands.append(("move_joints" if kind == "joint" else "move_pose", values))
+            elif step.kind == GRASP:
+                commands += [("grasp",), ("wait", step.dwell)]
+            elif step.kind == RELEASE:
+                commands += [("release",), ("wait", step.dwell)]
+            elif step.kind == HOME:
+                commands.append(("home",))
+        return commands
+
+    def _run_step(self, step):
+        if step.kind == MOVE:
+            if len(step.poses) > 1:
+                self._move_through(step.poses)
+            elif step.poses:
+                self._move_pose(step.poses[0])
+        elif step.kind == GRASP:
+            self.robot.grasp_with_tool()
+            self._dwell(step.dwell)
+        elif step.kind == RELEASE:
+            self.robot.release_with_tool()
+            self._dwell(step.dwell)
+        elif step.kind == HOME:
+            self.robot.move_to_home_pose()
+
+    def run(self, steps, on_grasped=None):
+        """
+        Execute a step list from trajectory.py (`on_grasped` runs after the grasp).
 
-        # D. Move straight UP again to SAFE_Z above the board
-        lift_up = self.safe_travel_pose(pose)
-        self.robot.move_pose(*lift_up)
+        The steps up to and including the grasp (the pick) and the rest (the
+        place) are each sent as a single motion sequence when the robot has
+        execute_sequence(); otherwise every step is its own call.
+        """
+        self.travel_m += path_length(steps, self.current_pose)
+        batched = self.BATCH and hasattr(self.robot, "execute_sequence")
+
+        segment = []
+        for i, step in enumerate(steps):
+            segment.append(step)
+            if step.kind != GRASP and i < len(steps) - 1:
+                continue
+            if batched:
+                self.robot.execute_sequence(self._encode(segment))
+            else:
+                for s in segment:
+                    self._run_step(s)
+            for s in segment:
+                if s.kind == HOME:
+                    self.current_pose = None
+                elif s.kind == MOVE and s.poses:
+                    self.current_pose = s.poses[-1]
+            if step.kind == GRASP and on_grasped:
+                on_grasped()
+            segment = []
+
+    def pick_and_place(self, pick_pose, drop_pose, on_grasped=None, grasp_dwell=None,
+                       release_dwell=None):
+        """
+        Pick a coin and drop it along the planned path: no home visits, each
+        leg between gripper actions blended, ending parked above the stacks.
+        Returns the planned vs original length / time estimate.
+        """
+        start = self.current_pose
+        steps = plan_pick_place(
+            pick_pose, drop_pose, self.SAFE_Z, start=start,
+            grasp_dwell=self.GRASP_DWELL if grasp_dwell is None else grasp_dwell,
+            release_dwell=self.RELEASE_DWELL if release_dwell is None else release_dwell,
+            approach_dz=self.APPROACH_DZ)
+        report = compare(pick_pose, drop_pose, self.SAFE_Z, self.APPROACH_DZ,
+                         self.motion_model, start=start)
+        calls0, wall0 = self.robot.total()
+        self.run(steps, on_grasped=on_grasped)
+        calls1, wall1 = self.robot.total()
+        report["calls"] = calls1 - calls0
+        report["call_wall_s"] = wall1 - wall0
+        if self.verbose:
+            print(f"[robot_actions] path {report['length_m']:.2f} m, ~{report['time_s']:.1f} s "
+                  f"(was {report['legacy_length_m']:.2f} m, ~{report['legacy_time_s']:.1f} s), "
+                  f"{report['calls']} robot calls in {report['call_wall_s']:.1f} s")
+        self.last_report = report
+        return report
 
-        # E. From safe height above board → go home
-        self.go_home()
+    # -------------------------
+    #   PRE-STAGED COIN
+    # -------------------------
+    def stage_coin(self, pick_pose, hover=None, grasp_dwell=None):
+        """Pick a coin and hold it at the hover pose above the board."""
+        dwell = self.GRASP_DWELL if grasp_dwell is None else grasp_dwell
+        self.run(plan_prestage(pick_pose, self.SAFE_Z, start=self.current_pose, hover=hover,
+                               grasp_dwell=dwell, approach_dz=self.APPROACH_DZ))
+
+    def drop_held(self, drop_pose, release_dwell=None):
+        """Drop the coin already in the gripper (only the drop leg is left)."""
+        dwell = self.RELEASE_DWELL if release_dwell is None else release_dwell
+        self.run(plan_drop(drop_pose, self.SAFE_Z, start=self.current_pose, release_dwell=dwell))
@@ -0,0 +1,355 @@
+# simulated_robot.py
+"""
+Time-accurate stand-in for NiryoRobot.
+
+Unlike _MockNiryoRobot, every call takes as long as it would on the arm:
+poses are turned into approximate joint angles, motion time follows a
+trapezoidal velocity profile limited by per-joint speed and acceleration,
+grasp/release have their own latency, and each call can pay a network
+round trip. Every command is appended to `timeline` on a simulated clock.
+execute_sequence() runs a whole list of commands for a single round trip.
+With `grasp_settle` / `release_settle` set, an arm that moves off sooner
+than that after a gripper action loses the coin (counted in `failures`).
+
+`speed` runs the simulation faster than real time (speed=10 sleeps a tenth
+of the modelled time; speed=None does not sleep at all). The clock always
+advances by the modelled time.
+
+Benchmark robot turns per minute without hardware:
+    python -m robot_control.simulated_robot --games 5 --speed 20
+"""
+
+import math
+import time
+from collections import namedtuple
+
+# Rough Ned geometry (m) for the joint-angle approximation
+BASE_HEIGHT = 0.183
+UPPER_ARM = 0.221
+FOREARM = 0.300        # forearm + wrist + suction tool
+
+# Per-joint limits (rad/s, rad/s²)
+JOINT_SPEED = (1.0, 1.0, 1.0, 1.5, 1.5, 2.0)
+JOINT_ACCEL = (2.0, 2.0, 2.0, 3.0, 3.0, 4.0)
+
+HOME_JOINTS = (0.0, 0.3, -1.3, 0.0, 0.0, 0.0)
+
+CALIBRATION_TIME = 12.0
+
+TimelineEntry = namedtuple("TimelineEntry", "start end command detail")
+
+
+def approx_joints(pose):
+    """Approximate joint angles for a Cartesian pose (planar 2-link arm + wrist)."""
+    x, y, z, roll, pitch, yaw = pose
+    j1 = math.atan2(y, x)
+    r = math.hypot(x, y)
+    dz = z - BASE_HEIGHT
+    d = min(math.hypot(r, dz), UPPER_ARM + FOREARM - 1e-6)
+    d = max(d, abs(UPPER_ARM - FOREARM) + 1e-6)
+    cos_elbow = (UPPER_ARM ** 2 + FOREARM ** 2 - d ** 2) / (2 * UPPER_ARM * FOREARM)
+    elbow = math.pi - math.acos(max(-1.0, min(1.0, cos_elbow)))
+    cos_inner = (UPPER_ARM ** 2 + d ** 2 - FOREARM ** 2) / (2 * UPPER_ARM * d)
+    shoulder = math.atan2(dz, r) + math.acos(max(-1.0, min(1.0, cos_inner)))
+    return (j1, math.pi / 2 - shoulder, elbow - math.pi / 2, roll, pitch, yaw)
+
+
+def _profile_time(distance, speed, accel):
+    """Trapezoidal (or triangular) velocity profile duration."""
+    if distance <= 0.0:
+        return 0.0
+    if distance > speed * speed / accel:
+        return distance / speed + speed / accel
+    return 2.0 * math.sqrt(distance / accel)
+
+
+def joint_move_time(q0, q1, speed=JOINT_SPEED, accel=JOINT_ACCEL):
+    """Time for a synchronised joint move: the slowest joint decides."""
+    return max(_profile_time(abs(math.remainder(b - a, math.tau)), v, a_max)
+               for a, b, v, a_max in zip(q0, q1, speed, accel))
+
+
+class SimulatedNiryoRobot:
+    def __init__(self, ip=None, speed=1.0, rtt=0.0, grasp_time=0.25, release_time=0.15,
+                 ik_time=0.05, calibrated=False, verbose=False, grasp_settle=None,
+                 release_settle=None):
+        """
+        speed:        simulated seconds per wall second (None = do not sleep)
+        rtt:          network round trip added to every call (s)
+        ik_time:      controller IK + planning per Cartesian waypoint (s)
+        grasp_time / release_time: vacuum pump latency (s)
+        calibrated:   start as if calibrate_auto() already ran
+        grasp_settle / release_settle: dwell the vacuum needs after the
+                      gripper action before the arm may move (None = none)
+        """
+        self.ip = ip
+        self.speed = speed
+        self.rtt = rtt
+        self.grasp_time = grasp_time
+        self.release_time = release_time
+        self.ik_time = ik_time
+        self.calibrated = calibrated
+        self.verbose = verbose
+        self.grasp_settle = grasp_settle
+        self.release_settle = release_settle
+
+        self.joints = HOME_JOINTS
+        self.clock = 0.0
+        self.timeline = []
+        self.calls = 0
+        self._tool = None          # [gripper action, seconds waited since]
+        self.failures = []         # (clock, "grasp" / "release") of lost coins
+
+    # ---------- simulated time ----------
+    def _execute(self, command, duration, detail=None):
+        total = self.rtt + duration
+        if self.speed:
+            time.sleep(total / self.speed)
+        start = self.clock
+        self.clock += total
+        self.calls += 1
+        self.timeline.append(TimelineEntry(start, self.clock, command, detail))
+        if self.verbose:
+            print(f"[SimRobot] {start:8.2f}s {command} ({total:.2f}s)")
+
+    def _check_tool(self):
+        """The arm moves off: a gripper action that did not settle loses the coin."""
+        if self._tool is None:
+            return
+        action, waited = self._tool
+        self._tool = None
+        settle = self.grasp_settle if action == "grasp" else self.release_settle
+        if settle is not None and waited < settle:
+            self.failures.append((self.clock, action))
+
+    def _move_to(self, joints):
+        self._check_tool()
+        duration = joint_move_time(self.joints, joints)
+        self.joints = joints
+        return duration
+
+    # ---------- NiryoRobot API used by this project ----------
+    def clear_collision_detected(self):
+        self._execute("clear_collision_detected", 0.0)
+
+    def need_calibration(self):
+        self._execute("need_calibration", 0.0)
+        return not self.calibrated
+
+    def calibrate_auto(self):
+        self._execute("calibrate_auto", 0.0 if self.calibrated else CALIBRATION_TIME)
+        self.calibrated = True
+
+    def _pose_move_time(self, pose):
+        return self.ik_time + self._move_to(approx_joints(pose))
+
+    def _trajectory_time(self, points, types):
+        targets = [tuple(p) if t == "joint" else approx_joints(p) for p, t in zip(points, types)]
+        return self.ik_time * types.count("pose") + self._blended_time(targets)
+
+    def _command_time(self, command):
+        """Duration of one execute_sequence() entry, without the round trip."""
+        kind, args = command[0], command[1:]
+        if kind == "move_joints":
+            return self._move_to(tuple(args[0]))
+        if kind == "move_pose":
+            return self._pose_move_time(args[0])
+        if kind == "trajectory":
+            types = [t for t, _ in args[0]]
+            return self._trajectory_time([values for _, values in args[0]], types)
+        if kind in ("grasp", "release"):
+            self._check_tool()
+            self._tool = [kind, 0.0]
+            return self.grasp_time if kind == "grasp" else self.release_time
+        if kind == "wait":
+            if self._tool is not None:
+                self._tool[1] += args[0]
+            return args[0]
+        if kind == "home":
+            return self._move_to(HOME_JOINTS)
+        raise ValueError(f"Unknown sequence command: {kind}")
+
+    def move_to_home_pose(self):
+        self._execute("move_to_home_pose", self._move_to(HOME_JOINTS))
+
+    def move_joints(self, *joints):
+        joints = tuple(joints[0]) if len(joints) == 1 else tuple(joints)
+        self._execute("move_joints", self._move_to(joints))
+
+    def move_pose(self, *pose):
+        pose = list(pose[0]) if len(pose) == 1 else list(pose)
+        self._execute("move_pose", self._pose_move_time(pose), tuple(pose[:3]))
+
+    def execute_sequence(self, commands):
+        """
+        Run a list of commands in one call (see RobotActions._encode for the
+        format): the controller executes them back to back, one round trip.
+        """
+        duration = sum(self._command_time(c) for c in commands)
+        self._execute("execute_sequence", duration, len(commands))
+
+    def _blended_time(self, targets):
+        """Blended waypoints: one acceleration ramp for the whole path, no stops in between."""
+        self._check_tool()
+        cruise = 0.0
+        q = self.joints
+        for q_next in targets:
+            cruise += max(abs(math.remainder(b - a, math.tau)) / v
+                          for a, b, v in zip(q, q_next, JOINT_SPEED))
+            q = q_next
+        self.joints = q
+        return cruise + max(v / a for v, a in zip(JOINT_SPEED, JOINT_ACCEL))
+
+    def execute_trajectory_from_poses(self, list_pose, dist_smoothing=0.0):
+        duration = self._trajectory_time(list_pose, ["pose"] * len(list_pose))
+        self._execute("execute_trajectory_from_poses", duration, len(list_pose))
+
+    def execute_trajectory_from_poses_and_joints(self, list_pose_joints, list_type=None,
+                                                 dist_smoothing=0.0):
+        list_type = list_type or ["pose"] * len(list_pose_joints)
+        duration = self._trajectory_time(list_pose_joints, list_type)
+        self._execute("execute_trajectory_from_poses_and_joints", duration, len(list_pose_joints))
+
+    def inverse_kinematics(self, *pose):
+        pose = list(pose[0]) if len(pose) == 1 else list(pose)
+        self._execute("inverse_kinematics", self.ik_time)
+        return list(approx_joints(pose))
+
+    def grasp_with_tool(self):
+        self._execute("grasp_with_tool", self._command_time(("grasp",)))
+
+    def release_with_tool(self):
+        self._execute("release_with_tool", self._command_time(("release",)))
+
+    def wait(self, duration):
+        self._execute("wait", self._command_time(("wait", duration)))
+
+    def get_joints(self):
+        return list(self.joints)
+
+    def close_connection(self):
+        self._execute("close_connection", 0.0)
+
+    # ---------- reporting ----------
+    def summary(self):
+        """Simulated seconds and call counts per command."""
+        out = {}
+        for e in self.timeline:
+            row = out.setdefault(e.command, {"calls": 0, "seconds": 0.0})
+            row["calls"] += 1
+            row["seconds"] += e.end - e.start
+        return out
+
+
+def benchmark(games=3, depth=2, speed=None, rtt=0.0, planned_paths=True, coin_selection="nearest",
+              joint_cache=True, batch=True, seed=0, adaptive_dwell=True, grasp_settle=0.35,
+              release_settle=0.1):
+    """
+    Self-play games against the AI: the simulated robot places Red's discs,
+    Yellow's (the "human") are only put on the logical board.
+    Returns per-game dicts with robot moves, simulated robot time, AI time,
+    robot calls, tool travel per robot move, dwell time saved, coins lost and
+    robot turns/min. Dwell profiles carry over from one game to the next.
+    """
+    from .dwell_tuner import DwellTuner
+
+    import random
+
+    from game_logic import Connect4Game
+    from game_logic.ai_strategy import choose_next_move
+
+    from .connect4_robot import Connect4Robot
+    from .joint_cache import JointCache
+
+    rng = random.Random(seed)
+    results = []
+    profiles = DwellTuner(tune=adaptive_dwell)
+    for _ in range(games):
+        sim = SimulatedNiryoRobot(speed=speed, rtt=rtt, calibrated=True,
+                                  grasp_settle=grasp_settle, release_settle=release_settle)
+        robot = Connect4Robot(backend=sim, planned_paths=planned_paths,
+                              coin_selection=coin_selection, joint_cache_file=None)
+        robot.dwell.grasp, robot.dwell.release = profiles.grasp, profiles.release
+        robot.dwell.tune = adaptive_dwell
+        robot.actions.verbose = False
+        robot.actions.BATCH = batch
+        sim.clock = 0.0
+        sim.calls = 0
+        sim.timeline.clear()
+        if joint_cache:
+            robot.actions.joint_cache = JointCache.build(sim, robot.actions.SAFE_Z,
+                                                         robot.actions.APPROACH_DZ)
+        game = Connect4Game()
+        plies = 0
+        moves = 0
+        ai_time = 0.0
+        while game.check_winner() == 0 and robot.coin_manager.remaining() > 0:
+            t0 = time.perf_counter()
+            if plies == 0:
+                # A random opening move keeps self-play games from repeating
+                col = rng.choice([c for c in range(game.cols) if game.is_valid_move(c)])
+            else:
+                col = choose_next_move(game, depth=depth)
+            ai_time += time.perf_counter() - t0
+            if col is None:
+                break
+            robot_turn = game.current_player == 1
+            game.make_move(col)
+            game.switch_player()
+            plies += 1
+            if robot_turn:
+                lost = len(sim.failures)
+                robot.play_move(col)
+                robot.report_outcome(len(sim.failures) == lost)
+                moves += 1
+        robot.close()
+        total = sim.clock + ai_time
+        results.append({
+            "moves": moves,
+            "robot_s": sim.clock,
+            "ai_s": ai_time,
+            "calls": sim.calls,
+            "calls_per_move": sim.calls / moves if moves else 0.0,
+            "travel_per_move_m": robot.actions.travel_m / moves if moves else 0.0,
+            "dwell_saved_s": robot.dwell.report()["saved_s"],
+            "lost": len(sim.failures),
+            "turns_per_min": 60.0 * moves / total if total else 0.0,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark robot turns per minute in simulation.")
+    parser.add_argument("--games", type=int, default=3)
+    parser.add_argument("--depth", type=int, default=2, help="AI search depth for both sides")
+    parser.add_argument("--speed", type=float, default=None,
+                        help="simulated seconds per wall second (default: do not sleep)")
+    parser.add_argument("--rtt", type=float, default=0.0, help="round trip per robot call (s)")
+    parser.add_argument("--legacy-paths", action="store_true", help="use the original pick()+place()")
+    parser.add_argument("--coin-selection", choices=["nearest", "round_robin"], default="nearest")
+    parser.add_argument("--no-joint-cache", action="store_true", help="send Cartesian poses (IK per move)")
+    parser.add_argument("--no-batch", action="store_true", help="one robot call per step")
+    parser.add_argument("--fixed-dwell", action="store_true",
+                        help="keep the 1.0 s / 0.4 s gripper dwell times")
+    parser.add_argument("--grasp-settle", type=float, default=0.35,
+                        help="shortest grasp dwell that holds the coin (s)")
+    parser.add_argument("--release-settle", type=float, default=0.1,
+                        help="shortest release dwell that drops the coin (s)")
+    args = parser.parse_args()
+
+    rows = benchmark(args.games, args.depth, args.speed, args.rtt, not args.legacy_paths,
+                     args.coin_selection, not args.no_joint_cache, not args.no_batch,
+                     adaptive_dwell=not args.fixed_dwell, grasp_settle=args.grasp_settle,
+                     release_settle=args.release_settle)
+    print(f"{'game':>4} {'moves':>6} {'robot s':>8} {'AI s':>6} {'calls':>6} {'calls/mv':>8} "
+          f"{'m/move':>7} {'dwell -s':>8} {'lost':>5} {'turns/min':>10}")
+    for i, r in enumerate(rows):
+        print(f"{i + 1:>4} {r['moves']:>6} {r['robot_s']:>8.1f} {r['ai_s']:>6.2f} "
+              f"{r['calls']:>6} {r['calls_per_move']:>8.1f} "
+              f"{r['travel_per_move_m']:>7.3f} {r['dwell_saved_s']:>8.1f} {r['lost']:>5} "
+              f"{r['turns_per_min']:>10.2f}")
+    moves = sum(r["moves"] for r in rows)
+    total = sum(r["robot_s"] + r["ai_s"] for r in rows)
+    print(f"Overall: {60.0 * moves / total if total else 0.0:.2f} turns/min")
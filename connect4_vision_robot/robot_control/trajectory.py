@@ -0,0 +1,274 @@
+# trajectory.py
+"""
+Pick-and-place path planning and a timing model for the arm.
+
+The original sequence (RobotActions.pick + place) is
+    home → above pick → pick → grasp → SAFE_Z → over column → drop
+    → release → SAFE_Z → home
+i.e. 8 point-to-point moves, each ending in a full stop. The planned
+sequence skips both home visits and blends the moves between gripper
+actions into one smoothed trajectory:
+    [SAFE_Z over stack → above pick] pick grasp [SAFE_Z → over column → drop]
+    release [SAFE_Z → park above the stacks]
+The last APPROACH_DZ down onto the coin stays a separate move from a full
+stop, as in RobotActions.pick, so the suction cup meets the coin slowly.
+Parking above the stacks keeps the arm out of the camera's view of the
+board and is where the next pick starts anyway.
+
+With pre-staging the sequence is split in two: the pick leg ends at a
+hover pose above the board (plan_prestage) while the human is thinking,
+and only the drop leg (plan_drop) is left once the column is known.
+
+Run `python -m robot_control.trajectory` for a per-stack/column report.
+"""
+
+import math
+from collections import namedtuple
+
+from .robot_positions import DROP_POSES, PICK_POSES
+
+# Approximate Cartesian home pose of the Ned (only used to estimate times)
+HOME_POSE = [0.14, 0.0, 0.203, 0.0, 0.759, 0.0]
+
+# Step kinds
+MOVE = "move"          # poses: one or more waypoints, blended if more than one
+GRASP = "grasp"
+RELEASE = "release"
+HOME = "home"
+
+Step = namedtuple("Step", "kind poses dwell")
+
+
+def _distance(a, b):
+    return math.dist(a[:3], b[:3])
+
+
+def _rotation(a, b):
+    """Largest roll/pitch/yaw change between two poses (radians, wrapped)."""
+    return max(abs(math.remainder(a[i] - b[i], math.tau)) for i in range(3, 6))
+
+
+def _same_pose(a, b, tol=1e-4):
+    return _distance(a, b) < tol and _rotation(a, b) < tol
+
+
+def _collinear(a, b, c, tol=1e-4):
+    """True if b lies on the segment a→c with the same orientation as both."""
+    if _rotation(a, b) > tol or _rotation(b, c) > tol:
+        return False
+    return abs(_distance(a, b) + _distance(b, c) - _distance(a, c)) < tol
+
+
+def simplify(poses, start=None):
+    """Drop repeated waypoints and ones lying on a straight segment."""
+    out = []
+    prev = start
+    for p in poses:
+        if prev is not None and _same_pose(prev, p):
+            continue
+        out.append(p)
+        prev = p
+    i = 1
+    while i < len(out) - 1:
+        if _collinear(out[i - 1], out[i], out[i + 1]):
+            del out[i]
+        else:
+            i += 1
+    return out
+
+
+def at_height(pose, z):
+    p = list(pose)
+    p[2] = z
+    return p
+
+
+def park_pose(safe_z):
+    """SAFE_Z above the middle coin stack, clear of the board."""
+    return at_height(PICK_POSES[len(PICK_POSES) // 2][0], safe_z)
+
+
+def hover_pose(safe_z):
+    """SAFE_Z above the centre column, where a pre-staged coin waits."""
+    return at_height(DROP_POSES[len(DROP_POSES) // 2], safe_z)
+
+
+class MotionModel:
+    """
+    Timing model of the arm.
+
+    Each move takes max(path / linear_speed, rotation / angular_speed)
+    plus `settle` for the controller to come to a stop and return. Blended
+    waypoints only pay one settle at the end of the whole trajectory.
+    Defaults are rough figures for a Ned at the speeds this project uses;
+    measure your own with a stopwatch over a few moves and adjust.
+    """
+
+    def __init__(self, linear_speed=0.12, angular_speed=0.8, settle=0.3, home_time=2.0):
+        self.linear_speed = linear_speed
+        self.angular_speed = angular_speed
+        self.settle = settle
+        self.home_time = home_time    # move_to_home_pose goes through a joint move
+
+    def travel_time(self, a, b):
+        return max(_distance(a, b) / self.linear_speed, _rotation(a, b) / self.angular_speed)
+
+    def estimate(self, steps, start=None):
+        """(path length in m, estimated seconds) for a step list."""
+        pose = HOME_POSE if start is None else start
+        length = 0.0
+        seconds = 0.0
+        for step in steps:
+            if step.kind == MOVE:
+                for p in step.poses:
+                    length += _distance(pose, p)
+                    seconds += self.travel_time(pose, p)
+                    pose = p
+                seconds += self.settle
+            elif step.kind == HOME:
+                length += _distance(pose, HOME_POSE)
+                seconds += self.home_time
+                pose = HOME_POSE
+            else:
+                seconds += step.dwell
+        return length, seconds
+
+
+def path_length(steps, start=None):
+    """Tool travel (m) of a step list, starting at `start` (None = home)."""
+    pose = HOME_POSE if start is None else start
+    length = 0.0
+    for step in steps:
+        poses = [HOME_POSE] if step.kind == HOME else step.poses
+        for p in poses:
+            length += _distance(pose, p)
+            pose = p
+    return length
+
+
+def legacy_pick_steps(pick_pose, safe_z, approach_dz, grasp_dwell=1.0):
+    """home → above pick → pick → grasp → SAFE_Z (RobotActions.pick)."""
+    above = list(pick_pose)
+    above[2] += approach_dz
+    return [
+        Step(HOME, [], 0.0),
+        Step(MOVE, [above], 0.0),
+        Step(MOVE, [list(pick_pose)], 0.0),
+        Step(GRASP, [], grasp_dwell),
+        Step(MOVE, [at_height(pick_pose, safe_z)], 0.0),
+    ]
+
+
+def legacy_place_steps(drop_pose, safe_z, release_dwell=0.4):
+    """SAFE_Z over column → drop → release → SAFE_Z → home (RobotActions.place)."""
+    return [
+        Step(MOVE, [at_height(drop_pose, safe_z)], 0.0),
+        Step(MOVE, [list(drop_pose)], 0.0),
+        Step(RELEASE, [], release_dwell),
+        Step(MOVE, [at_height(drop_pose, safe_z)], 0.0),
+        Step(HOME, [], 0.0),
+    ]
+
+
+def legacy_steps(pick_pose, drop_pose, safe_z, approach_dz, grasp_dwell=1.0, release_dwell=0.4):
+    """The sequence RobotActions.pick + place has always executed."""
+    return (legacy_pick_steps(pick_pose, safe_z, approach_dz, grasp_dwell)
+            + legacy_place_steps(drop_pose, safe_z, release_dwell))
+
+
+def _pick_steps(pick_pose, safe_z, approach_dz, start):
+    """
+    Blended leg down to `approach_dz` above the coin, then the final approach
+    as its own move (approach_dz None = straight down from SAFE_Z in one leg).
+    """
+    if approach_dz is None:
+        return [Step(MOVE, simplify([at_height(pick_pose, safe_z), list(pick_pose)], start), 0.0)]
+    above = list(pick_pose)
+    above[2] += approach_dz
+    return [Step(MOVE, simplify([at_height(pick_pose, safe_z), above], start), 0.0),
+            Step(MOVE, [list(pick_pose)], 0.0)]
+
+
+def plan_pick_place(pick_pose, drop_pose, safe_z, start=None, park=None,
+                    grasp_dwell=1.0, release_dwell=0.4, approach_dz=None):
+    """
+    Minimal waypoint path from `start` (None = home) through pick and drop.
+
+    Vertical approaches go straight down from SAFE_Z, and each leg between
+    gripper actions is a single blended trajectory, except that the last
+    `approach_dz` onto the coin is a slow separate move.
+    """
+    park = park_pose(safe_z) if park is None else park
+    to_drop = simplify([at_height(pick_pose, safe_z), at_height(drop_pose, safe_z), list(drop_pose)])
+    to_park = simplify([at_height(drop_pose, safe_z), park])
+    return _pick_steps(pick_pose, safe_z, approach_dz, start) + [
+        Step(GRASP, [], grasp_dwell),
+        Step(MOVE, to_drop, 0.0),
+        Step(RELEASE, [], release_dwell),
+        Step(MOVE, to_park, 0.0),
+    ]
+
+
+def plan_prestage(pick_pose, safe_z, start=None, hover=None, grasp_dwell=1.0,
+                  approach_dz=None):
+    """Pick the coin and wait with it at the hover pose."""
+    hover = hover_pose(safe_z) if hover is None else hover
+    return _pick_steps(pick_pose, safe_z, approach_dz, start) + [
+        Step(GRASP, [], grasp_dwell),
+        Step(MOVE, simplify([at_height(pick_pose, safe_z), hover]), 0.0),
+    ]
+
+
+def plan_drop(drop_pose, safe_z, start=None, park=None, release_dwell=0.4):
+    """
+    Drop a held coin at `drop_pose` and park. Also used to put a staged coin
+    back on its stack (drop_pose = its pick pose).
+    """
+    park = park_pose(safe_z) if park is None else park
+    return [
+        Step(MOVE, simplify([at_height(drop_pose, safe_z), list(drop_pose)], start), 0.0),
+        Step(RELEASE, [], release_dwell),
+        Step(MOVE, simplify([at_height(drop_pose, safe_z), park]), 0.0),
+    ]
+
+
+def compare(pick_pose, drop_pose, safe_z, approach_dz, model=None, start=None):
+    """Planned vs legacy path length and cycle time for one move."""
+    model = model or MotionModel()
+    legacy = legacy_steps(pick_pose, drop_pose, safe_z, approach_dz)
+    legacy_len, legacy_t = model.estimate(legacy)
+    plan = plan_pick_place(pick_pose, drop_pose, safe_z, start=start, approach_dz=approach_dz)
+    plan_len, plan_t = model.estimate(plan, start=start)
+    return {
+        "length_m": plan_len,
+        "time_s": plan_t,
+        "legacy_length_m": legacy_len,
+        "legacy_time_s": legacy_t,
+        "moves": sum(1 for s in plan if s.kind in (MOVE, HOME)),
+        "legacy_moves": sum(1 for s in legacy if s.kind in (MOVE, HOME)),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Planned vs original pick-and-place paths.")
+    parser.add_argument("--safe-z", type=float, default=0.35)
+    parser.add_argument("--approach-dz", type=float, default=0.06)
+    args = parser.parse_args()
+
+    model = MotionModel()
+    park = park_pose(args.safe_z)
+    print(f"{'stack':>5} {'col':>4} {'legacy m':>9} {'legacy s':>9} {'planned m':>10} {'planned s':>10}")
+    totals = [0.0, 0.0, 0.0, 0.0]
+    n = 0
+    for stack_id, stack in enumerate(PICK_POSES):
+        for col, drop in enumerate(DROP_POSES):
+            r = compare(stack[0], drop, args.safe_z, args.approach_dz, model, start=park)
+            print(f"{stack_id:>5} {col + 1:>4} {r['legacy_length_m']:>9.3f} {r['legacy_time_s']:>9.2f} "
+                  f"{r['length_m']:>10.3f} {r['time_s']:>10.2f}")
+            for i, k in enumerate(("legacy_length_m", "legacy_time_s", "length_m", "time_s")):
+                totals[i] += r[k]
+            n += 1
+    print(f"{'mean':>10} {totals[0] / n:>9.3f} {totals[1] / n:>9.2f} "
+          f"{totals[2] / n:>10.3f} {totals[3] / n:>10.2f}")
@@ -0,0 +1,320 @@
+# spectator.py
+"""
+Local spectator server: the game as JSON and the camera view as MJPEG.
+
+    http://<robot-pc>:8080/             page with the video and the board
+    http://<robot-pc>:8080/state        current state (JSON)
+    ws://<robot-pc>:8080/events         current state, then every event as it happens
+    http://<robot-pc>:8080/stream.mjpg  MJPEG video of the annotated board
+
+Frames are JPEG-encoded once, on the server's own encoder thread, and the
+same bytes go to every viewer. A viewer always gets the newest frame, never
+a backlog. A viewer that cannot take a frame or event within SEND_TIMEOUT,
+or lets MAX_PENDING events pile up, is disconnected. Publishing never blocks
+the game, and no frame is encoded while nobody watches the video.
+
+Only the Python standard library and OpenCV are used (WebSocket: RFC 6455,
+server-to-client text frames only).
+"""
+
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+DEFAULT_PORT = 8080
+SEND_TIMEOUT = 2.0       # s a viewer may block one send before it is dropped
+MAX_PENDING = 64         # events queued for one WebSocket viewer before it is dropped
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_BOUNDARY = "frame"
+
+PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width">
+<title>Connect 4</title>
+<style>
+body { font-family: sans-serif; background: #111; color: #eee; text-align: center; }
+img { max-width: 100%; }
+table { margin: 12px auto; border-collapse: collapse; background: #1d4fa0; }
+td { width: 36px; height: 36px; border-radius: 50%; border: 4px solid #1d4fa0; background: #ddd; }
+td.p1 { background: #d22; } td.p2 { background: #ec2; }
+</style></head>
+<body>
+<h2 id="status">Connect 4</h2>
+<img src="/stream.mjpg" alt="live view">
+<table id="board"></table>
+<div id="eval"></div>
+<script>
+function draw(board) {
+  const t = document.getElementById("board");
+  t.innerHTML = board.map(row => "<tr>" + row.map(v => `<td class="p${v}"></td>`).join("") + "</tr>").join("");
+}
+function connect() {
+  const ws = new WebSocket(`ws://${location.host}/events`);
+  ws.onmessage = (m) => {
+    const e = JSON.parse(m.data);
+    if (e.board) draw(e.board);
+    if (e.text) document.getElementById("status").textContent = e.text;
+    if (e.type === "evaluation") {
+      document.getElementById("eval").textContent =
+        `Robot plays column ${e.column + 1} (score ${e.score}, ${e.time_s.toFixed(2)} s)`;
+    }
+  };
+  ws.onclose = () => setTimeout(connect, 2000);
+}
+connect();
+</script>
+</body></html>
+"""
+
+
+def _ws_frame(text):
+    """One unmasked, final WebSocket text frame."""
+    payload = text.encode("utf-8")
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x81, n)
+    elif n < 1 << 16:
+        header = struct.pack("!BBH", 0x81, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x81, 127, n)
+    return header + payload
+
+
+class _Viewer:
+    """One WebSocket connection: events waiting to be sent."""
+
+    def __init__(self):
+        self.pending = deque()
+        self.cond = threading.Condition()
+        self.dropped = False
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "Connect4Spectator/1.0"
+    # WebSocket upgrades need an HTTP/1.1 status line; every other response
+    # carries Content-Length so connections can be kept alive
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        spectator = self.server.spectator
+        path = self.path.split("?", 1)[0]
+        if path == "/":
+            self._send(200, "text/html; charset=utf-8", PAGE.encode("utf-8"))
+        elif path == "/state":
+            self._send(200, "application/json", json.dumps(spectator.state).encode("utf-8"))
+        elif path == "/events":
+            if self.headers.get("Upgrade", "").lower() != "websocket":
+                self._send(400, "text/plain", b"WebSocket upgrade expected")
+                return
+            self._events(spectator)
+        elif path == "/stream.mjpg":
+            self._stream(spectator)
+        else:
+            self._send(404, "text/plain", b"not found")
+
+    def _send(self, code, content_type, body):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _events(self, spectator):
+        key = self.headers.get("Sec-WebSocket-Key", "")
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+        self.send_response(101, "Switching Protocols")
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept)
+        self.end_headers()
+        self.wfile.flush()
+        self.close_connection = True
+
+        viewer = spectator._add_viewer()
+        self.connection.settimeout(SEND_TIMEOUT)
+        try:
+            self.wfile.write(_ws_frame(json.dumps(dict(spectator.state, type="state"))))
+            while spectator.running:
+                with viewer.cond:
+                    while not viewer.pending and not viewer.dropped and spectator.running:
+                        viewer.cond.wait(1.0)
+                    if viewer.dropped:
+                        break
+                    messages = list(viewer.pending)
+                    viewer.pending.clear()
+                for message in messages:
+                    self.wfile.write(_ws_frame(message))
+                self.wfile.flush()
+        except (OSError, socket.timeout):
+            pass
+        finally:
+            spectator._remove_viewer(viewer)
+
+    def _stream(self, spectator):
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={_BOUNDARY}")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        self.connection.settimeout(SEND_TIMEOUT)
+        spectator._video_clients(+1)
+        seq = -1
+        try:
+            while spectator.running:
+                jpeg, seq = spectator._next_jpeg(seq)
+                if jpeg is None:
+                    continue
+                self.wfile.write(f"--{_BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                 f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                self.wfile.write(jpeg)
+                self.wfile.write(b"\r\n")
+                self.wfile.flush()
+        except socket.timeout:
+            spectator.dropped_clients += 1
+        except OSError:
+            pass
+        finally:
+            spectator._video_clients(-1)
+
+
+class SpectatorServer:
+    def __init__(self, host="0.0.0.0", port=DEFAULT_PORT, fps=10.0, quality=70):
+        """
+        fps:     most frames per second encoded for the video stream
+        quality: JPEG quality (0-100)
+        """
+        self.host = host
+        self.port = port
+        self.fps = fps
+        self.quality = quality
+        self.state = {}
+        self.running = False
+        self.encoded_frames = 0
+        self.dropped_clients = 0
+
+        self._httpd = None
+        self._viewers = []
+        self._lock = threading.Lock()
+        self._clients = 0
+        # Newest raw frame waiting for the encoder, newest JPEG and its number
+        self._frame_cond = threading.Condition()
+        self._raw = None
+        self._jpeg = None
+        self._seq = 0
+        self._last_publish = 0.0
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.spectator = self
+        self.running = True
+        threading.Thread(target=self._httpd.serve_forever, name="spectator-http",
+                         daemon=True).start()
+        threading.Thread(target=self._encode_loop, name="spectator-jpeg", daemon=True).start()
+        print(f"📺 Spectator view on http://{socket.gethostname()}:{self.port}/")
+        return self
+
+    def stop(self):
+        self.running = False
+        with self._frame_cond:
+            self._frame_cond.notify_all()
+        with self._lock:
+            viewers = list(self._viewers)
+        for viewer in viewers:
+            with viewer.cond:
+                viewer.cond.notify_all()
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    # ---------- game → viewers ----------
+    def publish(self, kind, **data):
+        """
+        Send an event to every WebSocket viewer. A "state" event also becomes
+        the snapshot served at /state and sent first to new viewers.
+        """
+        event = dict(data, type=kind, t=time.time())
+        if kind == "state":
+            self.state = event
+        message = json.dumps(event)
+        with self._lock:
+            viewers = list(self._viewers)
+        for viewer in viewers:
+            with viewer.cond:
+                if len(viewer.pending) >= MAX_PENDING:
+                    # Not reading: drop the viewer instead of buffering for it
+                    viewer.dropped = True
+                    viewer.pending.clear()
+                    self.dropped_clients += 1
+                else:
+                    viewer.pending.append(message)
+                viewer.cond.notify_all()
+
+    def publish_frame(self, frame):
+        """Offer a BGR frame for the video stream (copied, encoded later; cheap if nobody watches)."""
+        if not self._clients:
+            return
+        now = time.perf_counter()
+        if now - self._last_publish < 1.0 / self.fps:
+            return
+        self._last_publish = now
+        with self._frame_cond:
+            self._raw = frame.copy()
+            self._frame_cond.notify_all()
+
+    # ---------- internals ----------
+    def _encode_loop(self):
+        params = [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)]
+        while self.running:
+            with self._frame_cond:
+                while self._raw is None and self.running:
+                    self._frame_cond.wait(1.0)
+                frame, self._raw = self._raw, None
+            if frame is None:
+                continue
+            ok, buf = cv2.imencode(".jpg", frame, params)
+            if not ok:
+                continue
+            with self._frame_cond:
+                self._jpeg = buf.tobytes()
+                self._seq += 1
+                self.encoded_frames += 1
+                self._frame_cond.notify_all()
+
+    def _next_jpeg(self, seq):
+        """Newest JPEG newer than `seq` (waits up to 1 s): (bytes or None, its seq)."""
+        with self._frame_cond:
+            if self._seq == seq or self._jpeg is None:
+                self._frame_cond.wait(1.0)
+            if self._seq == seq or self._jpeg is None:
+                return None, seq
+            return self._jpeg, self._seq
+
+    def _video_clients(self, delta):
+        with self._lock:
+            self._clients += delta
+
+    def _add_viewer(self):
+        viewer = _Viewer()
+        with self._lock:
+            self._viewers.append(viewer)
+        return viewer
+
+    def _remove_viewer(self, viewer):
+        with self._lock:
+            if viewer in self._viewers:
+                self._viewers.remove(viewer)
@@ -0,0 +1,211 @@
+# supervisor.py
+"""
+Run several robot stations from one host, one process per board.
+
+Each station gets its own camera, board files, robot address and game.
+Stations run as separate processes pinned to their own cores so one slow
+AI search or robot move never stalls another board. Status reports from
+all stations are collected here and printed as one health table.
+
+Usage:
+    python supervisor.py stations.json
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import signal
+import sys
+import time
+
+# Example config:
+# {
+#   "stations": [
+#     {"name": "A", "camera_id": 0, "grid_file": "a_board_grid.npy",
+#      "homography_file": "a_board_homography.npz", "robot_ip": "172.20.10.2",
+#      "cpus": [2], "restart": true,
+#      "settings": {"player_name": "Guest", "player_color": "Yellow",
+#                   "difficulty": "Medium", "who_starts": "Human"}}
+#   ]
+# }
+
+DEFAULT_SETTINGS = {
+    "player_name": "Human",
+    "player_color": "Yellow",
+    "difficulty": "Medium",
+    "who_starts": "Human",
+}
+
+HEARTBEAT_TIMEOUT = 10.0   # seconds without a status report → "stalled"
+REPORT_INTERVAL = 5.0      # seconds between health tables
+
+
+def load_config(path):
+    with open(path) as f:
+        config = json.load(f)
+    stations = config.get("stations", [])
+    names = [s.get("name") for s in stations]
+    if len(set(names)) != len(names) or None in names:
+        raise ValueError("Every station needs a unique 'name'.")
+    return stations
+
+
+def _pin_to_cores(cpus):
+    """Restrict this process (and OpenCV's worker threads) to the given cores."""
+    if not cpus:
+        return
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, set(cpus))
+        except OSError as e:
+            print(f"⚠️ Could not pin to cores {cpus}: {e}")
+    else:
+        print("⚠️ CPU pinning not supported on this OS.")
+
+
+def run_station(station, status_queue):
+    """Process entry point for one station."""
+    # Exit normally on terminate(), so multiprocessing also stops this
+    # station's own children (the shared-capture process)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    _pin_to_cores(station.get("cpus"))
+
+    import cv2
+    # One core per station: keep OpenCV from spawning threads on other cores
+    cv2.setNumThreads(max(1, len(station.get("cpus") or [1])))
+
+    from main import main
+
+    name = station["name"]
+
+    def report(stats):
+        stats["station"] = name
+        stats["time"] = time.time()
+        try:
+            status_queue.put_nowait(stats)
+        except queue.Full:
+            pass
+
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update(station.get("settings", {}))
+
+    main(camera_id=station.get("camera_id", 1),
+         grid_file=station.get("grid_file", f"{name}_board_grid.npy"),
+         homography_file=station.get("homography_file", f"{name}_board_homography.npz"),
+         robot_ip=station.get("robot_ip"),
+         settings=settings,
+         window_name=f"Connect 4 - {name}",
+         status_callback=report,
+         shared_capture=station.get("shared_capture", False),
+         metrics_prefix=f"metrics_{name}",
+         simulate_robot=station.get("simulate_robot", False),
+         inventory_file=station.get("inventory_file", f"{name}_coin_inventory.json"),
+         dwell_file=station.get("dwell_file", f"{name}_gripper_dwell.json"),
+         spectator_port=station.get("spectator_port"),
+         record_file=station.get("record_file", f"{name}_games.c4rec"))
+
+
+class Supervisor:
+    def __init__(self, stations):
+        self.stations = {s["name"]: s for s in stations}
+        self.status_queue = mp.Queue(maxsize=1000)
+        self.processes = {}
+        self.restarts = {name: 0 for name in self.stations}
+        self.latest = {}
+
+    def start_station(self, name):
+        # Not daemonic: a station with shared_capture starts its own capture
+        # process, which daemonic processes may not do. stop() ends them.
+        proc = mp.Process(target=run_station, name=f"station-{name}",
+                          args=(self.stations[name], self.status_queue))
+        proc.start()
+        self.processes[name] = proc
+        print(f"▶️ Station {name} started (pid {proc.pid})")
+
+    def start(self):
+        for name in self.stations:
+            self.start_station(name)
+
+    def _drain(self):
+        while True:
+            try:
+                stats = self.status_queue.get_nowait()
+            except queue.Empty:
+                return
+            self.latest[stats["station"]] = stats
+
+    def health(self):
+        """Per-station state plus totals across the host."""
+        now = time.time()
+        rows = []
+        total_fps = 0.0
+        total_moves = 0
+        for name, proc in self.processes.items():
+            stats = self.latest.get(name, {})
+            if not proc.is_alive():
+                state = f"exited ({proc.exitcode})"
+            elif not stats:
+                state = "starting"
+            elif now - stats["time"] > HEARTBEAT_TIMEOUT:
+                state = "stalled"
+            else:
+                state = "game over" if stats.get("game_over") else "running"
+            fps = stats.get("fps", 0.0) if state in ("running", "game over") else 0.0
+            total_fps += fps
+            total_moves += stats.get("moves", 0)
+            rows.append({"station": name, "state": state, "fps": fps,
+                         "frames": stats.get("frames", 0), "moves": stats.get("moves", 0),
+                         "restarts": self.restarts[name]})
+        return rows, {"fps": total_fps, "moves": total_moves}
+
+    def print_health(self):
+        rows, totals = self.health()
+        print(f"{'station':>10} {'state':>14} {'fps':>7} {'frames':>8} {'moves':>6} {'restarts':>8}")
+        for r in rows:
+            print(f"{r['station']:>10} {r['state']:>14} {r['fps']:>7.1f} {r['frames']:>8} "
+                  f"{r['moves']:>6} {r['restarts']:>8}")
+        print(f"{'total':>10} {'':>14} {totals['fps']:>7.1f} {'':>8} {totals['moves']:>6}")
+
+    def run(self):
+        self.start()
+        last_report = time.time()
+        try:
+            while True:
+                time.sleep(0.5)
+                self._drain()
+                for name, proc in list(self.processes.items()):
+                    if not proc.is_alive() and proc.exitcode != 0 and self.stations[name].get("restart"):
+                        self.restarts[name] += 1
+                        print(f"🔁 Station {name} exited with {proc.exitcode}, restarting.")
+                        self.start_station(name)
+                if not any(p.is_alive() for p in self.processes.values()):
+                    break
+                if time.time() - last_report >= REPORT_INTERVAL:
+                    self.print_health()
+                    last_report = time.time()
+        except KeyboardInterrupt:
+            print("🛑 Stopping stations...")
+        finally:
+            self.stop()
+
+    def stop(self):
+        for proc in self.processes.values():
+            if proc.is_alive():
+                proc.terminate()
+        for proc in self.processes.values():
+            proc.join(timeout=5.0)
+            if proc.is_alive():
+                print(f"⚠️ {proc.name} did not stop, killing it.")
+                proc.kill()
+                proc.join()
+        self._drain()
+        self.print_health()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run several Connect 4 robot stations.")
+    parser.add_argument("config", help="JSON file with a 'stations' list")
+    args = parser.parse_args()
+    Supervisor(load_config(args.config)).run()
@@ -0,0 +1,8 @@
+# tests/conftest.py
+
+import os
+import sys
+
+# Modules import each other as top-level packages (vision, game_logic, ...),
+# the way main.py is run from this directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,32 @@
+# tests/test_game_record.py
+
+from game_logic.game_record import GameRecorder, GameRecordReader, replay
+
+
+def test_retracted_robot_move_is_not_replayed(tmp_path):
+    path = str(tmp_path / "games.c4rec")
+    recorder = GameRecorder(path)
+    recorder.begin_game(6, 7, 1, 2, 1, 4)
+    recorder.move(3, 5, 1)
+    recorder.move(4, 5, 2, robot=True)    # the arm then fails to play it
+    recorder.retract()
+    recorder.end_game(0)
+    # A later game, with a move taken back mid-game and play continuing
+    recorder.begin_game(6, 7, 1, 2, 1, 4)
+    recorder.move(0, 5, 1)
+    recorder.move(1, 5, 2, robot=True)
+    recorder.retract()
+    recorder.move(2, 5, 2, robot=True)
+    recorder.move(2, 4, 1)
+    recorder.end_game(0)
+    recorder.close()
+
+    reader = GameRecordReader(path)
+    first, second = reader.games
+    assert list(first.moves["col"]) == [3]
+    assert [int(game.board[5, 4]) for _, game in replay(first)] == [0]
+    assert list(second.moves["col"]) == [0, 2, 2]
+    assert list(second.moves["ply"]) == [0, 1, 2]
+    assert len(list(replay(second))) == 3
+    assert reader.move_count == 4
+    assert reader.move(3)[1]["row"] == 4
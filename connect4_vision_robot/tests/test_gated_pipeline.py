@@ -0,0 +1,104 @@
+# tests/test_gated_pipeline.py
+
+import numpy as np
+import pytest
+
+from vision.board_localizer import BoardLocalizer
+from vision.board_view import BoardView
+from vision.motion_gate import MotionGate
+from vision.synthetic_board import RenderConfig, SyntheticBoardRenderer, random_game, score_sequence
+
+PROCESS_CELL = (14, 12)   # main.py's processing cell size
+
+
+def _game(seed, moves=20):
+    # No glare: classification itself is exact, so any missed move is the gate's
+    renderer = SyntheticBoardRenderer(RenderConfig(seed=seed, glare=0.0))
+    moves = random_game(moves, np.random.default_rng(seed))
+    samples = list(renderer.render_game(moves))
+    localizer = BoardLocalizer.from_homography(renderer.homography(), samples[0][0])
+    return localizer, moves, samples
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+@pytest.mark.parametrize("cell_size", [PROCESS_CELL, None])
+def test_gated_pipeline_detects_every_move(seed, cell_size):
+    localizer, moves, samples = _game(seed)
+    view = BoardView(localizer=localizer, cell_size=cell_size)
+    gate = MotionGate()
+    result = score_sequence(samples, view, moves, gate=gate)
+
+    assert result["matched"] == len(moves)
+    assert result["extra"] == 0
+    # Classified only once each drop has settled, never mid-motion
+    assert result["board_accuracy"] == 1.0
+    assert gate.stats()["skip_ratio"] > 0.5
+
+
+def test_gate_waits_for_slow_change_to_settle():
+    gate = MotionGate(settle_frames=3)
+    board = np.full((72, 98, 3), 120, dtype=np.uint8)
+    assert gate.update(board)             # first frame is always classified
+
+    # A cell darkening a little each frame never trips the motion threshold
+    # but differs from the reference after three frames: it is classified
+    # only once it has held still for settle_frames, not when first noticed
+    frame = board.copy()
+    changing = []
+    for step in range(1, 4):
+        frame[:12, :14] = 120 - 12 * step
+        changing.append(gate.update(frame))
+    held = [gate.update(frame) for _ in range(4)]
+    assert changing == [False, False, False]
+    assert held == [False, True, False, False]
+
+
+def test_persistent_misread_is_escaped_through_the_gate():
+    # Same glue as main.py's detect and reconcile stages, with a fake clock
+    from game_logic.reconcile import Anomaly, BoardReconciler, HumanMove
+    from vision.color_detection import detect_colors
+    from vision.frame_context import FrameContext
+    from vision.map_discs_to_grid import map_discs_to_grid
+
+    renderer = SyntheticBoardRenderer(RenderConfig(seed=0, glare=0.0, noise=0.0))
+    board = np.zeros((6, 7), dtype=int)
+    board[5, 4] = 2
+    localizer = BoardLocalizer.from_homography(renderer.homography(), renderer.render(board))
+    view = BoardView(localizer=localizer, cell_size=PROCESS_CELL)
+    ctx = FrameContext((view.size[1], view.size[0]))
+    gate = MotionGate()
+    # Confirmed board says red at (5, 0); the camera never shows it (e.g. glare)
+    reconciler = BoardReconciler(human_color=1, robot_color=2, first_color=1, stuck_after=2.0)
+    confirmed = board.copy()
+    confirmed[5, 0] = 1
+    reconciler.reset(confirmed)
+
+    events = []
+
+    def run(frame, t):
+        crop = view.crop(frame)
+        if not gate.update(crop, now=t):
+            return
+        mask_yellow, mask_red, _ = detect_colors(crop, None, ctx, min_area=view.min_area)
+        observed = map_discs_to_grid(mask_red, mask_yellow, out=ctx.board, min_area=view.min_area)
+        found = reconciler.reconcile(observed.copy(), now=t)
+        gate.recheck_after = (reconciler.stuck_after
+                              if found and isinstance(found[0], Anomaly) else None)
+        events.extend(found)
+
+    observed = confirmed.copy()
+    observed[5, 0] = 0
+    frame = renderer.render(observed)
+    t = 0.0
+    for _ in range(150):           # 5 s of a board that never changes
+        run(frame, t)
+        t += 1 / 30
+    assert (5, 0) in reconciler.ignored
+
+    # The human's next move is read despite the missing discs
+    observed[5, 3] = 1
+    frame = renderer.render(observed)
+    for _ in range(30):
+        run(frame, t)
+        t += 1 / 30
+    assert events[-1] == HumanMove(5, 3, 1)
@@ -0,0 +1,271 @@
+# vision/board_localizer.py
+
+import os
+import cv2
+import numpy as np
+
+HOMOGRAPHY_FILE = "board_homography.npz"
+
+# Blue board plastic in HSV
+LOWER_BOARD = (90, 80, 40)
+UPPER_BOARD = (130, 255, 255)
+
+
+def _board_mask(bgr):
+    hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
+    return cv2.inRange(hsv, LOWER_BOARD, UPPER_BOARD)
+
+
+def find_hole_lattice(frame, rows=6, cols=7):
+    """
+    Find the centres of the board's holes in a raw camera frame.
+    Returns a (rows*cols, 2) float32 array of (x, y) centres, or None.
+
+    The board is the largest blue blob; holes are the round non-blue
+    components inside its outline (they show the background or a disc).
+    """
+    blue = _board_mask(frame)
+    blue = cv2.morphologyEx(blue, cv2.MORPH_CLOSE, np.ones((5, 5), np.uint8))
+
+    contours, _ = cv2.findContours(blue, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+    board = max(contours, key=cv2.contourArea)
+    board_area = cv2.contourArea(board)
+    if board_area < 1000:
+        return None
+
+    # Everything inside the board outline that is not blue is a hole candidate
+    outline = np.zeros_like(blue)
+    cv2.drawContours(outline, [board], -1, 255, thickness=cv2.FILLED)
+    holes = cv2.bitwise_and(outline, cv2.bitwise_not(blue))
+    holes = cv2.morphologyEx(holes, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+
+    n, _, stats, centroids = cv2.connectedComponentsWithStats(holes)
+    expected = board_area / (rows * cols)
+    candidates = []
+    for i in range(1, n):
+        area = stats[i, cv2.CC_STAT_AREA]
+        bw = stats[i, cv2.CC_STAT_WIDTH]
+        bh = stats[i, cv2.CC_STAT_HEIGHT]
+        if not (0.15 * expected <= area <= 1.2 * expected):
+            continue
+        if not (0.5 <= bw / float(bh) <= 2.0):
+            continue
+        candidates.append((area, centroids[i]))
+
+    if len(candidates) < rows * cols:
+        return None
+
+    # Too many blobs → keep the ones whose size is most hole-like
+    median_area = np.median([a for a, _ in candidates])
+    candidates.sort(key=lambda item: abs(item[0] - median_area))
+    centres = np.array([c for _, c in candidates[:rows * cols]], dtype=np.float32)
+    return centres
+
+
+def _rectified_centres(rows, cols, cell_w, cell_h):
+    """Hole centres in the rectified board image, row-major (top row first)."""
+    cs, rs = np.meshgrid(np.arange(cols), np.arange(rows))
+    return np.stack([(cs.ravel() + 0.5) * cell_w,
+                     (rs.ravel() + 0.5) * cell_h], axis=1).astype(np.float32)
+
+
+def compute_board_homography(centres, rows=6, cols=7, cell_w=40, cell_h=40):
+    """
+    Fit the image → rectified-board homography from detected hole centres.
+    Returns the 3x3 matrix, or None when the lattice is inconsistent.
+    """
+    s = centres.sum(axis=1)
+    d = centres[:, 0] - centres[:, 1]
+    corners_img = np.array([centres[np.argmin(s)],    # top-left
+                            centres[np.argmax(d)],    # top-right
+                            centres[np.argmax(s)],    # bottom-right
+                            centres[np.argmin(d)]],   # bottom-left
+                           dtype=np.float32)
+    corners_rect = np.array([[0.5 * cell_w, 0.5 * cell_h],
+                             [(cols - 0.5) * cell_w, 0.5 * cell_h],
+                             [(cols - 0.5) * cell_w, (rows - 0.5) * cell_h],
+                             [0.5 * cell_w, (rows - 0.5) * cell_h]],
+                            dtype=np.float32)
+    H0 = cv2.getPerspectiveTransform(corners_img, corners_rect)
+
+    # Snap every hole onto the lattice, then refine with all correspondences
+    mapped = cv2.perspectiveTransform(centres.reshape(-1, 1, 2), H0).reshape(-1, 2)
+    c_idx = np.round(mapped[:, 0] / cell_w - 0.5).astype(int)
+    r_idx = np.round(mapped[:, 1] / cell_h - 0.5).astype(int)
+    valid = (r_idx >= 0) & (r_idx < rows) & (c_idx >= 0) & (c_idx < cols)
+    cell_ids = r_idx[valid] * cols + c_idx[valid]
+    if len(np.unique(cell_ids)) != rows * cols:
+        return None
+
+    targets = _rectified_centres(rows, cols, cell_w, cell_h)[cell_ids]
+    H, _ = cv2.findHomography(centres[valid], targets, cv2.RANSAC, 3.0)
+    return H
+
+
+class BoardLocalizer:
+    """
+    Holds the cached image → board homography and produces the rectified
+    board view with a single warpPerspective into a fixed-size buffer.
+
+    Every `check_interval` frames the blue board mask of the rectified view
+    is compared with the one recorded at detection time. If the overlap
+    stays low for `drift_checks` checks in a row (camera or board moved,
+    not just a passing hand), the hole lattice is detected again.
+    """
+
+    def __init__(self, homography, rows=6, cols=7, cell_w=40, cell_h=40,
+                 check_interval=15, drift_thresh=0.85, drift_checks=3):
+        self.H = np.asarray(homography, dtype=np.float64)
+        self.rows = rows
+        self.cols = cols
+        self.cell_w = cell_w
+        self.cell_h = cell_h
+        self.size = (cols * cell_w, rows * cell_h)  # (w, h)
+
+        self.check_interval = check_interval
+        self.drift_thresh = drift_thresh
+        self.drift_checks = drift_checks
+
+        self.redetections = 0
+        # File a re-detected homography is saved to (set by load / save), and
+        # the cell size it is stored at there when this is a rescaled copy
+        self.path = None
+        self._saved_cell = (cell_w, cell_h)
+        self._buffer = np.zeros((self.size[1], self.size[0], 3), dtype=np.uint8)
+        self._reference = None
+        self._frame_count = 0
+        self._drift_streak = 0
+
+    # ---------- construction / persistence ----------
+    @classmethod
+    def detect(cls, frame, rows=6, cols=7, cell_w=40, cell_h=40, **kwargs):
+        """Auto-detect the board in `frame`. Returns a BoardLocalizer or None."""
+        centres = find_hole_lattice(frame, rows, cols)
+        if centres is None:
+            return None
+        H = compute_board_homography(centres, rows, cols, cell_w, cell_h)
+        if H is None:
+            return None
+        return cls.from_homography(H, frame, rows, cols, cell_w, cell_h, **kwargs)
+
+    @classmethod
+    def from_homography(cls, H, frame, rows=6, cols=7, cell_w=40, cell_h=40, **kwargs):
+        """Wrap a known homography; `frame` provides the drift-check reference."""
+        localizer = cls(H, rows, cols, cell_w, cell_h, **kwargs)
+        localizer._set_reference(localizer.warp(frame, check_drift=False))
+        return localizer
+
+    @classmethod
+    def load(cls, path=HOMOGRAPHY_FILE, **kwargs):
+        """Load a cached homography. Returns None if the file does not exist."""
+        if not os.path.exists(path):
+            return None
+        data = np.load(path)
+        rows, cols, cell_w, cell_h = (int(v) for v in data["layout"])
+        localizer = cls(data["H"], rows, cols, cell_w, cell_h, **kwargs)
+        localizer._reference = data["reference"]
+        localizer.path = path
+        return localizer
+
+    def rescaled(self, cell_w, cell_h):
+        """Same board lattice, warped into cells of cell_w x cell_h pixels."""
+        S = np.diag([cell_w / float(self.cell_w), cell_h / float(self.cell_h), 1.0])
+        localizer = BoardLocalizer(S @ self.H, self.rows, self.cols, cell_w, cell_h,
+                                   check_interval=self.check_interval,
+                                   drift_thresh=self.drift_thresh,
+                                   drift_checks=self.drift_checks)
+        localizer._reference = self._reference
+        localizer.path = self.path
+        localizer._saved_cell = self._saved_cell
+        return localizer
+
+    def save(self, path=HOMOGRAPHY_FILE):
+        np.savez(path, H=self.H,
+                 layout=np.array([self.rows, self.cols, self.cell_w, self.cell_h]),
+                 reference=self._reference)
+        self.path = path
+        print(f"✅ Board homography saved as {path}")
+
+    # ---------- per-frame ----------
+    def warp(self, frame, check_drift=True):
+        """
+        Return the rectified board view (rows*cell_h x cols*cell_w).
+        The returned array is an internal buffer reused on the next call.
+        """
+        cv2.warpPerspective(frame, self.H, self.size, dst=self._buffer,
+                            flags=cv2.INTER_LINEAR)
+        if check_drift:
+            self._frame_count += 1
+            if self._frame_count % self.check_interval == 0 and self._drifted():
+                self._redetect(frame)
+        return self._buffer
+
+    def _board_signature(self, rectified):
+        small = cv2.resize(rectified, (self.cols * 8, self.rows * 8),
+                           interpolation=cv2.INTER_AREA)
+        return _board_mask(small) > 0
+
+    def _set_reference(self, rectified):
+        self._reference = self._board_signature(rectified)
+
+    def _drifted(self):
+        if self._reference is None or not self._reference.any():
+            self._set_reference(self._buffer)
+            return False
+        current = self._board_signature(self._buffer)
+        overlap = np.count_nonzero(current & self._reference) / np.count_nonzero(self._reference)
+        if overlap < self.drift_thresh:
+            self._drift_streak += 1
+        else:
+            self._drift_streak = 0
+        return self._drift_streak >= self.drift_checks
+
+    def _redetect(self, frame):
+        centres = find_hole_lattice(frame, self.rows, self.cols)
+        H = None
+        if centres is not None:
+            H = compute_board_homography(centres, self.rows, self.cols,
+                                         self.cell_w, self.cell_h)
+        if H is None:
+            # Board not visible right now (occluded?) – try again next check
+            return False
+        self.H = H
+        self.redetections += 1
+        self._drift_streak = 0
+        cv2.warpPerspective(frame, self.H, self.size, dst=self._buffer,
+                            flags=cv2.INTER_LINEAR)
+        self._set_reference(self._buffer)
+        print("🔁 Board moved – homography re-detected.")
+        if self.path is not None:
+            # Next start-up must not warp with the old homography
+            if self._saved_cell != (self.cell_w, self.cell_h):
+                self.rescaled(*self._saved_cell).save(self.path)
+            else:
+                self.save(self.path)
+        return True
+
+
+def detect_board_homography(camera_id=1, rows=6, cols=7, path=HOMOGRAPHY_FILE):
+    """Grab one frame once exposure has settled, auto-detect the board and cache the homography."""
+    from .camera_session import CameraSession
+
+    cap = CameraSession(camera_id).open()
+    ret, frame = cap.read()
+    cap.release()
+    if not ret:
+        print("Camera not working")
+        return None
+
+    localizer = BoardLocalizer.detect(frame, rows, cols)
+    if localizer is None:
+        print("❌ Could not find the board's hole lattice.")
+        return None
+
+    localizer.save(path)
+    return localizer
+
+
+if __name__ == "__main__":
+    detect_board_homography()
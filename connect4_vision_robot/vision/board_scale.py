@@ -0,0 +1,166 @@
+# vision/board_scale.py
+
+import argparse
+import glob
+import json
+import os
+import time
+import cv2
+import numpy as np
+
+from .color_detection import detect_colors
+from .frame_context import FrameContext
+from .map_discs_to_grid import map_discs_to_grid
+
+# Default processing resolution: pixels per cell (w, h)
+DEFAULT_CELL = (14, 12)
+
+# Smallest blob counted as a disc, as a fraction of one cell's area.
+# At full resolution map_discs_to_grid uses a fixed 200 px instead.
+MIN_AREA_FRACTION = 0.15
+
+
+def min_area_for_cell(cell_w, cell_h):
+    return MIN_AREA_FRACTION * cell_w * cell_h
+
+
+class BoardScaler:
+    """
+    Resizes a board crop to a small fixed size (cols*cell_w x rows*cell_h)
+    before colour classification. The 42-cell decision does not need camera
+    resolution, and every later stage gets proportionally cheaper.
+    """
+
+    def __init__(self, cell_size=DEFAULT_CELL, grid_shape=(6, 7)):
+        self.cell_w, self.cell_h = cell_size
+        rows, cols = grid_shape
+        self.size = (cols * self.cell_w, rows * self.cell_h)  # (w, h)
+        self.min_area = min_area_for_cell(self.cell_w, self.cell_h)
+        self._buffer = np.empty((self.size[1], self.size[0], 3), dtype=np.uint8)
+
+    def apply(self, board_frame):
+        """Return the downscaled board (an internal buffer reused on the next call)."""
+        cv2.resize(board_frame, self.size, dst=self._buffer, interpolation=cv2.INTER_AREA)
+        return self._buffer
+
+
+# -------------------------
+#   Accuracy-vs-scale report
+# -------------------------
+def load_dataset(dataset_dir):
+    """
+    A recorded dataset is a directory with
+      - frame images (*.png / *.jpg)
+      - labels.json: {"<file name>": 6x7 board list (0 empty, 1 red, 2 yellow)}
+      - optional board_grid.npy (x, y, w, h) if the frames are not already cropped
+    Yields (name, board_frame, label_board).
+    """
+    with open(os.path.join(dataset_dir, "labels.json")) as f:
+        labels = json.load(f)
+
+    roi = None
+    roi_path = os.path.join(dataset_dir, "board_grid.npy")
+    if os.path.exists(roi_path):
+        roi = [int(v) for v in np.load(roi_path)]
+
+    paths = sorted(glob.glob(os.path.join(dataset_dir, "*.png")) +
+                   glob.glob(os.path.join(dataset_dir, "*.jpg")))
+    for path in paths:
+        name = os.path.basename(path)
+        if name not in labels:
+            continue
+        frame = cv2.imread(path)
+        if frame is None:
+            continue
+        if roi is not None:
+            x, y, w, h = roi
+            frame = frame[y:y+h, x:x+w]
+        yield name, frame, np.array(labels[name], dtype=int)
+
+
+def evaluate_scale(samples, cell_size, grid_shape=(6, 7), thresholds=None):
+    """
+    Classify every sample at one processing scale (None = full resolution).
+    Returns board accuracy, cell accuracy and mean ms per frame.
+    """
+    exact = 0
+    cells_ok = 0
+    cells_total = 0
+    elapsed = 0.0
+    scaler = BoardScaler(cell_size, grid_shape) if cell_size else None
+    ctx = None
+
+    for _, frame, label in samples:
+        t0 = time.perf_counter()
+        if scaler is not None:
+            view = scaler.apply(frame)
+            min_area = scaler.min_area
+        else:
+            view = frame
+            min_area = 200
+        if ctx is None or not ctx.fits(view):
+            ctx = FrameContext(view.shape, grid_shape)
+        mask_yellow, mask_red, _ = detect_colors(view, thresholds, ctx, min_area=min_area)
+        board = map_discs_to_grid(mask_red, mask_yellow, grid_shape, out=ctx.board,
+                                  min_area=min_area)
+        elapsed += time.perf_counter() - t0
+
+        exact += int(np.array_equal(board, label))
+        cells_ok += int(np.count_nonzero(board == label))
+        cells_total += label.size
+
+    n = len(samples)
+    return {
+        "cell": "full" if cell_size is None else f"{cell_size[0]}x{cell_size[1]}",
+        "frames": n,
+        "board_accuracy": exact / n if n else 0.0,
+        "cell_accuracy": cells_ok / cells_total if cells_total else 0.0,
+        "ms_per_frame": 1000.0 * elapsed / n if n else 0.0,
+    }
+
+
+def scale_report(dataset_dir, cell_sizes, thresholds=None):
+    """
+    Print accuracy and speed for every candidate scale and return the rows
+    plus the smallest scale that classified every frame exactly.
+    """
+    samples = list(load_dataset(dataset_dir))
+    if not samples:
+        print(f"❌ No labelled frames found in {dataset_dir}")
+        return [], None
+
+    rows = [evaluate_scale(samples, cell, thresholds=thresholds) for cell in cell_sizes]
+
+    print(f"{'cell px':>8} {'boards':>8} {'cells':>8} {'ms/frame':>9}")
+    for row in rows:
+        print(f"{row['cell']:>8} {row['board_accuracy']:>8.1%} "
+              f"{row['cell_accuracy']:>8.1%} {row['ms_per_frame']:>9.2f}")
+
+    exact = [(cell, row) for cell, row in zip(cell_sizes, rows)
+             if cell is not None and row["board_accuracy"] == 1.0]
+    best = min(exact, key=lambda item: item[0][0] * item[0][1])[0] if exact else None
+    if best:
+        print(f"✅ Smallest exact scale: {best[0]}x{best[1]} px per cell")
+    else:
+        print("⚠️ No downscaled setting was exact on this dataset.")
+    return rows, best
+
+
+def _parse_cell(text):
+    if text == "full":
+        return None
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Board classification accuracy vs processing scale.")
+    parser.add_argument("dataset", help="directory with frames and labels.json")
+    parser.add_argument("--cells", nargs="+", default=["6x5", "8x7", "10x9", "14x12", "20x17", "full"],
+                        help="pixels per cell as WxH, or 'full'")
+    parser.add_argument("--profile", default=None, help="colour profile to classify with")
+    args = parser.parse_args()
+
+    from .color_calibration import load_profile
+    scale_report(args.dataset, [_parse_cell(c) for c in args.cells],
+                 thresholds=load_profile(args.profile))
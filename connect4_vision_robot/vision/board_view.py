@@ -0,0 +1,77 @@
+# vision/board_view.py
+
+import numpy as np
+
+from .board_scale import BoardScaler, min_area_for_cell
+
+
+class BoardView:
+    """
+    Turns a raw camera frame into the board image that gets classified.
+
+    The board comes either from a BoardLocalizer (perspective warp) or from
+    an axis-aligned ROI (x, y, w, h). With `cell_size` set, classification
+    runs on a downscaled board of cols*cell_w x rows*cell_h pixels:
+    the localizer warps straight to that size, an ROI crop is resized.
+    `display_size` is the full-resolution size used for on-screen overlays.
+    """
+
+    def __init__(self, localizer=None, roi=None, cell_size=None, grid_shape=(6, 7)):
+        if localizer is None and roi is None:
+            raise ValueError("BoardView needs a localizer or an ROI.")
+        rows, cols = grid_shape
+        self.grid_shape = grid_shape
+        self.roi = None if roi is None else tuple(int(v) for v in roi)
+        self.scaler = None
+        self.min_area = 200
+
+        if localizer is not None:
+            self.display_size = localizer.size
+            if cell_size is not None:
+                localizer = localizer.rescaled(*cell_size)
+                self.min_area = min_area_for_cell(*cell_size)
+            self.localizer = localizer
+            self.size = localizer.size
+        else:
+            self.localizer = None
+            x, y, w, h = self.roi
+            self.display_size = (w, h)
+            if cell_size is not None:
+                self.scaler = BoardScaler(cell_size, grid_shape)
+                self.min_area = self.scaler.min_area
+                self.size = self.scaler.size
+            else:
+                self.size = (w, h)
+
+    @property
+    def redetections(self):
+        return self.localizer.redetections if self.localizer is not None else 0
+
+    def crop(self, frame):
+        """Board image to classify (may be an internal buffer reused next call)."""
+        if self.localizer is not None:
+            return self.localizer.warp(frame)
+        x, y, w, h = self.roi
+        board_frame = frame[y:y+h, x:x+w]
+        if self.scaler is not None:
+            return self.scaler.apply(board_frame)
+        return board_frame
+
+    @classmethod
+    def load(cls, homography_path, roi_path, cell_size=None, grid_shape=(6, 7)):
+        """
+        Prefer a cached homography, fall back to a saved ROI; None if neither exists.
+        A path of None skips that source.
+        """
+        from .board_localizer import BoardLocalizer
+
+        localizer = BoardLocalizer.load(homography_path) if homography_path else None
+        if localizer is not None:
+            return cls(localizer=localizer, cell_size=cell_size, grid_shape=grid_shape)
+        if not roi_path:
+            return None
+        try:
+            roi = np.load(roi_path)
+        except (OSError, ValueError):
+            return None
+        return cls(roi=roi, cell_size=cell_size, grid_shape=grid_shape)
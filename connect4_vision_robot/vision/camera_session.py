@@ -0,0 +1,141 @@
+# vision/camera_session.py
+
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# Fixed capture format so every consumer sees the same geometry as calibration
+DEFAULT_SIZE = (640, 480)
+DEFAULT_FOURCC = "MJPG"
+
+
+def settle_exposure(cap, max_frames=30, settle_delta=1.0, settle_count=3):
+    """
+    Read and discard frames until the mean brightness stops changing by more
+    than `settle_delta` for `settle_count` frames in a row (auto exposure has
+    settled), at most `max_frames`. Returns False if the camera stopped.
+    """
+    last_mean = None
+    settled = 0
+    for _ in range(max_frames):
+        ret, frame = cap.read()
+        if not ret:
+            return False
+        mean = float(np.mean(frame[::8, ::8]))
+        if last_mean is not None and abs(mean - last_mean) < settle_delta:
+            settled += 1
+            if settled >= settle_count:
+                break
+        else:
+            settled = 0
+        last_mean = mean
+    return True
+
+
+class CameraSession:
+    """
+    Keeps one camera device open from board calibration through gameplay.
+
+    Opening a USB camera costs seconds, so the device is opened once with a
+    fixed resolution, FOURCC and a one-frame driver buffer (always the newest
+    frame, no backlog). A background thread reads frames until auto exposure
+    has settled; read() waits for that warm-up before handing out frames.
+    The object has the cv2.VideoCapture read interface, so calibration,
+    priming and the main loop can all use it directly.
+
+        session = CameraSession(1).open()   # returns at once, warm-up runs
+        ...                                 # dashboard, board files, ...
+        ret, frame = session.read()         # first call waits for warm-up
+    """
+
+    def __init__(self, camera_id, size=DEFAULT_SIZE, fourcc=DEFAULT_FOURCC, buffer_size=1,
+                 warmup_frames=30, settle_delta=1.0, settle_count=3):
+        self.camera_id = camera_id
+        self.size = size
+        self.fourcc = fourcc
+        self.buffer_size = buffer_size
+        self.warmup_frames = warmup_frames
+        self.settle_delta = settle_delta      # mean-brightness change counted as "settled"
+        self.settle_count = settle_count      # consecutive settled frames required
+
+        self.cap = None
+        self.open_time = None
+        self.warmup_time = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = None
+
+    def open(self):
+        """Open and configure the device, then start warming up in the background."""
+        if self.cap is not None:
+            return self
+        t0 = time.time()
+        self.cap = cv2.VideoCapture(self.camera_id)
+        if self.cap.isOpened():
+            if self.fourcc:
+                self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+            if self.size is not None:
+                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.size[0])
+                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.size[1])
+            if self.buffer_size:
+                self.cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+        self.open_time = time.time() - t0
+
+        self._thread = threading.Thread(target=self._warm_up, name="camera-warmup", daemon=True)
+        self._thread.start()
+        return self
+
+    def _warm_up(self):
+        t0 = time.time()
+        try:
+            with self._lock:
+                settle_exposure(self.cap, self.warmup_frames, self.settle_delta, self.settle_count)
+        finally:
+            self.warmup_time = time.time() - t0
+            print(f"📷 Camera {self.camera_id} ready: opened in {self.open_time:.2f} s, "
+                  f"exposure warm-up {self.warmup_time:.2f} s")
+            self._ready.set()
+
+    def wait_ready(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    # ---------- cv2.VideoCapture interface ----------
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def read(self):
+        if not self.isOpened():
+            return False, None
+        self._ready.wait()
+        with self._lock:
+            return self.cap.read()
+
+    def grab(self):
+        if not self.isOpened():
+            return False
+        self._ready.wait()
+        with self._lock:
+            return self.cap.grab()
+
+    def get(self, prop):
+        return self.cap.get(prop) if self.cap is not None else 0.0
+
+    def frame_size(self):
+        return (int(self.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+    def release(self):
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
@@ -2,9 +2,14 @@
 
 import cv2
 
-def get_frame(camera_index=0):
-    """Open camera stream, display live feed, and return last captured frame."""
-    cap = cv2.VideoCapture(camera_index)
+def get_frame(camera_index=0, cap=None):
+    """
+    Open camera stream, display live feed, and return last captured frame.
+    Pass an open `cap` (e.g. a CameraSession) to reuse it; it is left open.
+    """
+    own_cap = cap is None
+    if own_cap:
+        cap = cv2.VideoCapture(camera_index)
 
     if not cap.isOpened():
         print("❌ Error: Could not open camera.")
@@ -22,7 +27,8 @@ def get_frame(camera_index=0):
         if cv2.waitKey(1) & 0xFF == 27:  # ESC key
             break
 
-    cap.release()
+    if own_cap:
+        cap.release()
     cv2.destroyAllWindows()
     return frame
 
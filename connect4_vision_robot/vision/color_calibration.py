@@ -0,0 +1,250 @@
+# vision/color_calibration.py
+
+import argparse
+import json
+import os
+import cv2
+import numpy as np
+
+from .camera_session import DEFAULT_SIZE, CameraSession
+from .color_detection import DEFAULT_THRESHOLDS
+
+PROFILES_FILE = "color_profiles.json"
+
+# Known layout used in calibration mode (image rows, top = 0):
+# bottom row all red, the row above all yellow, everything else empty.
+CALIBRATION_LAYOUT = np.zeros((6, 7), dtype=int)
+CALIBRATION_LAYOUT[5, :] = 1
+CALIBRATION_LAYOUT[4, :] = 2
+
+COLOR_LABELS = {"red": 1, "yellow": 2}
+
+
+# -------------------------
+#     Pixel sampling
+# -------------------------
+def cell_pixels(hsv, labels, label, inner=0.5):
+    """
+    Collect HSV pixels from the centre patch of every cell with `label`.
+    Only the inner fraction of each cell is used so the board rim and
+    hole edges do not pollute the histograms.
+    """
+    rows, cols = labels.shape
+    h, w = hsv.shape[:2]
+    cell_h, cell_w = h / rows, w / cols
+    pad_y = cell_h * (1 - inner) / 2
+    pad_x = cell_w * (1 - inner) / 2
+
+    chunks = []
+    for r, c in np.argwhere(labels == label):
+        y0, y1 = int(r * cell_h + pad_y), int((r + 1) * cell_h - pad_y)
+        x0, x1 = int(c * cell_w + pad_x), int((c + 1) * cell_w - pad_x)
+        chunks.append(hsv[y0:y1, x0:x1].reshape(-1, 3))
+    if not chunks:
+        return np.empty((0, 3), dtype=np.uint8)
+    return np.concatenate(chunks)
+
+
+def _hist_percentile(values, bins, pct):
+    """Percentile read off the cumulative histogram of integer values."""
+    hist = np.bincount(values, minlength=bins)
+    cdf = np.cumsum(hist) / max(1, hist.sum())
+    return int(np.searchsorted(cdf, pct / 100.0))
+
+
+# -------------------------
+#     Range learning
+# -------------------------
+def learn_color_range(pixels, empty_pixels=None, lo_pct=2, hi_pct=98,
+                      margin=(4, 20, 20)):
+    """
+    Learn a list of (lower, upper) HSV ranges from one colour's pixels.
+
+    Hue is rotated so the colour's circular mean sits at 90 before reading
+    the histogram, which keeps red contiguous; the range is split in two
+    again if it crosses the 0/180 wrap. Saturation and value only get a
+    lower bound. If too many empty-cell pixels would fall inside the range,
+    the saturation floor is raised just above them.
+    """
+    hue = pixels[:, 0].astype(int)
+    angles = hue * (2 * np.pi / 180.0)
+    mean = np.arctan2(np.sin(angles).mean(), np.cos(angles).mean())
+    centre = int(round(mean * 180.0 / (2 * np.pi))) % 180
+    shift = 90 - centre
+
+    shifted = (hue + shift) % 180
+    sh_lo = max(0, _hist_percentile(shifted, 180, lo_pct) - margin[0])
+    sh_hi = min(179, _hist_percentile(shifted, 180, hi_pct) + margin[0])
+    s_lo = max(0, _hist_percentile(pixels[:, 1], 256, lo_pct) - margin[1])
+    v_lo = max(0, _hist_percentile(pixels[:, 2], 256, lo_pct) - margin[2])
+
+    if empty_pixels is not None and len(empty_pixels):
+        e_hue = (empty_pixels[:, 0].astype(int) + shift) % 180
+        in_hue = (e_hue >= sh_lo) & (e_hue <= sh_hi)
+        in_range = in_hue & (empty_pixels[:, 1] >= s_lo) & (empty_pixels[:, 2] >= v_lo)
+        if in_range.mean() > 0.05:
+            s_floor = _hist_percentile(empty_pixels[in_hue, 1], 256, 95) + 1
+            # Only raise the floor if most of the colour survives it
+            if np.mean(pixels[:, 1] >= s_floor) >= 0.8:
+                s_lo = max(s_lo, s_floor)
+
+    h_lo = (sh_lo - shift) % 180
+    h_hi = (sh_hi - shift) % 180
+    if h_lo <= h_hi:
+        return [((h_lo, s_lo, v_lo), (h_hi, 255, 255))]
+    return [((0, s_lo, v_lo), (h_hi, 255, 255)),
+            ((h_lo, s_lo, v_lo), (180, 255, 255))]
+
+
+def learn_thresholds(board_frame, labels, min_cells=2, fallback=DEFAULT_THRESHOLDS, hsv=None):
+    """
+    Learn thresholds for every colour from a board image with known labels
+    (0 = empty, 1 = red, 2 = yellow). Colours on fewer than `min_cells`
+    cells take their ranges from `fallback`, or are left out if it is None.
+    The minimum counts cells, not pixels, so it holds at any board resolution.
+    hsv: the board's HSV after the same 5x5 blur, if already computed
+    (detect_colors leaves it in FrameContext.hsv).
+    """
+    if hsv is None:
+        blurred = cv2.GaussianBlur(board_frame, (5, 5), 0)
+        hsv = cv2.cvtColor(blurred, cv2.COLOR_BGR2HSV)
+    empty = cell_pixels(hsv, labels, 0)
+
+    thresholds = {}
+    for name, label in COLOR_LABELS.items():
+        pixels = cell_pixels(hsv, labels, label)
+        if np.count_nonzero(labels == label) >= min_cells and len(pixels):
+            thresholds[name] = learn_color_range(pixels, empty)
+        elif fallback is not None:
+            thresholds[name] = fallback[name]
+    return thresholds
+
+
+# -------------------------
+#     Profiles on disk
+# -------------------------
+def _normalise(thresholds):
+    """JSON round-trip form: lists of [lower, upper] int lists."""
+    return {name: [[[int(v) for v in lo], [int(v) for v in hi]] for lo, hi in ranges]
+            for name, ranges in thresholds.items()}
+
+
+def save_profile(name, thresholds, path=PROFILES_FILE, make_active=True):
+    """Store thresholds as a named lighting profile."""
+    data = {"active": None, "profiles": {}}
+    if os.path.exists(path):
+        with open(path) as f:
+            data = json.load(f)
+    data["profiles"][name] = _normalise(thresholds)
+    if make_active:
+        data["active"] = name
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+    print(f"✅ Colour profile '{name}' saved to {path}")
+
+
+def load_profile(name=None, path=PROFILES_FILE):
+    """
+    Load a named profile (or the active one if name is None).
+    Returns the thresholds dict, or None if no matching profile exists.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        data = json.load(f)
+    name = name or data.get("active")
+    return data.get("profiles", {}).get(name)
+
+
+# -------------------------
+#     Slow in-game adaptation
+# -------------------------
+class AdaptiveThresholds:
+    """
+    Thresholds that follow slow lighting drift during play.
+
+    adapt() is fed board frames whose labels are trusted (the observed board
+    agrees with the logical game). Ranges are re-learned from those cells and
+    blended in with a small exponential rate, so a single bad frame cannot
+    move them much.
+    """
+
+    def __init__(self, thresholds=None, rate=0.05, min_cells=2):
+        # Kept as floats so tiny per-frame steps still accumulate
+        self._state = {name: np.array(ranges, dtype=float)
+                       for name, ranges in _normalise(thresholds or DEFAULT_THRESHOLDS).items()}
+        self.rate = rate
+        self.min_cells = min_cells
+        self.updates = 0
+
+    @property
+    def thresholds(self):
+        return {name: np.rint(ranges).astype(int).tolist()
+                for name, ranges in self._state.items()}
+
+    def adapt(self, board_frame, labels, hsv=None):
+        # No fallback: a colour with too few cells is skipped, not pulled toward the defaults
+        learned = _normalise(learn_thresholds(board_frame, labels, self.min_cells, fallback=None,
+                                              hsv=hsv))
+        for name in learned:
+            old = self._state[name]
+            new = np.array(learned[name], dtype=float)
+            if old.shape != new.shape:
+                # Red range flipped between one and two parts – skip this frame
+                continue
+            self._state[name] = (1 - self.rate) * old + self.rate * new
+        self.updates += 1
+        return self.thresholds
+
+
+def calibrate(camera_id=1, profile="default", path=PROFILES_FILE, rows=6, cols=7,
+              size=DEFAULT_SIZE):
+    """
+    Calibration mode: lay out CALIBRATION_LAYOUT (bottom row red, next row
+    yellow, rest empty), then press SPACE to learn and save the profile.
+    size: capture format, the one the game runs at (main.CAMERA_SIZE) so the
+    board files and the learned colours match it.
+    """
+    from .board_localizer import BoardLocalizer, HOMOGRAPHY_FILE
+
+    localizer = BoardLocalizer.load(HOMOGRAPHY_FILE)
+    roi = None
+    if localizer is None:
+        if not os.path.exists("board_grid.npy"):
+            print("❌ No board_homography.npz or board_grid.npy – locate the board first.")
+            return None
+        roi = [int(v) for v in np.load("board_grid.npy")]
+
+    # Same fixed format and exposure warm-up as gameplay
+    cap = CameraSession(camera_id, size=size).open()
+    print("🎨 Bottom row RED, second row YELLOW, rest empty. SPACE = learn, ESC = cancel.")
+    thresholds = None
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            print("❌ Frame not captured.")
+            break
+        if localizer is not None:
+            board_frame = localizer.warp(frame, check_drift=False).copy()
+        else:
+            x, y, w, h = roi
+            board_frame = frame[y:y+h, x:x+w]
+        cv2.imshow("Colour calibration", board_frame)
+        key = cv2.waitKey(1) & 0xFF
+        if key == 27:
+            break
+        if key == 32:
+            thresholds = learn_thresholds(board_frame, CALIBRATION_LAYOUT[:rows, :cols])
+            save_profile(profile, thresholds, path)
+            break
+    cap.release()
+    cv2.destroyAllWindows()
+    return thresholds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Learn HSV colour thresholds for a venue.")
+    parser.add_argument("--camera", type=int, default=1)
+    parser.add_argument("--profile", default="default", help="name of the lighting profile")
+    args = parser.parse_args()
+    calibrate(camera_id=args.camera, profile=args.profile)
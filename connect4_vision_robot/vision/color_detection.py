@@ -3,56 +3,89 @@
 import cv2
 import numpy as np
 
-def detect_colors(frame):
-    """Detect yellow and red discs from a live camera frame and return cleaned masks + overlay."""
-    # 1) Pre-smooth to reduce noise
-    blurred = cv2.GaussianBlur(frame, (5, 5), 0)
-
-    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-
-    # Yellow discs
-    lower_yellow = (18, 101, 101)
-    upper_yellow = (37, 255, 255)
-
-    # Red discs
-    lower_red1 = (0, 120, 70)
-    upper_red1 = (10, 255, 255)
-    lower_red2 = (170, 120, 70)
-    upper_red2 = (180, 255, 255)
+from .frame_context import FrameContext
+
+# Default HSV ranges per colour: list of (lower, upper) pairs.
+# Red needs two ranges because hue wraps around at 180.
+# Venue-specific ranges are learned by vision/color_calibration.py.
+DEFAULT_THRESHOLDS = {
+    "yellow": [((18, 101, 101), (37, 255, 255))],
+    "red": [((0, 120, 70), (10, 255, 255)),
+            ((170, 120, 70), (180, 255, 255))],
+}
+
+
+YELLOW_BGR = np.array((0, 255, 255), dtype=np.uint8)
+RED_BGR = np.array((0, 0, 255), dtype=np.uint8)
+
+
+def _range_mask(hsv, ranges, dst, tmp):
+    """OR together cv2.inRange masks for every (lower, upper) pair into `dst`."""
+    for i, (lower, upper) in enumerate(ranges):
+        if i == 0:
+            cv2.inRange(hsv, tuple(lower), tuple(upper), dst=dst)
+        else:
+            cv2.inRange(hsv, tuple(lower), tuple(upper), dst=tmp)
+            cv2.bitwise_or(dst, tmp, dst=dst)
+    return dst
+
+
+def detect_colors(frame, thresholds=None, ctx=None, min_area=200):
+    """
+    Detect yellow and red discs from a live camera frame and return cleaned masks + overlay.
+    Pass a FrameContext sized to the frame to reuse its buffers; the returned
+    masks and overlay then live in the context.
+    """
+    if thresholds is None:
+        thresholds = DEFAULT_THRESHOLDS
+    if ctx is None or not ctx.fits(frame):
+        ctx = FrameContext(frame.shape)
+
+    # 1) Pre-smooth to reduce noise; HSV comes from the smoothed frame, the same
+    #    preprocessing color_calibration.learn_thresholds learns the ranges on
+    blurred = cv2.GaussianBlur(frame, (5, 5), 0, dst=ctx.blurred)
+
+    hsv = cv2.cvtColor(blurred, cv2.COLOR_BGR2HSV, dst=ctx.hsv)
 
     # Masks
-    mask_yellow = cv2.inRange(hsv, lower_yellow, upper_yellow)
-    mask_red1 = cv2.inRange(hsv, lower_red1, upper_red1)
-    mask_red2 = cv2.inRange(hsv, lower_red2, upper_red2)
-    mask_red = cv2.bitwise_or(mask_red1, mask_red2)
+    mask_yellow = _range_mask(hsv, thresholds["yellow"], ctx.mask_yellow, ctx.mask_tmp)
+    mask_red = _range_mask(hsv, thresholds["red"], ctx.mask_red, ctx.mask_tmp)
 
     # Combine masks for visualization
-    combined_mask = cv2.bitwise_or(mask_yellow, mask_red)
-
-    # Create colored overlay
-    output = frame.copy()
-    output[mask_yellow > 0] = (0, 255, 255)  # yellow highlight
-    output[mask_red > 0] = (0, 0, 255)       # red highlight
+    combined_mask = cv2.bitwise_or(mask_yellow, mask_red, dst=ctx.combined_mask)
 
     # Optionally, detect contours (for future use)
     contours_yellow, _ = cv2.findContours(mask_yellow, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
     contours_red, _ = cv2.findContours(mask_red, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
-    for cnt in contours_yellow:
-        area = cv2.contourArea(cnt)
-        if area > 200:  # adjust threshold
-            (x, y, w, h) = cv2.boundingRect(cnt)
-            cv2.rectangle(output, (x, y), (x + w, y + h), (0, 255, 255), 2)
+    ctx.boxes = []
+    for contours, color in ((contours_yellow, (0, 255, 255)), (contours_red, (0, 0, 255))):
+        for cnt in contours:
+            if cv2.contourArea(cnt) > min_area:  # adjust threshold
+                ctx.boxes.append(cv2.boundingRect(cnt) + (color,))
 
-    for cnt in contours_red:
-        area = cv2.contourArea(cnt)
-        if area > 200:
-            (x, y, w, h) = cv2.boundingRect(cnt)
-            cv2.rectangle(output, (x, y), (x + w, y + h), (0, 0, 255), 2)
+    output = draw_overlay(frame, ctx)
 
     # Return values to main loop
     return mask_yellow, mask_red, output
 
+
+def draw_overlay(frame, ctx):
+    """
+    Paint the masks and disc boxes of the last detect_colors() call with `ctx`
+    onto `frame` (same size), into ctx.output. Cheap: a frame that was not
+    classified can still be shown live with the last result on it.
+    """
+    output = ctx.output
+    np.copyto(output, frame)
+    np.greater(ctx.mask_yellow, 0, out=ctx.highlight[..., 0])
+    np.copyto(output, YELLOW_BGR, where=ctx.highlight)   # yellow highlight
+    np.greater(ctx.mask_red, 0, out=ctx.highlight[..., 0])
+    np.copyto(output, RED_BGR, where=ctx.highlight)      # red highlight
+    for x, y, w, h, color in ctx.boxes:
+        cv2.rectangle(output, (x, y), (x + w, y + h), color, 2)
+    return output
+
 # import cv2
 # import numpy as np
 
@@ -1,16 +1,20 @@
 import cv2
 import numpy as np
 
-def detect_board_grid(camera_id=1, rows=6, cols=7):
+def detect_board_grid(camera_id=1, rows=6, cols=7, path="board_grid.npy", cap=None):
     """
     Lets the user manually select the Connect 4 board ROI and draws a grid over it.
     Saves ROI coordinates for later use.
+    Pass an open `cap` (e.g. a CameraSession) to reuse it; it is left open.
     """
-    cap = cv2.VideoCapture(camera_id)
+    own_cap = cap is None
+    if own_cap:
+        cap = cv2.VideoCapture(camera_id)
     ret, frame = cap.read()
     if not ret:
         print("Camera not working")
-        cap.release()
+        if own_cap:
+            cap.release()
         return None
 
     # Let user select board ROI
@@ -32,11 +36,12 @@ def detect_board_grid(camera_id=1, rows=6, cols=7):
     cv2.imshow("Board Grid", board_frame)
     cv2.waitKey(0)
     cv2.destroyAllWindows()
-    cap.release()
+    if own_cap:
+        cap.release()
 
     # Save grid info for later use
-    np.save("board_grid.npy", np.array([x, y, w, h]))
-    print("✅ Board grid saved as board_grid.npy")
+    np.save(path, np.array([x, y, w, h]))
+    print(f"✅ Board grid saved as {path}")
 
     return (x, y, w, h)
 
@@ -59,3 +59,54 @@ def detect_move(prev_board, curr_board, last_move=None):
         return None, None, None, False
 
     return row, col, color, True
+
+
+def detect_move_strict(prev_board: np.ndarray,
+                       curr_board: np.ndarray,
+                       rows: int,
+                       cols: int):
+    """
+    Strict, gravity-aware move detector.
+    Returns (row_img, col_img, color, new_move: bool)
+
+    - exactly one column must have changes
+    - in that column, exactly one new occupied cell appears
+    - that new cell must be the lowest empty position in prev_board
+    """
+    # where board changed
+    changed = (prev_board != curr_board)
+
+    # count changes by column
+    changed_cols = []
+    for c in range(cols):
+        col_changes = np.where(changed[:, c])[0]
+        if col_changes.size > 0:
+            changed_cols.append(c)
+
+    # If no change or more than one column changed -> ignore
+    if len(changed_cols) != 1:
+        return None, None, None, False
+
+    c = changed_cols[0]
+
+    # In that column, find cells that turned from empty->occupied
+    became_filled_rows = []
+    for r in range(rows):
+        if prev_board[r, c] == 0 and curr_board[r, c] != 0:
+            became_filled_rows.append(r)
+
+    # We only accept exactly one new filled cell
+    if len(became_filled_rows) != 1:
+        return None, None, None, False
+
+    r_new = became_filled_rows[0]
+    color = int(curr_board[r_new, c])
+
+    # Gravity check: r_new must be the lowest empty in prev_board
+    # i.e., all rows below r_new must already be filled in prev_board
+    for rb in range(r_new + 1, rows):  # rows increase downward in image
+        if prev_board[rb, c] == 0:
+            # there was an empty below; disc couldn't float here
+            return None, None, None, False
+
+    return r_new, c, color, True
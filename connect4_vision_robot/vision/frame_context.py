@@ -0,0 +1,35 @@
+# vision/frame_context.py
+
+import numpy as np
+
+
+class FrameContext:
+    """
+    Preallocated per-frame buffers for the colour pipeline.
+
+    detect_colors() and map_discs_to_grid() write into these through
+    OpenCV `dst=` and NumPy `out=` arguments, so once a context exists the
+    steady-state loop does not allocate any new image-sized arrays.
+    Everything returned from a call that used the context is a view of these
+    buffers and is overwritten by the next frame – copy what you keep.
+    """
+
+    def __init__(self, frame_shape, grid_shape=(6, 7)):
+        h, w = frame_shape[:2]
+        self.shape = (h, w)
+        self.grid_shape = tuple(grid_shape)
+
+        self.blurred = np.empty((h, w, 3), dtype=np.uint8)
+        self.hsv = np.empty((h, w, 3), dtype=np.uint8)
+        self.mask_yellow = np.empty((h, w), dtype=np.uint8)
+        self.mask_red = np.empty((h, w), dtype=np.uint8)
+        self.mask_tmp = np.empty((h, w), dtype=np.uint8)
+        self.combined_mask = np.empty((h, w), dtype=np.uint8)
+        self.highlight = np.empty((h, w, 1), dtype=bool)
+        self.output = np.empty((h, w, 3), dtype=np.uint8)
+        self.boxes = []           # (x, y, w, h, BGR) of the discs found last
+        self.board = np.zeros(self.grid_shape, dtype=int)
+
+    def fits(self, frame):
+        """True if this context was sized for `frame`."""
+        return frame.shape[:2] == self.shape
@@ -1,17 +1,24 @@
 import numpy as np
 import cv2
 
-def map_discs_to_grid(mask_red, mask_yellow, grid_shape=(6, 7)):
+def map_discs_to_grid(mask_red, mask_yellow, grid_shape=(6, 7), out=None, min_area=200):
     """
     Map detected red/yellow discs to grid cells (row, column).
     Returns a 2D board array:
       0 = empty
       1 = red disc
       2 = yellow disc
+    If `out` is given (e.g. FrameContext.board) it is cleared and filled in place.
+    `min_area` is the smallest blob (in pixels) counted as a disc; lower it
+    when the masks come from a downscaled board.
     """
 
     rows, cols = grid_shape
-    board = np.zeros((rows, cols), dtype=int)
+    if out is None:
+        board = np.zeros((rows, cols), dtype=int)
+    else:
+        board = out
+        board.fill(0)
 
     h, w = mask_red.shape
     cell_w = w / cols
@@ -21,7 +28,7 @@ def map_discs_to_grid(mask_red, mask_yellow, grid_shape=(6, 7)):
     contours_red, _ = cv2.findContours(mask_red, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
     for cnt in contours_red:
         area = cv2.contourArea(cnt)
-        if area > 200:
+        if area > min_area:
             M = cv2.moments(cnt)
             if M["m00"] != 0:
                 cx = int(M["m10"] / M["m00"])
@@ -35,7 +42,7 @@ def map_discs_to_grid(mask_red, mask_yellow, grid_shape=(6, 7)):
     contours_yellow, _ = cv2.findContours(mask_yellow, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
     for cnt in contours_yellow:
         area = cv2.contourArea(cnt)
-        if area > 200:
+        if area > min_area:
             M = cv2.moments(cnt)
             if M["m00"] != 0:
                 cx = int(M["m10"] / M["m00"])
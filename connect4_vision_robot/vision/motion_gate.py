@@ -0,0 +1,139 @@
+# vision/motion_gate.py
+
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Cheap motion gate in front of the colour pipeline.
+
+    Every frame the board ROI is shrunk to a tiny grayscale thumbnail of
+    `cell_px` x `cell_px` pixels per board cell and compared with the previous
+    thumbnail (motion) and with the thumbnail of the last classified frame
+    (reference). Motion is the changed-pixel fraction of the most changed
+    cell, so one landing disc counts the same whatever size the board crop
+    is (full resolution or the downscaled processing view). Hysteresis
+    between an "enter" and an "exit" threshold decides whether the scene is
+    MOVING or STATIC:
+
+    - STATIC and unchanged since the reference -> skip classification
+    - MOVING (hand / falling disc over the board) -> skip classification
+    - STATIC but changed since the reference (slow change) -> settle first
+    - motion has settled for `settle_frames` frames -> run the full pipeline once
+    - STATIC with `recheck_after` set -> run again every `recheck_after` seconds
+      (a caller waiting out a misread needs fresh reads of an unchanged board)
+    """
+
+    STATIC = "static"
+    MOVING = "moving"
+
+    def __init__(self,
+                 grid_shape=(6, 7),
+                 cell_px: int = 4,
+                 pixel_delta: int = 25,
+                 enter_thresh: float = 0.25,
+                 exit_thresh: float = 0.1,
+                 settle_frames: int = 5):
+        """
+        grid_shape:    board rows, cols
+        cell_px:       thumbnail pixels per cell side
+        pixel_delta:   gray-level difference that counts a pixel as changed
+        enter_thresh:  changed fraction of one cell that switches STATIC → MOVING
+        exit_thresh:   changed fraction of every cell below which motion is "quiet"
+        settle_frames: consecutive quiet frames required before classifying
+        """
+        self.grid_shape = tuple(grid_shape)
+        self.cell_px = cell_px
+        self.pixel_delta = pixel_delta
+        self.enter_thresh = enter_thresh
+        self.exit_thresh = exit_thresh
+        self.settle_frames = settle_frames
+
+        self.state = self.STATIC
+        self.quiet_count = 0
+        self.last_motion = 0.0
+
+        self.processed_frames = 0
+        self.skipped_frames = 0
+        self.recheck_after = None
+
+        self._prev = None
+        self._reference = None
+        self._force = True
+        self._last_run = None
+
+    def _thumbnail(self, board_frame):
+        rows, cols = self.grid_shape
+        size = (cols * self.cell_px, rows * self.cell_px)
+        small = cv2.resize(board_frame, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def _changed_fraction(self, a, b):
+        """Changed-pixel fraction of the cell that changed most between thumbnails a and b."""
+        if a is None or a.shape != b.shape:
+            return 1.0
+        rows, cols = self.grid_shape
+        changed = cv2.absdiff(a, b) > self.pixel_delta
+        per_cell = changed.reshape(rows, self.cell_px, cols, self.cell_px).mean(axis=(1, 3))
+        return float(per_cell.max())
+
+    def force(self):
+        """Make the next call to update() run the full pipeline."""
+        self._force = True
+
+    def update(self, board_frame, now=None) -> bool:
+        """
+        Feed one cropped board frame (`now`: its time, default time.time()).
+        Returns True when the caller should run detect_colors/map_discs_to_grid.
+        """
+        now = time.time() if now is None else now
+        thumb = self._thumbnail(board_frame)
+        motion = self._changed_fraction(self._prev, thumb)
+        self._prev = thumb
+        self.last_motion = motion
+
+        run = False
+        if self._force:
+            run = True
+        elif self.state == self.STATIC:
+            if motion > self.enter_thresh:
+                self.state = self.MOVING
+                self.quiet_count = 0
+            elif self._changed_fraction(self._reference, thumb) > self.enter_thresh:
+                # Slow change that never tripped the motion threshold: wait until
+                # it has settled too, never classify (and re-reference) mid-change
+                self.state = self.MOVING
+                self.quiet_count = 1 if motion < self.exit_thresh else 0
+            elif self.recheck_after is not None and now - self._last_run >= self.recheck_after:
+                run = True
+        else:  # MOVING
+            if motion < self.exit_thresh:
+                self.quiet_count += 1
+                if self.quiet_count >= self.settle_frames:
+                    self.state = self.STATIC
+                    run = True
+            else:
+                self.quiet_count = 0
+
+        if run:
+            self._force = False
+            self._last_run = now
+            self._reference = thumb
+            self.processed_frames += 1
+        else:
+            self.skipped_frames += 1
+        return run
+
+    def stats(self):
+        """Return processed/skipped frame counts and the skip ratio."""
+        total = self.processed_frames + self.skipped_frames
+        return {
+            "processed": self.processed_frames,
+            "skipped": self.skipped_frames,
+            "skip_ratio": (self.skipped_frames / total) if total else 0.0,
+        }
@@ -0,0 +1,196 @@
+# vision/replay.py
+
+import argparse
+import difflib
+import glob
+import json
+import os
+import time
+import cv2
+import numpy as np
+
+from .board_localizer import HOMOGRAPHY_FILE
+from .board_view import BoardView
+from .color_detection import detect_colors
+from .detect_move import detect_move_strict
+from .frame_context import FrameContext
+from .map_discs_to_grid import map_discs_to_grid
+from .motion_gate import MotionGate
+
+STAGES = ("read", "crop", "detect_colors", "map_discs_to_grid", "detect_move_strict")
+
+
+def iter_frames(source):
+    """Yield frames from a video file or from a directory of images (sorted by name)."""
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, "*.png")) +
+                       glob.glob(os.path.join(source, "*.jpg")))
+        for path in paths:
+            frame = cv2.imread(path)
+            if frame is not None:
+                yield frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        print(f"❌ Could not open {source}")
+        return
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
+
+
+def load_ground_truth(path):
+    """
+    Ground-truth move list (JSON): [{"col": 3, "color": 2, "frame": 120}, ...]
+    `col` is the 0-based image column, `color` 1 = red / 2 = yellow,
+    `frame` (optional) is the first frame on which the disc is resting.
+    """
+    with open(path) as f:
+        return json.load(f)
+
+
+def replay(source, board_view, rows=6, cols=7, thresholds=None, gate=None):
+    """
+    Run every frame through detect_colors → map_discs_to_grid → detect_move_strict
+    as fast as possible. Returns (moves, timings, frame_count, wall_seconds),
+    where timings maps stage name → list of per-frame seconds.
+    With a MotionGate, frames it skips are not classified (as in main.py) and
+    only add read / crop timings. Moves are still found by detect_move_strict,
+    not by main.py's BoardReconciler.
+    """
+    timings = {stage: [] for stage in STAGES}
+    moves = []
+    ctx = FrameContext((board_view.size[1], board_view.size[0]), (rows, cols))
+    previous_board = None
+
+    frames = iter_frames(source)
+    frame_idx = 0
+    t_start = time.perf_counter()
+    while True:
+        t0 = time.perf_counter()
+        frame = next(frames, None)
+        t1 = time.perf_counter()
+        if frame is None:
+            break
+
+        board_frame = board_view.crop(frame)
+        t2 = time.perf_counter()
+        if gate is not None and not gate.update(board_frame):
+            timings["read"].append(t1 - t0)
+            timings["crop"].append(t2 - t1)
+            frame_idx += 1
+            continue
+        mask_yellow, mask_red, _ = detect_colors(board_frame, thresholds, ctx,
+                                                 min_area=board_view.min_area)
+        t3 = time.perf_counter()
+        board = map_discs_to_grid(mask_red, mask_yellow, grid_shape=(rows, cols),
+                                  out=ctx.board, min_area=board_view.min_area)
+        t4 = time.perf_counter()
+        if previous_board is None:
+            previous_board = board.copy()
+            new_move = False
+        else:
+            r_img, c_img, color, new_move = detect_move_strict(previous_board, board, rows, cols)
+        t5 = time.perf_counter()
+
+        if new_move:
+            moves.append({"frame": frame_idx, "row": int(r_img), "col": int(c_img), "color": color})
+            previous_board = board.copy()
+
+        for stage, dt in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4)):
+            timings[stage].append(dt)
+        frame_idx += 1
+
+    return moves, timings, frame_idx, time.perf_counter() - t_start
+
+
+def compare_moves(detected, expected):
+    """
+    Align detected and expected (col, color) sequences.
+    Returns matched / missed / extra counts and, where ground truth has
+    frame numbers, the detection lag in frames for each matched move.
+    """
+    det = [(m["col"], m["color"]) for m in detected]
+    exp = [(m["col"], m["color"]) for m in expected]
+    matcher = difflib.SequenceMatcher(a=exp, b=det, autojunk=False)
+
+    matched = 0
+    lags = []
+    for block in matcher.get_matching_blocks():
+        for k in range(block.size):
+            matched += 1
+            gt = expected[block.a + k]
+            if "frame" in gt:
+                lags.append(detected[block.b + k]["frame"] - gt["frame"])
+    return {
+        "matched": matched,
+        "missed": len(exp) - matched,
+        "extra": len(det) - matched,
+        "exact": det == exp,
+        "lag_frames": lags,
+    }
+
+
+def print_report(moves, timings, frame_count, wall, comparison=None):
+    print(f"🎞️ {frame_count} frames in {wall:.2f} s → {frame_count / wall if wall else 0.0:.1f} FPS")
+    print(f"{'stage':>20} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for stage in STAGES:
+        samples = np.array(timings[stage]) * 1000.0
+        if samples.size == 0:
+            continue
+        print(f"{stage:>20} {samples.mean():>9.3f} {np.percentile(samples, 95):>9.3f} {samples.max():>9.3f}")
+
+    print(f"🎯 Detected {len(moves)} moves:")
+    for m in moves:
+        color_name = "Red" if m["color"] == 1 else "Yellow"
+        print(f"   frame {m['frame']:>6}: {color_name} in column {m['col'] + 1}")
+
+    if comparison is not None:
+        print(f"✅ matched {comparison['matched']}  ❌ missed {comparison['missed']}  "
+              f"➕ extra {comparison['extra']}")
+        if comparison["lag_frames"]:
+            print(f"⏱️ mean detection lag: {np.mean(comparison['lag_frames']):.1f} frames")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded frames through the vision pipeline.")
+    parser.add_argument("source", help="video file or directory of frames")
+    parser.add_argument("--roi", default=None,
+                        help="saved board ROI (x, y, w, h); used instead of the homography if given")
+    parser.add_argument("--homography", default=None,
+                        help=f"saved board homography (default: {HOMOGRAPHY_FILE}, else board_grid.npy)")
+    parser.add_argument("--cell", default=None,
+                        help="processing cell size WxH (default: full resolution; main.py uses 14x12)")
+    parser.add_argument("--gate", action="store_true",
+                        help="skip frames the motion gate would skip, as main.py does")
+    parser.add_argument("--truth", default=None, help="ground-truth move list (JSON)")
+    parser.add_argument("--profile", default=None, help="colour profile to classify with")
+    args = parser.parse_args()
+
+    cell_size = None
+    if args.cell:
+        cell_w, cell_h = args.cell.lower().split("x")
+        cell_size = (int(cell_w), int(cell_h))
+
+    # An explicit --roi wins; with neither option the session's homography is preferred
+    if args.roi is not None and args.homography is None:
+        homography, roi = None, args.roi
+    else:
+        homography, roi = args.homography or HOMOGRAPHY_FILE, args.roi or "board_grid.npy"
+    view = BoardView.load(homography, roi, cell_size=cell_size)
+    if view is None:
+        raise SystemExit(f"❌ {' nor '.join(p for p in (homography, roi) if p)} not found.")
+
+    from .color_calibration import load_profile
+    result = replay(args.source, view, thresholds=load_profile(args.profile),
+                    gate=MotionGate() if args.gate else None)
+    comparison = None
+    if args.truth:
+        comparison = compare_moves(result[0], load_ground_truth(args.truth))
+    print_report(*result, comparison=comparison)
@@ -0,0 +1,254 @@
+# vision/shared_frames.py
+
+import itertools
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from .camera_session import settle_exposure
+
+# Per-slot header: [sequence number, capture timestamp]
+_HEADER_FIELDS = 2
+# Global header: [latest published sequence number, frame h, w, channels]
+_GLOBAL_FIELDS = 4
+_WRITING = -1
+
+_ring_ids = itertools.count()
+
+
+class SharedFrameRing:
+    """
+    Ring of camera frames in one `multiprocessing.shared_memory` block.
+
+    The capture process writes frame `seq` into slot `seq % slots` and then
+    publishes `seq`; readers map the same memory as NumPy arrays, so frames
+    are never pickled or copied between processes. Each slot carries its own
+    sequence number, which readers use to detect a slot that was overwritten
+    while they were still using it.
+    """
+
+    def __init__(self, name, shape, slots=8, create=False):
+        self.shape = tuple(shape)
+        self.slots = slots
+        frame_bytes = int(np.prod(self.shape))
+        header_bytes = 8 * (_GLOBAL_FIELDS + _HEADER_FIELDS * slots)
+        size = header_bytes + frame_bytes * slots
+
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.owner = create
+
+        buf = self.shm.buf
+        self._global = np.ndarray((_GLOBAL_FIELDS,), dtype=np.int64, buffer=buf)
+        self._slot_seq = np.ndarray((slots,), dtype=np.int64, buffer=buf, offset=8 * _GLOBAL_FIELDS)
+        self._slot_ts = np.ndarray((slots,), dtype=np.float64, buffer=buf,
+                                   offset=8 * (_GLOBAL_FIELDS + slots))
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=buf,
+                                 offset=header_bytes)
+        if create:
+            self._global[:] = (-1,) + tuple(self.shape)
+            self._slot_seq[:] = _WRITING
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    # ---------- writer side ----------
+    def begin_write(self, seq):
+        """Mark the slot for `seq` as being written and return its array view."""
+        slot = seq % self.slots
+        self._slot_seq[slot] = _WRITING
+        return self.frames[slot]
+
+    def publish(self, seq, timestamp):
+        slot = seq % self.slots
+        self._slot_ts[slot] = timestamp
+        self._slot_seq[slot] = seq
+        self._global[0] = seq
+
+    # ---------- reader side ----------
+    def latest_seq(self):
+        return int(self._global[0])
+
+    def view(self, seq):
+        """(frame view, capture timestamp) for `seq`, or (None, None) if already overwritten."""
+        slot = seq % self.slots
+        ts = float(self._slot_ts[slot])
+        if self._slot_seq[slot] != seq:
+            return None, None
+        return self.frames[slot], ts
+
+    def is_valid(self, seq):
+        """True while the slot still holds frame `seq` (check after using a view)."""
+        return self._slot_seq[seq % self.slots] == seq
+
+    def close(self):
+        # Drop our array views before closing the mapping
+        self._global = self._slot_seq = self._slot_ts = self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # A caller still holds a frame view; the mapping goes away with the process
+            pass
+        if self.owner:
+            self.shm.unlink()
+
+
+def _capture_loop(camera_id, ring_name, slots, size, info_queue, stop_event):
+    """Capture process: grab frames straight into the shared ring."""
+    cap = cv2.VideoCapture(camera_id)
+    if size is not None:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, size[0])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, size[1])
+    # First frames out of a fresh device are under/over-exposed; readers
+    # (board auto-detection, priming) should only ever see settled ones
+    if cap.isOpened():
+        settle_exposure(cap)
+    ret, frame = cap.read() if cap.isOpened() else (False, None)
+    if not ret:
+        info_queue.put(None)
+        cap.release()
+        return
+
+    try:
+        ring = SharedFrameRing(ring_name, frame.shape, slots=slots, create=True)
+    except OSError as e:
+        print(f"❌ Could not create shared frame ring: {e}")
+        info_queue.put(None)
+        cap.release()
+        return
+    info_queue.put(frame.shape)
+
+    seq = 0
+    try:
+        while not stop_event.is_set():
+            if not cap.grab():
+                break
+            ts = time.time()
+            slot_view = ring.begin_write(seq)
+            ret, img = cap.retrieve(slot_view)
+            if not ret:
+                break
+            if img is not slot_view and img.shape == slot_view.shape:
+                np.copyto(slot_view, img)
+            ring.publish(seq, ts)
+            seq += 1
+        slot_view = img = None
+    finally:
+        cap.release()
+        # Let the reader detach before the segment is unlinked
+        stop_event.wait(timeout=5.0)
+        ring.close()
+
+
+class SharedCapture:
+    """
+    Drop-in replacement for cv2.VideoCapture that runs capture in its own
+    process. read() returns the newest frame as a view into shared memory
+    (valid until the ring wraps around – copy it if you keep it longer).
+
+    Frame age (capture timestamp → record_age() call) is tracked so the
+    end-to-end latency of the pipeline can be reported. When frames are
+    displayed on another thread than the one reading them, pass stamp()
+    along with each frame and hand it back to record_age().
+    """
+
+    def __init__(self, camera_id, size=None, slots=8, timeout=10.0):
+        ctx = mp.get_context("spawn")
+        self._name = f"c4_frames_{os.getpid()}_{next(_ring_ids)}"
+        self._stop = ctx.Event()
+        info_queue = ctx.Queue()
+        self._proc = ctx.Process(target=_capture_loop, name="capture",
+                                 args=(camera_id, self._name, slots, size, info_queue, self._stop),
+                                 daemon=True)
+        self._proc.start()
+
+        self.ring = None
+        try:
+            shape = info_queue.get(timeout=timeout)
+        except Exception:
+            shape = None
+        if shape is not None:
+            self.ring = SharedFrameRing(self._name, shape, slots=slots)
+
+        self._last_seq = -1
+        self._current_ts = None
+        self._current_seq = None
+        self.ages = []
+        self.dropped = 0
+        self.torn = 0
+
+    def isOpened(self):
+        return self.ring is not None
+
+    def read(self, timeout=2.0):
+        """Block until a newer frame is published; returns (ret, frame_view)."""
+        if self.ring is None:
+            return False, None
+        deadline = time.time() + timeout
+        while True:
+            seq = self.ring.latest_seq()
+            if seq > self._last_seq:
+                frame, ts = self.ring.view(seq)
+                if frame is not None:
+                    if self._last_seq >= 0:
+                        self.dropped += seq - self._last_seq - 1
+                    self._last_seq = seq
+                    self._current_seq = seq
+                    self._current_ts = ts
+                    return True, frame
+            if not self._proc.is_alive() or time.time() > deadline:
+                return False, None
+            time.sleep(0.001)
+
+    def grab(self, timeout=2.0):
+        """Skip to the newest frame without handing it out (like VideoCapture.grab)."""
+        ret, _ = self.read(timeout)
+        self._current_ts = None
+        return ret
+
+    def stamp(self):
+        """(sequence number, capture timestamp) of the frame read last, None after grab()."""
+        if self._current_ts is None:
+            return None
+        return self._current_seq, self._current_ts
+
+    def record_age(self, stamp=None):
+        """
+        Record how old a frame is now (call after display). `stamp` is the
+        frame's stamp(); None = the frame read last on this thread.
+        """
+        stamp = self.stamp() if stamp is None else stamp
+        if stamp is None or self.ring is None:
+            return None
+        seq, ts = stamp
+        if not self.ring.is_valid(seq):
+            self.torn += 1
+        age = time.time() - ts
+        self.ages.append(age)
+        return age
+
+    def age_stats(self):
+        if not self.ages:
+            return None
+        ages_ms = np.array(self.ages) * 1000.0
+        return {
+            "frames": len(ages_ms),
+            "mean_ms": float(ages_ms.mean()),
+            "p95_ms": float(np.percentile(ages_ms, 95)),
+            "max_ms": float(ages_ms.max()),
+            "dropped": self.dropped,
+            "torn": self.torn,
+        }
+
+    def release(self):
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+        self._stop.set()
+        self._proc.join(timeout=5.0)
+        if self._proc.is_alive():
+            self._proc.terminate()
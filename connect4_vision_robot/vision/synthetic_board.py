@@ -0,0 +1,387 @@
+# vision/synthetic_board.py
+
+import argparse
+import json
+import os
+import time
+import cv2
+import numpy as np
+
+from .board_localizer import BoardLocalizer
+from .board_view import BoardView
+from .color_detection import detect_colors
+from .detect_move import detect_move_strict
+from .frame_context import FrameContext
+from .map_discs_to_grid import map_discs_to_grid
+from .motion_gate import MotionGate
+
+# BGR colours of the physical pieces
+BOARD_BGR = (170, 70, 20)
+HOLE_BGR = (215, 215, 210)      # wall behind the board seen through empty holes
+DISC_BGR = {1: (35, 35, 200), 2: (30, 200, 225)}
+TABLE_BGR = (120, 130, 140)
+SKIN_BGR = (120, 160, 215)
+
+
+class RenderConfig:
+    """Knobs for the synthetic camera. Zero disables an effect."""
+
+    def __init__(self,
+                 frame_size=(640, 480),
+                 cell=60,
+                 rim=20,
+                 perspective=0.04,
+                 lighting=0.25,
+                 noise=6.0,
+                 glare=0.5,
+                 occlusion=True,
+                 motion_blur=15,
+                 seed=None):
+        """
+        frame_size:  (w, h) of the rendered camera frame
+        cell:        pixels per cell of the flat board before projection
+        rim:         board border around the hole lattice (px, flat board)
+        perspective: random corner jitter as a fraction of the board width
+        lighting:    strength of the linear brightness gradient (0..1)
+        noise:       std-dev of Gaussian sensor noise (gray levels)
+        glare:       peak strength of a specular highlight (0..1)
+        occlusion:   draw a hand over the board while a disc is dropped
+        motion_blur: vertical blur length (px) of a falling disc
+        seed:        RNG seed for reproducible sequences
+        """
+        self.frame_size = frame_size
+        self.cell = cell
+        self.rim = rim
+        self.perspective = perspective
+        self.lighting = lighting
+        self.noise = noise
+        self.glare = glare
+        self.occlusion = occlusion
+        self.motion_blur = motion_blur
+        self.seed = seed
+
+
+class SyntheticBoardRenderer:
+    """
+    Renders camera-like frames of a Connect 4 board from a `Connect4Game.board`
+    array (image rows, top = 0). The board pose is fixed per renderer so a
+    sequence looks like one camera session; `homography` maps camera pixels to
+    the rectified hole lattice, exactly like a calibrated BoardLocalizer.
+    """
+
+    def __init__(self, config=None, rows=6, cols=7):
+        self.config = config or RenderConfig()
+        self.rows = rows
+        self.cols = cols
+        self.rng = np.random.default_rng(self.config.seed)
+
+        cfg = self.config
+        self.flat_size = (cols * cfg.cell + 2 * cfg.rim, rows * cfg.cell + 2 * cfg.rim)
+        self._place_board()
+
+        fw, fh = cfg.frame_size
+        self._background = np.empty((fh, fw, 3), dtype=np.uint8)
+        self._background[:] = TABLE_BGR
+        self._build_lighting()
+
+    # ---------- geometry ----------
+    def _place_board(self):
+        cfg = self.config
+        fw, fh = cfg.frame_size
+        bw, bh = self.flat_size
+        scale = 0.75 * min(fw / bw, fh / bh)
+        cx, cy = fw / 2.0, fh / 2.0
+        half = np.array([bw * scale / 2.0, bh * scale / 2.0])
+        quad = np.array([[cx - half[0], cy - half[1]],
+                         [cx + half[0], cy - half[1]],
+                         [cx + half[0], cy + half[1]],
+                         [cx - half[0], cy + half[1]]], dtype=np.float32)
+        jitter = cfg.perspective * bw * scale
+        quad += self.rng.uniform(-jitter, jitter, quad.shape).astype(np.float32)
+
+        flat = np.array([[0, 0], [bw, 0], [bw, bh], [0, bh]], dtype=np.float32)
+        self.H_render = cv2.getPerspectiveTransform(flat, quad)
+        self.quad = quad
+
+    def homography(self, cell_w=40, cell_h=40):
+        """Camera → rectified lattice homography (rows*cell_h x cols*cell_w image)."""
+        cfg = self.config
+        to_lattice = np.array([[cell_w / cfg.cell, 0, -cfg.rim * cell_w / cfg.cell],
+                               [0, cell_h / cfg.cell, -cfg.rim * cell_h / cfg.cell],
+                               [0, 0, 1]], dtype=np.float64)
+        return to_lattice @ np.linalg.inv(self.H_render)
+
+    def roi(self):
+        """Axis-aligned (x, y, w, h) around the hole lattice, for ROI-based pipelines."""
+        cfg = self.config
+        bw, bh = self.flat_size
+        inner = np.array([[[cfg.rim, cfg.rim]], [[bw - cfg.rim, cfg.rim]],
+                          [[bw - cfg.rim, bh - cfg.rim]], [[cfg.rim, bh - cfg.rim]]],
+                         dtype=np.float32)
+        pts = cv2.perspectiveTransform(inner, self.H_render).reshape(-1, 2)
+        x0, y0 = np.floor(pts.min(axis=0)).astype(int)
+        x1, y1 = np.ceil(pts.max(axis=0)).astype(int)
+        return int(x0), int(y0), int(x1 - x0), int(y1 - y0)
+
+    # ---------- flat board ----------
+    def _hole_centre(self, r, c):
+        cfg = self.config
+        return (int(cfg.rim + (c + 0.5) * cfg.cell), int(cfg.rim + (r + 0.5) * cfg.cell))
+
+    def _draw_flat(self, board):
+        cfg = self.config
+        bw, bh = self.flat_size
+        flat = np.empty((bh, bw, 3), dtype=np.uint8)
+        flat[:] = BOARD_BGR
+        radius = int(cfg.cell * 0.4)
+        for r in range(self.rows):
+            for c in range(self.cols):
+                colour = DISC_BGR.get(int(board[r, c]), HOLE_BGR)
+                cv2.circle(flat, self._hole_centre(r, c), radius, colour, -1, cv2.LINE_AA)
+        return flat
+
+    def _draw_falling_disc(self, flat, col, color, progress):
+        """Disc between the top of the board and its target, with vertical motion blur."""
+        cfg = self.config
+        layer = np.zeros(flat.shape, dtype=np.float32)
+        alpha = np.zeros(flat.shape[:2], dtype=np.float32)
+        x = self._hole_centre(0, col)[0]
+        y = int(cfg.rim * 0.5 + progress * (flat.shape[0] - cfg.rim))
+        radius = int(cfg.cell * 0.4)
+        cv2.circle(layer, (x, y), radius, DISC_BGR[color], -1, cv2.LINE_AA)
+        cv2.circle(alpha, (x, y), radius, 1.0, -1, cv2.LINE_AA)
+        if cfg.motion_blur > 1:
+            k = np.full((int(cfg.motion_blur), 1), 1.0 / int(cfg.motion_blur), dtype=np.float32)
+            layer = cv2.filter2D(layer, -1, k)
+            alpha = cv2.filter2D(alpha, -1, k)
+            # The blurred colour layer is pre-multiplied by coverage
+            layer = np.clip(layer / np.maximum(alpha, 1e-3)[..., None], 0, 255)
+        a = alpha[..., None]
+        flat[:] = np.clip(flat * (1 - a) + layer * a, 0, 255).astype(np.uint8)
+
+    # ---------- camera effects ----------
+    def _draw_hand(self, frame, col, depth):
+        """Skin-coloured arm from the top edge reaching towards a column."""
+        cfg = self.config
+        x, _ = self._hole_centre(0, col)
+        tip = cv2.perspectiveTransform(np.array([[[x, cfg.rim + depth * cfg.cell]]],
+                                                dtype=np.float32), self.H_render)[0, 0]
+        width = int(0.9 * cfg.cell * frame.shape[1] / self.flat_size[0])
+        top = (int(tip[0] + self.rng.uniform(-width, width)), 0)
+        cv2.line(frame, top, (int(tip[0]), int(tip[1])), SKIN_BGR, width, cv2.LINE_AA)
+        cv2.ellipse(frame, (int(tip[0]), int(tip[1])), (width, int(width * 0.7)),
+                    0, 0, 360, SKIN_BGR, -1, cv2.LINE_AA)
+
+    def _build_lighting(self):
+        """Gradient and glare are fixed per session (same lamp, same camera)."""
+        cfg = self.config
+        w, h = cfg.frame_size
+        ys, xs = np.mgrid[0:h, 0:w].astype(np.float32)
+
+        self._gain = np.ones((h, w, 1), dtype=np.float32)
+        if cfg.lighting > 0:
+            angle = self.rng.uniform(0, 2 * np.pi)
+            ramp = (np.cos(angle) * (xs / w - 0.5) + np.sin(angle) * (ys / h - 0.5))
+            self._gain[..., 0] += cfg.lighting * ramp
+
+        self._glare = np.zeros((h, w, 1), dtype=np.float32)
+        if cfg.glare > 0:
+            gx, gy = self.rng.uniform(0.2, 0.8) * w, self.rng.uniform(0.2, 0.8) * h
+            sigma = 0.08 * w
+            spot = np.exp(-((xs - gx) ** 2 + (ys - gy) ** 2) / (2 * sigma ** 2))
+            self._glare[..., 0] = cfg.glare * 255.0 * spot
+
+    def _apply_lighting(self, frame):
+        cfg = self.config
+        out = frame.astype(np.float32)
+        out *= self._gain
+        out += self._glare
+        if cfg.noise > 0:
+            out += self.rng.normal(0.0, cfg.noise, out.shape).astype(np.float32)
+        return np.clip(out, 0, 255).astype(np.uint8)
+
+    # ---------- public ----------
+    def render(self, board, falling=None, hand=None):
+        """
+        Render one camera frame.
+        falling: optional (col, color, progress 0..1) for a disc mid-drop
+        hand:    optional (col, depth in cells) for a hand over the board
+        """
+        flat = self._draw_flat(board)
+        if falling is not None:
+            self._draw_falling_disc(flat, *falling)
+        frame = self._background.copy()
+        cv2.warpPerspective(flat, self.H_render, self.config.frame_size, dst=frame,
+                            borderMode=cv2.BORDER_TRANSPARENT)
+        if hand is not None and self.config.occlusion:
+            self._draw_hand(frame, *hand)
+        return self._apply_lighting(frame)
+
+    def render_game(self, moves, hand_frames=3, drop_frames=3, rest_frames=6, start_frames=4):
+        """
+        Yield (frame, label) for a whole game. `moves` is a list of (col, color).
+        label = {"frame", "board" (settled board as 6x7 list), "settled", "move"}.
+        While a hand or falling disc is in view the label still holds the
+        previous settled board and settled=False.
+        """
+        board = np.zeros((self.rows, self.cols), dtype=int)
+        idx = 0
+
+        def emit(frame, settled, move):
+            nonlocal idx
+            label = {"frame": idx, "board": board.tolist(), "settled": settled, "move": move}
+            idx += 1
+            return frame, label
+
+        for _ in range(start_frames):
+            yield emit(self.render(board), True, None)
+
+        for m, (col, color) in enumerate(moves):
+            empty = np.where(board[:, col] == 0)[0]
+            if empty.size == 0:
+                raise ValueError(f"Column {col} is full.")
+            row = int(empty.max())
+
+            for k in range(hand_frames):
+                yield emit(self.render(board, hand=(col, -0.5 + 0.3 * k)), False, m)
+            target = (row + 0.5) / self.rows
+            for k in range(drop_frames):
+                progress = target * (k + 1) / (drop_frames + 1)
+                hand = (col, -0.5) if k == 0 else None
+                yield emit(self.render(board, falling=(col, color, progress), hand=hand), False, m)
+
+            board[row, col] = color
+            for _ in range(rest_frames):
+                yield emit(self.render(board), True, m)
+
+
+def random_game(num_moves, rng, rows=6, cols=7):
+    """Random legal move list [(col, color), ...] alternating red/yellow, stopping early if full."""
+    heights = np.zeros(cols, dtype=int)
+    moves = []
+    color = 1
+    for _ in range(num_moves):
+        legal = np.where(heights < rows)[0]
+        if legal.size == 0:
+            break
+        col = int(rng.choice(legal))
+        heights[col] += 1
+        moves.append((col, color))
+        color = 1 if color == 2 else 2
+    return moves
+
+
+def score_sequence(samples, board_view, moves, map_fn=map_discs_to_grid,
+                   move_fn=detect_move_strict, rows=6, cols=7, gate=None):
+    """
+    Score a mapping / move-detection variant on rendered (frame, label) samples.
+    Returns settled-frame board accuracy, detected vs true moves and frames/sec.
+    With a MotionGate only the frames it lets through are classified (as in
+    main.py); board accuracy is then scored on the frames it classifies.
+    """
+    from .replay import compare_moves
+
+    ctx = FrameContext((board_view.size[1], board_view.size[0]), (rows, cols))
+    previous = None
+    detected = []
+    settled = exact = 0
+    t0 = time.perf_counter()
+    for frame, label in samples:
+        view = board_view.crop(frame)
+        if gate is not None and not gate.update(view):
+            continue
+        mask_yellow, mask_red, _ = detect_colors(view, None, ctx, min_area=board_view.min_area)
+        board = map_fn(mask_red, mask_yellow, grid_shape=(rows, cols),
+                       out=ctx.board, min_area=board_view.min_area)
+        if previous is None:
+            previous = board.copy()
+        else:
+            r_img, c_img, color, new_move = move_fn(previous, board, rows, cols)
+            if new_move:
+                detected.append({"frame": label["frame"], "col": int(c_img), "color": color})
+                previous = board.copy()
+        if label["settled"]:
+            settled += 1
+            exact += int(np.array_equal(board, label["board"]))
+    elapsed = time.perf_counter() - t0
+
+    truth = []
+    for frame, label in samples:
+        if label["settled"] and label["move"] is not None and label["move"] == len(truth):
+            col, color = moves[label["move"]]
+            truth.append({"frame": label["frame"], "col": col, "color": color})
+
+    result = compare_moves(detected, truth)
+    result["board_accuracy"] = exact / settled if settled else 0.0
+    result["fps"] = len(samples) / elapsed if elapsed else 0.0
+    return result
+
+
+def write_dataset(out_dir, renderer, moves, samples):
+    """
+    Save frames plus labels in the formats used by vision.board_scale
+    (labels.json, board_grid.npy) and vision.replay (moves.json, board_homography.npz).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    labels = {}
+    truth = []
+    first_frame = None
+    for frame, label in samples:
+        name = f"{label['frame']:06d}.png"
+        cv2.imwrite(os.path.join(out_dir, name), frame)
+        if first_frame is None:
+            first_frame = frame
+        if label["settled"]:
+            labels[name] = label["board"]
+            if label["move"] is not None and label["move"] == len(truth):
+                col, color = moves[label["move"]]
+                truth.append({"col": col, "color": color, "frame": label["frame"]})
+
+    with open(os.path.join(out_dir, "labels.json"), "w") as f:
+        json.dump(labels, f)
+    with open(os.path.join(out_dir, "moves.json"), "w") as f:
+        json.dump(truth, f, indent=1)
+    np.save(os.path.join(out_dir, "board_grid.npy"), np.array(renderer.roi()))
+    localizer = BoardLocalizer.from_homography(renderer.homography(), first_frame,
+                                               renderer.rows, renderer.cols)
+    localizer.save(os.path.join(out_dir, "board_homography.npz"))
+    print(f"✅ Wrote {len(samples)} frames ({len(truth)} moves) to {out_dir}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render labelled synthetic Connect 4 frames.")
+    parser.add_argument("--games", type=int, default=1)
+    parser.add_argument("--moves", type=int, default=20, help="moves per game")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--perspective", type=float, default=0.04)
+    parser.add_argument("--lighting", type=float, default=0.25)
+    parser.add_argument("--noise", type=float, default=6.0)
+    parser.add_argument("--glare", type=float, default=0.5)
+    parser.add_argument("--motion-blur", type=int, default=15)
+    parser.add_argument("--no-occlusion", action="store_true")
+    parser.add_argument("--cell", default=None, help="processing cell size WxH when scoring")
+    parser.add_argument("--gate", action="store_true",
+                        help="classify only the frames main.py's motion gate lets through")
+    parser.add_argument("--out", default=None, help="write frames + labels here instead of scoring")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    cell_size = tuple(int(v) for v in args.cell.lower().split("x")) if args.cell else None
+    for g in range(args.games):
+        config = RenderConfig(perspective=args.perspective, lighting=args.lighting,
+                              noise=args.noise, glare=args.glare,
+                              occlusion=not args.no_occlusion,
+                              motion_blur=args.motion_blur, seed=args.seed + g)
+        renderer = SyntheticBoardRenderer(config)
+        moves = random_game(args.moves, rng)
+        samples = list(renderer.render_game(moves))
+
+        if args.out:
+            write_dataset(os.path.join(args.out, f"game{g:03d}"), renderer, moves, samples)
+            continue
+
+        localizer = BoardLocalizer.from_homography(renderer.homography(), samples[0][0])
+        view = BoardView(localizer=localizer, cell_size=cell_size)
+        result = score_sequence(samples, view, moves, gate=MotionGate() if args.gate else None)
+        print(f"game {g}: boards {result['board_accuracy']:.1%}  moves {result['matched']}/"
+              f"{len(moves)} (+{result['extra']} extra)  {result['fps']:.0f} FPS")